@@ -3,18 +3,26 @@ import os
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_pymongo import PyMongo
-from flask_jwt_extended import JWTManager
 from flask_mail import Mail
 from flask_sock import Sock
 from dotenv import load_dotenv
 
 from .config.settings import config
 from .database import init_db
+from .utils.identity_map import init_identity_map
+from .middlewares.logger import setup_logging
+from .middlewares.metrics import init_metrics, PoolMetricsListener
+from .middlewares.db_profiler import init_db_profiler, RequestCommandListener
+from .middlewares.tracing import init_tracing, TracingCommandListener
+from .middlewares.profiler import init_profiler
+from .middlewares.audit import init_audit
+from .middlewares.traffic_capture import init_traffic_capture
+from .auth.jwt_manager import CachingJWTManager, register_jwt_callbacks
 
 load_dotenv()
 
 # Extensions (initialized later)
-jwt = JWTManager()
+jwt = CachingJWTManager()
 mail = Mail()
 sock = Sock()
 
@@ -23,10 +31,40 @@ def create_app(config_name='development'):
     app.config.from_object(config[config_name])
 
     # ---------- DB ----------
-    init_db(app)
+    init_db(app, event_listeners=[
+        PoolMetricsListener(),
+        RequestCommandListener(
+            slow_ms=app.config.get('DB_SLOW_QUERY_MS'),
+            explain_rate=app.config.get('DB_SLOW_QUERY_EXPLAIN_RATE', 0.0),
+        ),
+        TracingCommandListener(),
+    ])
+
+    # ---------- Structured request logging (queued, sampled) ----------
+    setup_logging(app)
+
+    # ---------- Request tracing (spans to a rotating local file) ----------
+    init_tracing(app)
+
+    # ---------- On-demand cProfile of admin requests (X-Profile: 1) ----------
+    init_profiler(app)
+
+    # ---------- Metrics (/metrics) and per-request MongoDB command stats ----------
+    init_metrics(app)
+    init_db_profiler(app)
+
+    # ---------- Audit trail of mutating requests (batched into system_logs) ----------
+    init_audit(app)
+
+    # ---------- Anonymised traffic capture for load replay (off by default) ----------
+    init_traffic_capture(app)
+
+    # ---------- Request-scoped identity map ----------
+    init_identity_map(app)
 
     # ---------- Extensions ----------
     jwt.init_app(app)
+    register_jwt_callbacks(jwt)
     mail.init_app(app)
     sock.init_app(app)
 
@@ -60,6 +98,10 @@ def create_app(config_name='development'):
             resp.headers.add("Access-Control-Allow-Methods", "GET,POST,PUT,PATCH,DELETE,OPTIONS")
             return resp
 
+    # ---------- Rate limiting (policy table from the settings collection) ----------
+    from .middlewares.rate_limiter import init_rate_limiting
+    init_rate_limiting(app)
+
     # ---------- Blueprints ----------
     from .routes.auth_routes import auth_bp
     from .routes.student_routes import student_bp
@@ -80,6 +122,11 @@ def create_app(config_name='development'):
     register_admin_ws(sock)
     register_lecturer_ws(sock)
 
+    # ---------- system_logs retention / archival ----------
+    if app.config.get('LOG_RETENTION_ENABLED'):
+        from .services.log_retention import start_retention_worker
+        start_retention_worker(app)
+
     # ---------- Health ----------
     @app.route('/')
     def index():
@@ -1,17 +1,17 @@
 # backend/app/auth/auth_utils.py
-import bcrypt
 from flask_jwt_extended import create_access_token, create_refresh_token
 from datetime import timedelta
 
+from backend.app.services import password_service
+
 # ================== Password Utilities ==================
 def hash_password(password: str) -> str:
-    """Hash a plain password using bcrypt."""
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+    """Hash a plain password using bcrypt (via the shared hashing service)."""
+    return password_service.hash_password(password)
 
 def verify_password(password: str, hashed: str) -> bool:
-    """Check if password matches hash."""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    """Check if password matches a bcrypt or legacy Werkzeug hash."""
+    return password_service.verify_password(password, hashed)
 
 # ================== JWT Token Utilities ==================
 def generate_tokens(user_id: str, role: str, access_expires_hours: int = 2):
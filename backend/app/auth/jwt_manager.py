@@ -0,0 +1,63 @@
+# backend/app/auth/jwt_manager.py
+import hashlib
+import time
+
+from flask import current_app
+from flask_jwt_extended import JWTManager
+
+from backend.app.services import token_revocation
+from backend.app.utils.cache import TTLCache
+
+
+class CachingJWTManager(JWTManager):
+    """
+    JWTManager that remembers tokens it has already verified.
+
+    Dashboards send bursts of requests with the same bearer token; after the
+    first full decode and signature check, the decoded claims are served from
+    a bounded LRU keyed by the token's SHA-256 digest. Entries never outlive
+    the token's own `exp`, so expiry is still enforced by a full decode.
+    Revocation is checked after decoding and is unaffected.
+    """
+
+    def __init__(self, app=None, add_context_processor=False):
+        self._verified = None
+        super().__init__(app, add_context_processor)
+
+    def _cache(self):
+        if self._verified is None:
+            cfg = current_app.config
+            self._verified = TTLCache(
+                maxsize=int(cfg.get("JWT_VERIFIED_CACHE_SIZE", 10000)),
+                ttl=float(cfg.get("JWT_VERIFIED_CACHE_SECONDS", 300)),
+            )
+        return self._verified
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        cache = self._cache()
+        if csrf_value is not None or cache.maxsize <= 0:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        key = (current_app.config.get("JWT_SECRET_KEY"),
+               hashlib.sha256(encoded_token.encode("utf-8")).digest())
+        claims = cache.get(key)
+        if claims is not None:
+            return dict(claims)
+
+        claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        exp = claims.get("exp")
+        remaining = cache.ttl if exp is None else min(cache.ttl, exp - time.time())
+        cache.set(key, dict(claims), ttl=remaining)
+        return claims
+
+    def clear_verified_cache(self):
+        if self._verified is not None:
+            self._verified.clear()
+
+
+def register_jwt_callbacks(jwt):
+    """Attach SmartAttendance's callbacks to the app's JWTManager."""
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return token_revocation.is_revoked(jwt_payload.get("jti"))
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -19,6 +20,9 @@ class Config:
     JWT_HEADER_TYPE = "Bearer"
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 3600)))
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', 2592000)))
+    # Already-verified tokens are cached per worker (bounded LRU, never past `exp`); 0 disables
+    JWT_VERIFIED_CACHE_SIZE = int(os.getenv('JWT_VERIFIED_CACHE_SIZE', 10000))
+    JWT_VERIFIED_CACHE_SECONDS = int(os.getenv('JWT_VERIFIED_CACHE_SECONDS', 300))
     
     # CORS Settings (allow the local dev frontend by default)
     # Safely split and strip whitespace
@@ -37,6 +41,104 @@ class Config:
     QR_BASE_URL = os.getenv('QR_BASE_URL', 'http://127.0.0.1:5000/api/attendance/scan')
     QR_CODE_EXPIRY_MINUTES = int(os.getenv('QR_CODE_EXPIRY_MINUTES', 10))
 
+    # Bulk QR sheets (printable PDFs rendered on a process pool)
+    QR_SHEET_DIR = os.getenv('QR_SHEET_DIR', os.path.join(tempfile.gettempdir(), 'smartattendance_qr_sheets'))
+    QR_SHEET_WORKERS = int(os.getenv('QR_SHEET_WORKERS', os.cpu_count() or 2))
+    QR_SHEET_MAX_CODES = int(os.getenv('QR_SHEET_MAX_CODES', 2000))
+
+    # Numeric check-in codes (6 digits, rotating every period)
+    CHECKIN_CODE_SECRET = os.getenv('CHECKIN_CODE_SECRET')  # falls back to JWT_SECRET_KEY
+    CHECKIN_CODE_PERIOD_SECONDS = int(os.getenv('CHECKIN_CODE_PERIOD_SECONDS', 30))
+    # Code attempts per student per 5 minutes, counted in the RATE_LIMIT_BACKEND
+    CHECKIN_CODE_MAX_ATTEMPTS = int(os.getenv('CHECKIN_CODE_MAX_ATTEMPTS', 10))
+
+    # Password hashing (bcrypt on a bounded thread pool; excess load gets 503)
+    PASSWORD_BCRYPT_ROUNDS = int(os.getenv('PASSWORD_BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 4))
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', 64))
+    PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv('PASSWORD_HASH_TIMEOUT_SECONDS', 10))
+
+    # App-wide rate limiting by policy table (settings `_id: "rate_limits"`, reloaded periodically)
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    RATE_LIMIT_POLICY_RELOAD_SECONDS = float(os.getenv('RATE_LIMIT_POLICY_RELOAD_SECONDS', 10))
+
+    # Rate limiting backend: memory (per worker), mmap (shared by workers on one host)
+    # or mongo (shared across hosts, synced every RATE_LIMIT_SYNC_SECONDS)
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_MMAP_PATH = os.getenv('RATE_LIMIT_MMAP_PATH', os.path.join(tempfile.gettempdir(), 'smartattendance_ratelimit.bin'))
+    RATE_LIMIT_MMAP_SLOTS = int(os.getenv('RATE_LIMIT_MMAP_SLOTS', 65536))
+    RATE_LIMIT_SYNC_SECONDS = float(os.getenv('RATE_LIMIT_SYNC_SECONDS', 1.0))
+
+    # Request logging: JSON lines written by a background listener thread
+    LOG_FILE = os.getenv('LOG_FILE')  # console only when unset
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))  # records beyond this are dropped
+    LOG_BODY_MAX_CHARS = int(os.getenv('LOG_BODY_MAX_CHARS', 2048))
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 1.0))
+    LOG_ROUTE_SAMPLE_RATES = os.getenv('LOG_ROUTE_SAMPLE_RATES', '')  # e.g. "student_bp.scan_qr=0.1"
+    LOG_SLOW_MS = float(os.getenv('LOG_SLOW_MS', 1000))  # slower requests are always logged
+
+    # /metrics (Prometheus text format); set a directory to aggregate across gunicorn workers
+    METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR')
+    METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', 5))
+    # Access: a bearer token if set, else direct scrapes from the allow-list
+    # (requests forwarded by a reverse proxy are refused)
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+    METRICS_ALLOW_REMOTE = os.getenv('METRICS_ALLOW_REMOTE', 'False').lower() == 'true'
+
+    # Per-request MongoDB command stats: X-DB-* response headers (default: on in DEBUG)
+    # and a warning when one query shape repeats this many times in a request
+    DB_DEBUG_HEADERS = (os.getenv('DB_DEBUG_HEADERS').lower() == 'true'
+                        if os.getenv('DB_DEBUG_HEADERS') is not None else None)
+    DB_N_PLUS_ONE_THRESHOLD = int(os.getenv('DB_N_PLUS_ONE_THRESHOLD', 5))
+
+    # Query budgets: @query_budget(n) caps a handler's own commands; other
+    # routes get QUERY_BUDGET_DEFAULT per request. Over budget raises when
+    # QUERY_BUDGET_ENFORCE is on (unset: only under TESTING), else logs
+    QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', 25))
+    QUERY_BUDGET_ENFORCE = (os.getenv('QUERY_BUDGET_ENFORCE').lower() == 'true'
+                            if os.getenv('QUERY_BUDGET_ENFORCE') is not None else None)
+
+    # Slow query log: commands at or over this many ms go to the capped
+    # `slow_queries` collection, this fraction of them with an explain plan
+    DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 100))
+    DB_SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('DB_SLOW_QUERY_EXPLAIN_RATE', 0.1))
+
+    # Tracing: spans written to a rotating Chrome trace-event file (off when unset)
+    TRACE_FILE = os.getenv('TRACE_FILE')
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 1.0))
+    TRACE_MAX_BYTES = int(os.getenv('TRACE_MAX_BYTES', 50 * 1024 * 1024))
+    TRACE_BACKUP_COUNT = int(os.getenv('TRACE_BACKUP_COUNT', 5))
+
+    # On-demand profiling: admins send `X-Profile: 1`; profiles kept in PROFILE_DIR
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True').lower() == 'true'
+    PROFILE_DIR = os.getenv('PROFILE_DIR')
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 50))
+    PROFILE_MAX_BYTES = int(os.getenv('PROFILE_MAX_BYTES', 200 * 1024 * 1024))
+    PROFILE_MAX_CONCURRENT = int(os.getenv('PROFILE_MAX_CONCURRENT', 2))
+
+    # Audit trail: mutating requests are buffered and written to system_logs
+    # with insert_many every AUDIT_BATCH_SIZE records or AUDIT_FLUSH_SECONDS
+    AUDIT_ENABLED = os.getenv('AUDIT_ENABLED', 'True').lower() == 'true'
+    AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 200))
+    AUDIT_FLUSH_SECONDS = float(os.getenv('AUDIT_FLUSH_SECONDS', 1.0))
+    AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', 10000))
+
+    # system_logs retention: days kept per level ("default" covers the rest);
+    # expired entries are archived as gzipped JSON lines, then deleted in batches
+    LOG_RETENTION_ENABLED = os.getenv('LOG_RETENTION_ENABLED', 'True').lower() == 'true'
+    LOG_RETENTION_DAYS = os.getenv('LOG_RETENTION_DAYS', 'info=30,warning=90,error=365,default=30')
+    LOG_RETENTION_INTERVAL_SECONDS = float(os.getenv('LOG_RETENTION_INTERVAL_SECONDS', 3600))
+    LOG_RETENTION_BATCH_SIZE = int(os.getenv('LOG_RETENTION_BATCH_SIZE', 1000))
+    LOG_ARCHIVE_DIR = os.getenv('LOG_ARCHIVE_DIR', os.path.join(tempfile.gettempdir(), 'smartattendance_log_archive'))
+
+    # Traffic capture: anonymised request traces (route, body shape, role,
+    # timing) as JSON lines for tools/traffic_replay.py (off when unset)
+    TRAFFIC_CAPTURE_FILE = os.getenv('TRAFFIC_CAPTURE_FILE')
+    TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.getenv('TRAFFIC_CAPTURE_SAMPLE_RATE', 1.0))
+    TRAFFIC_CAPTURE_MAX_BYTES = int(os.getenv('TRAFFIC_CAPTURE_MAX_BYTES', 50 * 1024 * 1024))
+    TRAFFIC_CAPTURE_BACKUP_COUNT = int(os.getenv('TRAFFIC_CAPTURE_BACKUP_COUNT', 5))
+
     # Optional: Allow overriding via env for flexibility
     HOST = os.getenv('HOST', '127.0.0.1')
     PORT = int(os.getenv('PORT', 5000))
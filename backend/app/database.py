@@ -5,11 +5,12 @@ from flask_pymongo import PyMongo
 mongo = PyMongo()
 
 
-def init_db(app):
+def init_db(app, event_listeners=None):
     """
     Initialize the MongoDB connection and ensure indexes are created.
+    `event_listeners` are PyMongo monitoring listeners (metrics, profiling).
     """
-    mongo.init_app(app)
+    mongo.init_app(app, event_listeners=list(event_listeners or []))
 
     # Import and call ensure_all_indexes from models to set up database indexes
     try:
@@ -0,0 +1,202 @@
+# backend/app/middlewares/db_profiler.py
+import logging
+import random
+from flask import g, has_request_context, request
+from pymongo import monitoring
+
+from backend.app.middlewares.logger import REQUEST_LOGGER
+from backend.app.services import slow_query_log
+from backend.app.utils.query_budget import QueryBudgetExceeded, over_budget, enforcing
+
+# Commands that carry no application query
+_IGNORED_COMMANDS = {"isMaster", "ismaster", "hello", "ping", "saslStart", "saslContinue",
+                     "buildInfo", "endSessions", "getLastError"}
+
+
+def query_shape(value, depth=0):
+    """Structure of a filter/pipeline with literal values replaced by '?'."""
+    if depth > 6:
+        return "..."
+    if isinstance(value, dict):
+        return {k: query_shape(v, depth + 1) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [query_shape(value[0], depth + 1)] if value else []
+    return "?"
+
+
+def command_shape(command_name, command):
+    """A hashable description of what a command asks for, ignoring literal values."""
+    collection = command.get(command_name)
+    if command_name == "find":
+        body = {"filter": command.get("filter", {}), "projection": command.get("projection")}
+    elif command_name == "aggregate":
+        body = [next(iter(stage)) for stage in command.get("pipeline", []) if isinstance(stage, dict)]
+        return f"aggregate {collection} {body}"
+    elif command_name in ("update", "delete"):
+        key = "updates" if command_name == "update" else "deletes"
+        body = [s.get("q", {}) for s in command.get(key, [])[:1]]
+    elif command_name == "findAndModify":
+        body = command.get("query", {})
+    elif command_name in ("count", "distinct"):
+        body = command.get("query", {})
+    elif command_name == "insert":
+        return f"insert {collection}"
+    else:
+        body = {}
+    return f"{command_name} {collection} {query_shape(body)}"
+
+
+class RequestDbStats:
+    """MongoDB commands issued while serving one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+        self.documents = 0
+        self.shapes = {}      # shape -> number of times issued
+        self.scoped = {}      # the same, for commands issued inside a @query_budget handler
+        self.scope_depth = 0
+        self._pending = {}    # request_id -> (shape, command)
+
+    def n_plus_one(self, threshold):
+        return sorted(((s, n) for s, n in self.shapes.items() if n >= threshold), key=lambda x: -x[1])
+
+    def as_dict(self, threshold):
+        suspects = self.n_plus_one(threshold)
+        data = {"queries": self.count, "db_ms": round(self.duration_ms, 2), "documents": self.documents}
+        if suspects:
+            data["n_plus_one"] = [{"shape": s, "count": n} for s, n in suspects]
+        return data
+
+
+def _returned_documents(reply):
+    cursor = reply.get("cursor") if isinstance(reply, dict) else None
+    if cursor:
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if isinstance(reply, dict) and "value" in reply:
+        return 1 if reply["value"] else 0
+    return 0
+
+
+class RequestCommandListener(monitoring.CommandListener):
+    """
+    Attributes every MongoDB command to the Flask request that issued it.
+
+    PyMongo calls listeners on the thread running the command, so request
+    handlers' commands land in that request's stats; commands from
+    background threads are ignored. Commands slower than `slow_ms` are
+    handed to the slow query log, a sampled `explain_rate` of them with
+    the original command so it can be explained off the request thread.
+    """
+
+    def __init__(self, slow_ms=None, explain_rate=0.0):
+        self.slow_ms = slow_ms
+        self.explain_rate = explain_rate
+
+    @staticmethod
+    def _stats():
+        if not has_request_context():
+            return None
+        return g.get("db_stats")
+
+    def started(self, event):
+        stats = self._stats()
+        if stats is None or event.command_name in _IGNORED_COMMANDS:
+            return
+        if event.command_name == "getMore":
+            shape = f"getMore {event.command.get('collection')}"
+        else:
+            shape = command_shape(event.command_name, event.command)
+        stats._pending[event.request_id] = (shape, event.command)
+
+    def succeeded(self, event):
+        self._finish(event, event.reply)
+
+    def failed(self, event):
+        self._finish(event, None)
+
+    def _finish(self, event, reply):
+        stats = self._stats()
+        if stats is None:
+            return
+        pending = stats._pending.pop(event.request_id, None)
+        if pending is None:
+            return
+        shape, command = pending
+        duration_ms = event.duration_micros / 1000.0
+        documents = _returned_documents(reply)
+        stats.count += 1
+        stats.duration_ms += duration_ms
+        stats.documents += documents
+        if not shape.startswith("getMore"):
+            stats.shapes[shape] = stats.shapes.get(shape, 0) + 1
+            if stats.scope_depth:
+                stats.scoped[shape] = stats.scoped.get(shape, 0) + 1
+        if self.slow_ms is not None and duration_ms >= self.slow_ms:
+            self._record_slow(event, shape, command, duration_ms, documents, failed=reply is None)
+
+    def _record_slow(self, event, shape, command, duration_ms, documents, failed):
+        explain = not failed and random.random() < self.explain_rate
+        slow_query_log.record({
+            "shape": shape,
+            "command": event.command_name,
+            "collection": command.get(event.command_name) if event.command_name != "getMore" else command.get("collection"),
+            "duration_ms": round(duration_ms, 2),
+            "documents": documents,
+            "failed": failed,
+            "route": request.endpoint,
+            "method": request.method,
+            "path": request.path,
+        }, command=command if explain else None)
+
+
+def init_db_profiler(app):
+    """
+    Count MongoDB commands per request; report them in headers and logs and
+    check them against the route's declared query budget.
+    """
+    threshold = int(app.config.get("DB_N_PLUS_ONE_THRESHOLD", 5))
+    headers_on = app.config.get("DB_DEBUG_HEADERS")
+    if headers_on is None:
+        headers_on = app.config.get("DEBUG", False)
+    logger = logging.getLogger(REQUEST_LOGGER)
+
+    @app.before_request
+    def start_db_stats():
+        g.db_stats = RequestDbStats()
+
+    @app.after_request
+    def report_db_stats(response):
+        stats = g.get("db_stats")
+        if stats is None:
+            return response
+        suspects = stats.n_plus_one(threshold)
+        if headers_on:
+            response.headers["X-DB-Queries"] = str(stats.count)
+            response.headers["X-DB-Time-ms"] = f"{stats.duration_ms:.2f}"
+            response.headers["X-DB-Documents"] = str(stats.documents)
+            if suspects:
+                shape, count = suspects[0]
+                response.headers["X-DB-N-Plus-One"] = f"{count}x {shape}"[:512]
+        if suspects:
+            logger.warning("possible N+1 queries", extra={"event": {
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                **stats.as_dict(threshold),
+            }})
+        # WebSocket handlers run for the life of the connection; no per-request budget
+        websocket = request.headers.get("Upgrade", "").lower() == "websocket"
+        exceeded = None if websocket else over_budget(request.endpoint, stats, app)
+        if exceeded:
+            budget, message = exceeded
+            if enforcing(app):
+                raise QueryBudgetExceeded(message)
+            logger.warning("query budget exceeded", extra={"event": {
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "budget": budget,
+                **stats.as_dict(threshold),
+            }})
+        return response
@@ -1,11 +1,125 @@
 # backend/app/middlewares/logger.py
-import logging
-from flask import request
+import atexit
 import json
+import logging
+import logging.handlers
+import queue
+import random
 import time
+from datetime import datetime, timezone
+from flask import request, g
+
+REQUEST_LOGGER = "smartattendance.requests"
+
+# Body fields never written to logs (matched case-insensitively, at any depth)
+SENSITIVE_FIELDS = {
+    "password", "old_password", "new_password", "password_hash", "token",
+    "access_token", "refresh_token", "secret", "authorization", "code",
+}
+MAX_STRING_CHARS = 256
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; structured fields come from `record.event`."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "event", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Non-blocking queue handler: when the queue is full the record is dropped
+    (and counted) instead of stalling the request thread. Formatting is left
+    to the listener thread.
+    """
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message now (args may change later) but skip formatting
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def redact(value, depth=0):
+    """Copy of a JSON body with sensitive fields masked and long strings cut."""
+    if depth > 5:
+        return "..."
+    if isinstance(value, dict):
+        return {
+            k: "***" if str(k).lower() in SENSITIVE_FIELDS else redact(v, depth + 1)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        items = [redact(v, depth + 1) for v in value[:20]]
+        if len(value) > 20:
+            items.append(f"... {len(value) - 20} more")
+        return items
+    if isinstance(value, str) and len(value) > MAX_STRING_CHARS:
+        return value[:MAX_STRING_CHARS] + "..."
+    return value
+
+
+def _body_summary(max_chars):
+    length = request.content_length or 0
+    if not length:
+        return None
+    if not request.is_json:
+        return f"<{request.mimetype or 'body'}: {length} bytes>"
+    if length > max_chars * 4:
+        # Too large to be worth parsing just for a log line
+        return f"<json: {length} bytes>"
+    body = request.get_json(silent=True)
+    if body is None:
+        return f"<invalid json: {length} bytes>"
+    text = json.dumps(redact(body), default=str, ensure_ascii=False)
+    return text if len(text) <= max_chars else text[:max_chars] + "...(truncated)"
+
+
+def _parse_sample_rates(spec):
+    """'endpoint=rate,endpoint=rate' -> {endpoint: rate}"""
+    rates = {}
+    for part in (spec or "").split(","):
+        name, _, rate = part.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def _start_listener(app, q):
+    global _listener
+    handlers = [logging.StreamHandler()]
+    if app.config.get("LOG_FILE"):
+        handlers.append(logging.FileHandler(app.config["LOG_FILE"], encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(q, *handlers, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+
 
 def setup_logging(app):
-    """Configure app-wide logging and attach request/response logs."""
+    """Configure app-wide logging and attach structured, queued request logs."""
 
     # Configure global logging format
     logging.basicConfig(
@@ -13,32 +127,60 @@ def setup_logging(app):
         format="%(asctime)s [%(levelname)s] %(message)s"
     )
 
+    logger = logging.getLogger(REQUEST_LOGGER)
+    if not any(isinstance(h, DroppingQueueHandler) for h in logger.handlers):
+        q = queue.Queue(maxsize=int(app.config.get("LOG_QUEUE_SIZE", 10000)))
+        logger.addHandler(DroppingQueueHandler(q))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        _start_listener(app, q)
+
+    body_max = int(app.config.get("LOG_BODY_MAX_CHARS", 2048))
+    default_rate = float(app.config.get("LOG_SAMPLE_RATE", 1.0))
+    route_rates = _parse_sample_rates(app.config.get("LOG_ROUTE_SAMPLE_RATES", ""))
+    slow_ms = float(app.config.get("LOG_SLOW_MS", 1000))
+
     @app.before_request
     def log_request():
-        request.start_time = time.time()  # track request duration
-        try:
-            body = request.get_json(silent=True)
-        except Exception:
-            body = None
-
-        logging.info(
-            f"➡️  REQUEST: {request.method} {request.path} "
-            f"| Params: {dict(request.args)} "
-            f"| Body: {json.dumps(body) if body else '{}'}"
-        )
+        request.start_time = time.perf_counter()  # track request duration
 
     @app.after_request
     def log_response(response):
-        duration = (time.time() - getattr(request, 'start_time', time.time())) * 1000
-        logging.info(
-            f"⬅️  RESPONSE: {request.method} {request.path} "
-            f"| Status: {response.status_code} "
-            f"| Duration: {duration:.2f}ms"
-        )
+        duration = (time.perf_counter() - getattr(request, "start_time", time.perf_counter())) * 1000
+        # Errors and slow requests are always logged; the rest per the route's sample rate
+        rate = route_rates.get(request.endpoint or "", default_rate)
+        if response.status_code < 400 and duration < slow_ms and random.random() >= rate:
+            return response
+
+        event = {
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": round(duration, 2),
+            "ip": request.remote_addr,
+            "sample_rate": rate,
+        }
+        if request.args:
+            event["params"] = redact(request.args.to_dict())
+        body = _body_summary(body_max)
+        if body:
+            event["body"] = body
+        db_stats = g.get("db_stats")
+        if db_stats is not None:
+            event["db"] = {"queries": db_stats.count, "db_ms": round(db_stats.duration_ms, 2)}
+        jwt_data = g.get("_jwt_extended_jwt")
+        if jwt_data:
+            event["user_id"] = jwt_data.get("sub")
+        logger.info("request", extra={"event": event})
         return response
 
     @app.teardown_request
     def log_teardown(exception):
         """Log teardown errors (e.g., exceptions that bypass Flask’s handlers)."""
         if exception:
-            logging.error(f"💥 ERROR during {request.method} {request.path}: {exception}")
+            logger.error("request failed", extra={"event": {
+                "method": request.method,
+                "path": request.path,
+                "error": repr(exception),
+            }})
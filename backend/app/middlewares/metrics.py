@@ -0,0 +1,113 @@
+# backend/app/middlewares/metrics.py
+import hmac
+import time
+from flask import request, g, Response, abort
+from pymongo import monitoring
+
+from backend.app.utils.metrics import registry
+
+registry.counter("http_requests_total", "HTTP requests by endpoint, method and status")
+registry.histogram("http_request_duration_seconds", "HTTP request latency by endpoint and method")
+registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+registry.gauge("mongodb_pool_connections", "MongoDB pool connections by state")
+registry.counter("mongodb_pool_checkout_failures_total", "Failed MongoDB connection checkouts by reason")
+registry.histogram("mongodb_pool_checkout_seconds", "Time spent waiting for a MongoDB connection",
+                   buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Feeds MongoDB connection pool events into the metrics registry."""
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        registry.add("mongodb_pool_connections", {"state": "open"}, 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        registry.add("mongodb_pool_connections", {"state": "open"}, -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        registry.inc("mongodb_pool_checkout_failures_total", {"reason": str(event.reason)})
+
+    def connection_checked_out(self, event):
+        registry.add("mongodb_pool_connections", {"state": "checked_out"}, 1)
+        duration = getattr(event, "duration", None)  # PyMongo >= 4.7
+        if duration is not None:
+            registry.observe("mongodb_pool_checkout_seconds", None, duration)
+
+    def connection_checked_in(self, event):
+        registry.add("mongodb_pool_connections", {"state": "checked_out"}, -1)
+
+
+# A request carrying any of these came through a proxy, whose address is all
+# remote_addr shows; the loopback allow-list can't vouch for the real client
+PROXY_HEADERS = ("X-Forwarded-For", "X-Real-IP", "Forwarded")
+
+
+def metrics_allowed(app):
+    """
+    METRICS_TOKEN set: require `Authorization: Bearer <token>`. Otherwise only
+    direct (unproxied) scrapes from METRICS_ALLOWED_IPS are served, unless
+    METRICS_ALLOW_REMOTE opens the endpoint to everyone.
+    """
+    if app.config.get("METRICS_ALLOW_REMOTE"):
+        return True
+    token = app.config.get("METRICS_TOKEN")
+    if token:
+        return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+    if any(h in request.headers for h in PROXY_HEADERS):
+        return False
+    allowed = app.config.get("METRICS_ALLOWED_IPS") or ("127.0.0.1", "::1")
+    return request.remote_addr in allowed
+
+
+def init_metrics(app):
+    """Record per-endpoint request metrics and serve them at /metrics."""
+    if app.config.get("METRICS_MULTIPROC_DIR"):
+        registry.enable_multiprocess(app.config["METRICS_MULTIPROC_DIR"],
+                                     float(app.config.get("METRICS_FLUSH_SECONDS", 5)))
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        registry.add("http_requests_in_flight", None, 1)
+
+    @app.teardown_request
+    def finish_request_metrics(exception):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return
+        registry.add("http_requests_in_flight", None, -1)
+        # Endpoint names, not raw paths, keep label cardinality bounded
+        endpoint = request.endpoint or "unmatched"
+        status = g.pop("metrics_status", 500 if exception else 200)
+        registry.inc("http_requests_total", {"endpoint": endpoint, "method": request.method, "status": str(status)})
+        registry.observe("http_request_duration_seconds", {"endpoint": endpoint, "method": request.method},
+                         time.perf_counter() - started)
+
+    @app.after_request
+    def remember_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        if not metrics_allowed(app):
+            abort(404)
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,170 @@
+# backend/app/middlewares/profiler.py
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import request, g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+
+from backend.app.middlewares.role_required import is_user_active
+
+# An admin sends `X-Profile: 1` and that one request runs under cProfile. The
+# pstats dump and a JSON description are kept in PROFILE_DIR, oldest first out
+# once PROFILE_MAX_FILES or PROFILE_MAX_BYTES is exceeded.
+PROFILE_HEADER = "X-Profile"
+_PROFILE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+_active = {"count": 0}
+_active_lock = threading.Lock()
+
+
+def profile_dir(config):
+    return config.get("PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "smartattendance_profiles")
+
+
+def _is_admin():
+    try:
+        verify_jwt_in_request(optional=True)
+        claims = get_jwt() or {}
+    except Exception:
+        return False
+    role = claims.get("role")
+    return isinstance(role, str) and role.lower() == "admin" and is_user_active(claims.get("sub"), "admins")
+
+
+def _acquire(limit):
+    with _active_lock:
+        if _active["count"] >= limit:
+            return False
+        _active["count"] += 1
+        return True
+
+
+def _release():
+    with _active_lock:
+        _active["count"] -= 1
+
+
+def list_profiles(directory):
+    """Catalog entries, newest first."""
+    entries = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return entries
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                entries.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(entries, key=lambda e: e.get("created_at", ""), reverse=True)
+
+
+def profile_path(directory, profile_id):
+    """Path of a stored .prof file, or None for unknown/malformed ids."""
+    if not _PROFILE_ID_RE.match(profile_id or ""):
+        return None
+    path = os.path.join(directory, f"{profile_id}.prof")
+    return path if os.path.exists(path) else None
+
+
+def profile_text(path, sort="cumulative", limit=50):
+    """Human-readable pstats report of a stored profile."""
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def _prune(directory, max_files, max_bytes):
+    entries = list_profiles(directory)
+    total = sum(e.get("size", 0) for e in entries)
+    while entries and (len(entries) > max_files or total > max_bytes):
+        oldest = entries.pop()
+        total -= oldest.get("size", 0)
+        for ext in (".prof", ".json"):
+            try:
+                os.remove(os.path.join(directory, f"{oldest['id']}{ext}"))
+            except OSError:
+                pass
+
+
+def _store(config, profiler, meta):
+    directory = profile_dir(config)
+    os.makedirs(directory, exist_ok=True)
+    prof_path = os.path.join(directory, f"{meta['id']}.prof")
+    profiler.dump_stats(prof_path)
+    meta["size"] = os.path.getsize(prof_path)
+    tmp = os.path.join(directory, f"{meta['id']}.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(directory, f"{meta['id']}.json"))
+    _prune(directory, int(config.get("PROFILE_MAX_FILES", 50)),
+           int(config.get("PROFILE_MAX_BYTES", 200 * 1024 * 1024)))
+
+
+def init_profiler(app):
+    """Profile requests carrying the X-Profile header when sent by an admin."""
+    if not app.config.get("PROFILING_ENABLED", True):
+        return
+    max_concurrent = int(app.config.get("PROFILE_MAX_CONCURRENT", 2))
+
+    @app.before_request
+    def start_profile():
+        if request.headers.get(PROFILE_HEADER) not in ("1", "true") or request.method == "OPTIONS":
+            return None
+        if not _is_admin():
+            return None
+        if not _acquire(max_concurrent):
+            g.profile_status = "busy"
+            return None
+        g.profile = (cProfile.Profile(), time.perf_counter())
+        g.profile[0].enable()
+        return None
+
+    @app.after_request
+    def store_profile(response):
+        profile = g.pop("profile", None)
+        if profile is None:
+            if g.get("profile_status"):
+                response.headers["X-Profile-Status"] = g.profile_status
+            return response
+        profiler, started = profile
+        profiler.disable()
+        try:
+            meta = {
+                "id": uuid.uuid4().hex,
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "user_id": (get_jwt() or {}).get("sub"),
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            _store(app.config, profiler, meta)
+            response.headers["X-Profile-Id"] = meta["id"]
+        except Exception as e:
+            print(f"[WARN] could not store profile: {e}")
+            response.headers["X-Profile-Status"] = "failed"
+        finally:
+            _release()
+        return response
+
+    @app.teardown_request
+    def abandon_profile(exception):
+        # after_request is skipped when the view raised; don't leak the slot
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile[0].disable()
+            _release()
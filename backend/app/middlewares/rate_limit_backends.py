@@ -0,0 +1,310 @@
+# app/middlewares/rate_limit_backends.py
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+# Every backend answers hit(key, limit, window, now=None) -> (allowed, remaining, retry_after)
+# using a sliding-window counter: the counts of the current and previous fixed
+# windows, with the previous one weighted by how much of it still overlaps.
+
+
+def _estimate(prev, curr, window, elapsed):
+    return prev * (1.0 - elapsed / window) + curr
+
+
+def _retry_after(prev, curr, limit, window, elapsed):
+    if curr + 1 > limit or prev == 0:
+        # Only the next window (where this one becomes "previous") can help
+        wait = window - elapsed
+        if curr:
+            wait += window * max(0.0, 1.0 - (limit - 1) / curr)
+        return max(1, math.ceil(wait))
+    # The previous window's share decays until prev * (1 - x) + curr + 1 <= limit
+    needed = 1.0 - (limit - curr - 1) / prev
+    return max(1, math.ceil(needed * window - elapsed))
+
+
+def _decide(prev, curr, limit, window, elapsed):
+    """Return (allowed, remaining, retry_after) for counts that exclude this request."""
+    estimate = _estimate(prev, curr, window, elapsed)
+    if estimate + 1 > limit:
+        return False, 0, _retry_after(prev, curr, limit, window, elapsed)
+    return True, max(0, int(limit - estimate - 1)), 0
+
+
+class _Sweeper:
+    """Runs `self.sweep()` on a daemon thread, started on first use."""
+
+    sweep_interval = 30.0
+
+    def _ensure_sweeper(self):
+        if getattr(self, "_sweeper", None) is not None:
+            return
+        with self._sweeper_lock:
+            if getattr(self, "_sweeper", None) is None:
+                self._sweeper = threading.Thread(
+                    target=self._sweep_loop, name=f"{type(self).__name__}-sweeper", daemon=True
+                )
+                self._sweeper.start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"[WARN] rate limiter sweep failed: {e}")
+
+
+# ======================= In-process =======================
+class SlidingWindowLimiter(_Sweeper):
+    """
+    Per-process limiter with constant memory per key.
+
+    Keys are spread over independently locked shards, and a daemon thread
+    evicts keys that have been idle for two windows.
+    """
+
+    def __init__(self, shards=32, sweep_interval=30.0):
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self.sweep_interval = sweep_interval
+        self._sweeper_lock = threading.Lock()
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def hit(self, key, limit, window, now=None):
+        """
+        Count one request for `key` if it is under `limit` per `window` seconds.
+        Returns (allowed, remaining, retry_after_seconds).
+        """
+        self._ensure_sweeper()
+        now = time.time() if now is None else now
+        current = int(now // window)
+        elapsed = now - current * window
+        store, lock = self._shard(key)
+
+        with lock:
+            # state: [window index, previous count, current count, last seen, window length]
+            state = store.get(key)
+            if state is None or state[4] != window or state[0] < current - 1:
+                state = [current, 0, 0, now, window]
+                store[key] = state
+            elif state[0] == current - 1:
+                state[0], state[1], state[2] = current, state[2], 0
+            state[3] = now
+
+            result = _decide(state[1], state[2], limit, window, elapsed)
+            if result[0]:
+                state[2] += 1
+            return result
+
+    def sweep(self, now=None):
+        """Drop keys idle for more than two of their windows. Returns the number evicted."""
+        now = time.time() if now is None else now
+        evicted = 0
+        for store, lock in self._shards:
+            with lock:
+                idle = [k for k, s in store.items() if now - s[3] > 2 * s[4]]
+                for k in idle:
+                    del store[k]
+            evicted += len(idle)
+        return evicted
+
+    def __len__(self):
+        return sum(len(store) for store, _ in self._shards)
+
+
+# ======================= Shared memory (one host) =======================
+class MmapBackend:
+    """
+    Counter table in a memory-mapped file shared by every worker on a host.
+
+    The file is a fixed array of slots grouped into buckets of 8; a key hashes
+    to one bucket and takes a free or stale slot in it (or evicts the least
+    recently used one), so memory is bounded by the file size. Each bucket is
+    guarded by a thread lock plus a POSIX record lock on its byte range.
+    """
+
+    # key hash, window index, previous count, current count, window length (ms), last seen
+    _SLOT = struct.Struct("<QqIIId")
+    _BUCKET = 8
+
+    def __init__(self, path, slots=65536):
+        import fcntl  # POSIX only
+
+        self._fcntl = fcntl
+        self._buckets = max(1, slots // self._BUCKET)
+        size = self._buckets * self._BUCKET * self._SLOT.size
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    @staticmethod
+    def _hash(key):
+        # Stable across processes (unlike hash()); 0 marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big") | 1
+
+    def hit(self, key, limit, window, now=None):
+        now = time.time() if now is None else now
+        current = int(now // window)
+        elapsed = now - current * window
+        # Stored in milliseconds so fractional windows (1.5s) compare equal to themselves
+        window_ms = int(round(window * 1000))
+        h = self._hash(key)
+        bucket = h % self._buckets
+        start = bucket * self._BUCKET * self._SLOT.size
+        length = self._BUCKET * self._SLOT.size
+
+        with self._locks[bucket % len(self._locks)]:
+            self._fcntl.lockf(self._fd, self._fcntl.LOCK_EX, length, start)
+            try:
+                target, victim = None, None
+                for i in range(self._BUCKET):
+                    offset = start + i * self._SLOT.size
+                    slot = self._SLOT.unpack_from(self._map, offset)
+                    if slot[0] == h:
+                        target = (offset, slot)
+                        break
+                    if victim is None or slot[5] < victim[1][5]:
+                        victim = (offset, slot)
+                if target is None:
+                    offset, prev, curr = victim[0], 0, 0
+                else:
+                    offset, (_, win, prev, curr, win_len, _) = target[0], target[1]
+                    if win_len != window_ms or win < current - 1:
+                        prev, curr = 0, 0
+                    elif win == current - 1:
+                        prev, curr = curr, 0
+
+                result = _decide(prev, curr, limit, window, elapsed)
+                if result[0]:
+                    curr += 1
+                self._SLOT.pack_into(self._map, offset, h, current, prev, curr, window_ms, now)
+                return result
+            finally:
+                self._fcntl.lockf(self._fd, self._fcntl.LOCK_UN, length, start)
+
+
+# ======================= MongoDB (many hosts) =======================
+class MongoBackend(_Sweeper):
+    """
+    Deployment-wide counters in MongoDB with local pre-aggregation.
+
+    Each worker decides from the last global counts it synced plus its own
+    unsynced hits, so the request path never waits on the database. A
+    background thread pushes local increments as `$inc` upserts to one
+    document per key and window (expired by a TTL index) and pulls back the
+    global totals every `sync_interval` seconds. Limits can therefore be
+    overshot by at most what other workers admit within one interval.
+    """
+
+    def __init__(self, collection_getter, sync_interval=1.0):
+        self._collection = collection_getter
+        self.sweep_interval = sync_interval
+        self._sweeper_lock = threading.Lock()
+        self._lock = threading.Lock()
+        # key -> {"win", "window", "prev", "curr", "pending", "seen"}
+        self._keys = {}
+        self._indexed = False
+
+    def hit(self, key, limit, window, now=None):
+        self._ensure_sweeper()
+        now = time.time() if now is None else now
+        current = int(now // window)
+        elapsed = now - current * window
+
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None or state["window"] != window or state["win"] < current - 1:
+                # Unknown until the next sync; start from the local view
+                state = {"win": current, "window": window, "prev": 0, "curr": 0,
+                         "pending": 0, "unflushed": {}, "seen": now}
+                self._keys[key] = state
+            elif state["win"] == current - 1:
+                if state["pending"]:
+                    state["unflushed"][state["win"]] = state["unflushed"].get(state["win"], 0) + state["pending"]
+                state.update(win=current, prev=state["curr"] + state["pending"], curr=0, pending=0)
+            state["seen"] = now
+
+            result = _decide(state["prev"], state["curr"] + state["pending"], limit, window, elapsed)
+            if result[0]:
+                state["pending"] += 1
+            return result
+
+    def sweep(self):
+        """Push pending increments and pull global counts (runs on the background thread)."""
+        now = time.time()
+        ops, reads = [], []
+        with self._lock:
+            for key, state in list(self._keys.items()):
+                window = state["window"]
+                expires_at = datetime.utcnow() + timedelta(seconds=3 * window)
+                flush = dict(state["unflushed"])
+                if state["pending"]:
+                    flush[state["win"]] = flush.get(state["win"], 0) + state["pending"]
+                for win, count in flush.items():
+                    ops.append(UpdateOne(
+                        {"_id": f"{key}|{window}|{win}"},
+                        {"$inc": {"count": count}, "$set": {"expires_at": expires_at}},
+                        upsert=True,
+                    ))
+                state["unflushed"] = {}
+                # Sent hits stay counted locally until the global totals come back
+                state["curr"] += state["pending"]
+                state["pending"] = 0
+                if now - state["seen"] > 2 * window:
+                    del self._keys[key]
+                    continue
+                reads.append((key, state["win"], window))
+
+        if not ops and not reads:
+            return
+        collection = self._collection()
+        if not self._indexed:
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+        if ops:
+            collection.bulk_write(ops, ordered=False)
+
+        ids = []
+        for key, win, window in reads:
+            ids += [f"{key}|{window}|{win}", f"{key}|{window}|{win - 1}"]
+        counts = {d["_id"]: d.get("count", 0) for d in collection.find({"_id": {"$in": ids}}, {"count": 1})}
+
+        with self._lock:
+            for key, win, window in reads:
+                state = self._keys.get(key)
+                if state is None or state["win"] != win or state["window"] != window:
+                    continue
+                # Everything counted before this sync is now in the global totals
+                state["curr"] = counts.get(f"{key}|{window}|{win}", 0)
+                state["prev"] = counts.get(f"{key}|{window}|{win - 1}", state["prev"])
+
+
+def create_backend(config, mongo_collection=None):
+    """Build the backend named by RATE_LIMIT_BACKEND (memory, mmap or mongo)."""
+    name = str(config.get("RATE_LIMIT_BACKEND", "memory")).lower()
+    if name == "mmap":
+        return MmapBackend(
+            config.get("RATE_LIMIT_MMAP_PATH") or os.path.join(tempfile.gettempdir(), "smartattendance_ratelimit.bin"),
+            slots=int(config.get("RATE_LIMIT_MMAP_SLOTS", 65536)),
+        )
+    if name == "mongo":
+        return MongoBackend(mongo_collection, sync_interval=float(config.get("RATE_LIMIT_SYNC_SECONDS", 1.0)))
+    return SlidingWindowLimiter()
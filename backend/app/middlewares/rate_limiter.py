@@ -1,17 +1,33 @@
 # app/middlewares/rate_limiter.py
-import time
+import fnmatch
+import re
 import threading
-from flask import request, jsonify, current_app
+import time
+from flask import request, jsonify, current_app, g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
 from functools import wraps
 
-# In-memory store for request timestamps per IP
-rate_store = {}
-lock = threading.Lock()
+from backend.app.database import mongo
+from backend.app.middlewares.rate_limit_backends import SlidingWindowLimiter, create_backend
 
 # Default rate limit settings (can be overridden in app.config)
 DEFAULT_RATE_LIMIT = 60   # requests
 DEFAULT_TIME_WINDOW = 60  # seconds
 
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """Return this process's limiter, built from RATE_LIMIT_BACKEND on first use."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = create_backend(current_app.config, mongo_collection=lambda: mongo.db.rate_limits)
+    return _limiter
+
+
 def rate_limiter(fn):
     """Rate limit decorator for Flask routes."""
     @wraps(fn)
@@ -21,27 +37,190 @@ def rate_limiter(fn):
         time_window = current_app.config.get("TIME_WINDOW", DEFAULT_TIME_WINDOW)
 
         ip = request.remote_addr or "unknown"
-        now = time.time()
 
         # Skip localhost or testing clients if desired
         if ip in ("127.0.0.1", "::1") and current_app.config.get("SKIP_RATE_LIMIT_LOCAL", True):
             return fn(*args, **kwargs)
 
-        with lock:
-            # Retrieve timestamps for this IP
-            timestamps = rate_store.get(ip, [])
-            # Keep only timestamps within the current window
-            timestamps = [t for t in timestamps if now - t < time_window]
+        allowed, remaining, retry_after = get_limiter().hit(ip, rate_limit, time_window)
+        if not allowed:
+            return jsonify({
+                "error": "Rate limit exceeded",
+                "message": f"Max {rate_limit} requests per {time_window} seconds allowed."
+            }), 429, {"Retry-After": str(retry_after)}
+
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+# ======================= Policy table (app-wide) =======================
+# First matching policy wins. `pattern` is a shell-style glob on the request
+# path, `roles` (optional) restricts it to JWT roles, and `key` chooses the
+# bucket: "identity" (JWT subject, falling back to IP), "ip", or "account"
+# (IP plus the email/username in the JSON body, for logins). `ip_limit`
+# (optional) adds a per-IP ceiling on top of the policy's own bucket.
+DEFAULT_POLICIES = [
+    # A whole campus may log in from behind one NAT address at 8am: each account
+    # gets its own bucket, and only a high per-IP ceiling is shared
+    {"name": "login", "pattern": "/api/auth/login", "methods": ["POST"], "limit": 10, "window": 60,
+     "key": "account", "ip_limit": 3000},
+    {"name": "auth", "pattern": "/api/auth/*", "methods": ["POST"], "limit": 600, "window": 60, "key": "ip"},
+    {"name": "admin-analytics", "pattern": "/api/admin/analytics*", "limit": 30, "window": 60, "key": "identity"},
+    {"name": "admin-course-analytics", "pattern": "/api/admin/courses/*/analytics", "limit": 30, "window": 60, "key": "identity"},
+    {"name": "qr-sheets", "pattern": "/api/lecturer/courses/*/sessions/qr_sheets", "limit": 5, "window": 60, "key": "identity"},
+    {"name": "check-in", "pattern": "/api/student/*", "methods": ["POST"], "roles": ["student"], "limit": 30, "window": 60, "key": "identity"},
+    {"name": "default", "pattern": "*", "limit": DEFAULT_RATE_LIMIT * 5, "window": DEFAULT_TIME_WINDOW, "key": "identity"},
+]
+
+POLICY_KEYS = ("identity", "ip", "account")
+POLICY_SETTINGS_ID = "rate_limits"
+_policies = {"compiled": None, "version": None, "checked_at": 0.0}
+_policies_lock = threading.Lock()
+
+
+def validate_policies(policies):
+    """Return an error message for a malformed policy list, or None."""
+    if not isinstance(policies, list) or not policies:
+        return "policies must be a non-empty list"
+    for p in policies:
+        if not isinstance(p, dict) or not isinstance(p.get("pattern"), str) or not p.get("name"):
+            return "each policy needs a name and a pattern"
+        if not isinstance(p.get("limit"), int) or p["limit"] < 1:
+            return f"policy {p.get('name')}: limit must be a positive integer"
+        if not isinstance(p.get("window"), (int, float)) or p["window"] <= 0:
+            return f"policy {p.get('name')}: window must be a positive number of seconds"
+        if p.get("key", "identity") not in POLICY_KEYS:
+            return f"policy {p.get('name')}: key must be one of {', '.join(POLICY_KEYS)}"
+        if "ip_limit" in p and (not isinstance(p["ip_limit"], int) or p["ip_limit"] < 1):
+            return f"policy {p.get('name')}: ip_limit must be a positive integer"
+        for field in ("methods", "roles"):
+            value = p.get(field)
+            if value is not None and (not isinstance(value, list) or not all(isinstance(v, str) for v in value)):
+                return f"policy {p.get('name')}: {field} must be a list of strings"
+    return None
+
+
+def _compile(policies):
+    compiled = []
+    for p in policies:
+        compiled.append({
+            **p,
+            "regex": re.compile(fnmatch.translate(p["pattern"])),
+            "methods": {m.upper() for m in p.get("methods") or []},
+            "roles": {r.lower() for r in p.get("roles") or []},
+        })
+    return compiled
+
+
+def get_policies():
+    """Compiled policy table, re-read from the settings collection every few seconds."""
+    reload_every = float(current_app.config.get("RATE_LIMIT_POLICY_RELOAD_SECONDS", 10))
+    now = time.monotonic()
+    if _policies["compiled"] is not None and now - _policies["checked_at"] < reload_every:
+        return _policies["compiled"]
+    with _policies_lock:
+        if _policies["compiled"] is None or now - _policies["checked_at"] >= reload_every:
+            try:
+                doc = mongo.db.settings.find_one({"_id": POLICY_SETTINGS_ID}) or {}
+            except Exception as e:
+                print(f"[WARN] could not load rate limit policies: {e}")
+                doc = {"updated_at": _policies["version"], "policies": None}
+            version = doc.get("updated_at")
+            if _policies["compiled"] is None or version != _policies["version"]:
+                policies = doc.get("policies")
+                if validate_policies(policies):
+                    policies = DEFAULT_POLICIES
+                _policies["compiled"] = _compile(policies)
+                _policies["version"] = version
+            _policies["checked_at"] = now
+    return _policies["compiled"]
 
-            if len(timestamps) >= rate_limit:
+
+def reload_policies():
+    """Force the next request to re-read the policy table."""
+    _policies["checked_at"] = 0.0
+
+
+def _identity_and_role():
+    try:
+        verify_jwt_in_request(optional=True)
+        claims = get_jwt() or {}
+    except Exception:
+        # Invalid tokens are rejected by the route itself; limit them by IP
+        return None, None
+    role = claims.get("role")
+    return claims.get("sub"), role.lower() if isinstance(role, str) else None
+
+
+def _account():
+    """Lower-cased email/username a login names, or None."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None
+    account = data.get("email") or data.get("username")
+    return account.strip().lower() if isinstance(account, str) and account.strip() else None
+
+
+def _bucket(policy, identity, ip):
+    kind = policy.get("key", "identity")
+    if kind == "identity" and identity:
+        return f"user:{identity}"
+    if kind == "account":
+        account = _account()
+        if account:
+            return f"account:{ip}|{account}"
+    return f"ip:{ip}"
+
+
+def match_policy(path, method, role):
+    for policy in get_policies():
+        if policy["methods"] and method not in policy["methods"]:
+            continue
+        if policy["roles"] and role not in policy["roles"]:
+            continue
+        if policy["regex"].match(path):
+            return policy
+    return None
+
+
+def init_rate_limiting(app):
+    """Apply the policy table to every request."""
+
+    @app.before_request
+    def enforce_rate_limit_policy():
+        if request.method == "OPTIONS" or not current_app.config.get("RATE_LIMIT_ENABLED", True):
+            return None
+        ip = request.remote_addr or "unknown"
+        if ip in ("127.0.0.1", "::1") and current_app.config.get("SKIP_RATE_LIMIT_LOCAL", True):
+            return None
+
+        identity, role = _identity_and_role()
+        policy = match_policy(request.path, request.method, role)
+        if policy is None:
+            return None
+        limiter = get_limiter()
+        if policy.get("ip_limit"):
+            allowed, _, retry_after = limiter.hit(f"{policy['name']}|ip:{ip}", policy["ip_limit"], policy["window"])
+            if not allowed:
                 return jsonify({
                     "error": "Rate limit exceeded",
-                    "message": f"Max {rate_limit} requests per {time_window} seconds allowed."
-                }), 429
+                    "message": f"Max {policy['ip_limit']} requests per {policy['window']} seconds from one address."
+                }), 429, {"Retry-After": str(retry_after)}
 
-            # Record new request
-            timestamps.append(now)
-            rate_store[ip] = timestamps
+        key = _bucket(policy, identity, ip)
+        allowed, remaining, retry_after = limiter.hit(f"{policy['name']}|{key}", policy["limit"], policy["window"])
+        g.rate_limit = (policy["limit"], remaining)
+        if not allowed:
+            return jsonify({
+                "error": "Rate limit exceeded",
+                "message": f"Max {policy['limit']} requests per {policy['window']} seconds allowed."
+            }), 429, {"Retry-After": str(retry_after)}
+        return None
 
-        return fn(*args, **kwargs)
-    return wrapper
+    @app.after_request
+    def add_rate_limit_headers(response):
+        if "rate_limit" in g:
+            limit, remaining = g.rate_limit
+            response.headers["X-RateLimit-Limit"] = str(limit)
+            response.headers["X-RateLimit-Remaining"] = str(remaining)
+        return response
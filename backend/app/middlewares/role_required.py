@@ -1,13 +1,61 @@
 # app/middlewares/role_required.py
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
+from flask_jwt_extended import get_jwt_identity, get_jwt
 from backend.app.database import mongo
+from backend.app.utils.cache import TTLCache
+from backend.app.utils import identity_map
 from bson import ObjectId
 import os
 
 # Configurable mode
 USE_JWT_ROLE = os.getenv("USE_JWT_ROLE", "False").lower() == "true"
+# Authorize from the signed `role` / `user_type` claims issued at login and refresh
+TRUST_JWT_ROLE_CLAIMS = os.getenv("TRUST_JWT_ROLE_CLAIMS", "True").lower() == "true"
+
+ROLE_COLLECTIONS = {"admin": "admins", "lecturer": "lecturers", "student": "students"}
+
+# user_id -> account still exists and is active; bounds how long a deleted or
+# deactivated account keeps working with an unexpired token.
+_user_status = TTLCache(
+    maxsize=10000,
+    ttl=float(os.getenv("USER_STATUS_CACHE_SECONDS", 30)),
+)
+
+
+def is_user_active(user_id, collection):
+    """Return True if the user exists in `collection` and is not deactivated (cached)."""
+    status = _user_status.get(user_id)
+    if status is None:
+        try:
+            lookup_id = ObjectId(user_id) if ObjectId.is_valid(user_id) else user_id
+            doc = mongo.db[collection].find_one({"_id": lookup_id}, {"active": 1, "is_active": 1})
+        except Exception:
+            doc = None
+        status = bool(doc) and doc.get("active", True) is not False and doc.get("is_active", True) is not False
+        _user_status.set(user_id, status)
+    return status
+
+
+def forget_user_status(user_id):
+    """Drop the cached status after an account is changed or deleted in this worker."""
+    _user_status.pop(str(user_id))
+
+
+def _claims_role():
+    """Return (role, collection) from trusted JWT claims, or (None, None) if absent."""
+    try:
+        claims = get_jwt() or {}
+    except Exception:
+        return None, None
+    role = claims.get("role")
+    if not isinstance(role, str) or not role:
+        return None, None
+    role = role.lower()
+    collection = claims.get("user_type") or ROLE_COLLECTIONS.get(role)
+    if collection not in ROLE_COLLECTIONS.values():
+        return None, None
+    return role, collection
 
 
 def role_required(allowed_roles):
@@ -16,6 +64,8 @@ def role_required(allowed_roles):
     Works in two modes:
       - USE_JWT_ROLE=True → use role info from JWT
       - USE_JWT_ROLE=False → verify role from database
+    Tokens carrying signed `role`/`user_type` claims (issued by login/refresh) are
+    authorized from the claims alone, with only a cached deactivation check.
     The DB lookup will attempt to convert the identity to an ObjectId when possible
     to avoid mismatches between stored ObjectId _id fields and string JWT identities.
     """
@@ -38,6 +88,18 @@ def role_required(allowed_roles):
                         }), 403
                     return fn(*args, **kwargs)
 
+                # --- Trusted claims mode ---
+                claim_role, claim_collection = _claims_role() if TRUST_JWT_ROLE_CLAIMS else (None, None)
+                if claim_role and isinstance(identity, str):
+                    if claim_role not in [r.lower() for r in allowed_roles]:
+                        return jsonify({
+                            "error": "Forbidden",
+                            "message": f"Access denied. Required roles: {allowed_roles}"
+                        }), 403
+                    if not is_user_active(identity, claim_collection):
+                        return jsonify({"error": "User not found or deactivated"}), 401
+                    return fn(*args, **kwargs)
+
                 # --- DB role mode ---
                 # identity may be a string user id, an object with an 'id' field, or an ObjectId
                 user_id_raw = identity if isinstance(identity, str) else (identity.get("id") if isinstance(identity, dict) else None)
@@ -55,18 +117,10 @@ def role_required(allowed_roles):
                     # leave lookup id as-is if conversion fails
                     user_lookup_id = user_id_raw
 
-                # Users may be stored in separate collections (admins, lecturers, students).
-                # Try to find the user across the known user collections.
-                USER_COLLECTIONS = ["admins", "lecturers", "students"]
-                user = None
-                for col in USER_COLLECTIONS:
-                    try:
-                        user = mongo.db[col].find_one({"_id": user_lookup_id})
-                        if user:
-                            break
-                    except Exception:
-                        # ignore collection-level errors and continue
-                        user = None
+                # Users may be stored in separate collections (admins, lecturers, students);
+                # the user directory knows which, and the request's identity map keeps the
+                # document for handlers that load the same user again.
+                user, col = identity_map.get_user(user_lookup_id)
 
                 if not user:
                     return jsonify({"error": "User not found"}), 404
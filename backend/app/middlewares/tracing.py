@@ -0,0 +1,107 @@
+# backend/app/middlewares/tracing.py
+import atexit
+import logging
+import logging.handlers
+import queue
+import time
+from flask import request, g
+from pymongo import monitoring
+
+from backend.app.middlewares.logger import DroppingQueueHandler
+from backend.app.utils import tracing
+
+_listener = None
+
+
+class TraceFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotating file of trace events, one per line, in the Chrome JSON array
+    format: every file starts with "[" and each event ends with ",". Trace
+    viewers accept the array without its closing bracket, so each rotated
+    file can be loaded on its own.
+    """
+
+    def __init__(self, filename, max_bytes, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self.setFormatter(logging.Formatter("%(message)s,"))
+
+    def _open(self):
+        stream = super()._open()
+        if stream.tell() == 0:
+            stream.write("[\n")
+        return stream
+
+
+class TracingCommandListener(monitoring.CommandListener):
+    """Records each MongoDB command as a child span of the span that issued it."""
+
+    def __init__(self):
+        self._pending = {}  # request_id -> (parent span, wall start)
+
+    def started(self, event):
+        parent = tracing.current_span()
+        if parent is not None and parent.sampled:
+            self._pending[event.request_id] = (parent, time.time())
+
+    def succeeded(self, event):
+        self._finish(event, None)
+
+    def failed(self, event):
+        self._finish(event, event.failure)
+
+    def _finish(self, event, failure):
+        pending = self._pending.pop(event.request_id, None)
+        if pending is None:
+            return
+        parent, wall_start = pending
+        attrs = {"db": event.database_name}
+        if failure is not None:
+            attrs["error"] = str(failure)[:200]
+        tracing.record(f"mongo.{event.command_name}", wall_start, event.duration_micros / 1_000_000,
+                       category="db", parent=parent, **attrs)
+
+
+def init_tracing(app):
+    """Trace every request into TRACE_FILE (disabled when it is unset)."""
+    global _listener
+    path = app.config.get("TRACE_FILE")
+    if not path:
+        return
+    tracing.configure(enabled=True, sample_rate=app.config.get("TRACE_SAMPLE_RATE", 1.0))
+
+    logger = logging.getLogger(tracing.TRACE_LOGGER)
+    if _listener is None:
+        q = queue.Queue(maxsize=int(app.config.get("LOG_QUEUE_SIZE", 10000)))
+        logger.addHandler(DroppingQueueHandler(q))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = TraceFileHandler(
+            path,
+            max_bytes=int(app.config.get("TRACE_MAX_BYTES", 50 * 1024 * 1024)),
+            backup_count=int(app.config.get("TRACE_BACKUP_COUNT", 5)),
+        )
+        _listener = logging.handlers.QueueListener(q, handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+    @app.before_request
+    def start_request_span():
+        g.trace_span = tracing.start_span(
+            f"{request.method} {request.endpoint or request.path}", category="http",
+            method=request.method, path=request.path,
+        )
+
+    @app.after_request
+    def tag_request_span(response):
+        span = g.get("trace_span")
+        if span is not None:
+            span.set("status", response.status_code)
+            if span.sampled:
+                response.headers["X-Trace-Id"] = span.trace_id
+        return response
+
+    @app.teardown_request
+    def end_request_span(exception):
+        span = g.pop("trace_span", None)
+        if span is not None:
+            span.end(error=exception)
@@ -0,0 +1,111 @@
+# backend/app/middlewares/traffic_capture.py
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from flask import request, g
+
+from backend.app.middlewares.logger import DroppingQueueHandler
+
+CAPTURE_LOGGER = "smartattendance.traffic"
+
+# Actors are pseudonymised with a per-process salt: requests from one user
+# stay grouped within a capture, but ids cannot be recovered or joined
+# across restarts.
+_SALT = os.urandom(16)
+_listener = None
+
+
+def value_shape(value, depth=0):
+    """
+    The type skeleton of a JSON value: keys are kept, scalars become their
+    type name and lists keep their length and the shape of the first item.
+    No values are recorded.
+    """
+    if depth > 5:
+        return "..."
+    if isinstance(value, dict):
+        return {str(k): value_shape(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, list):
+        return {"list": len(value), "of": value_shape(value[0], depth + 1) if value else None}
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if value is None:
+        return "null"
+    return "str"
+
+
+def actor(subject):
+    if not subject:
+        return None
+    return hashlib.sha256(_SALT + str(subject).encode("utf-8")).hexdigest()[:12]
+
+
+def build_trace(response, started_at, duration_ms):
+    """The anonymised capture entry for one finished request."""
+    claims = g.get("_jwt_extended_jwt") or {}
+    role = claims.get("role")
+    body = request.get_json(silent=True) if request.is_json else None
+    return {
+        "ts": round(started_at, 3),
+        "method": request.method,
+        # The rule template (`/api/student/<student_id>/courses`), never the raw path
+        "route": request.url_rule.rule if request.url_rule else None,
+        "endpoint": request.endpoint,
+        "params": sorted((request.view_args or {}).keys()),
+        "query": {k: "str" for k in request.args.keys()},
+        "body": value_shape(body) if body is not None else None,
+        "form": bool(request.files) or None,
+        "role": role.lower() if isinstance(role, str) else None,
+        "actor": actor(claims.get("sub")),
+        "status": response.status_code,
+        "duration_ms": round(duration_ms, 2),
+    }
+
+
+def init_traffic_capture(app):
+    """Record sampled request traces to TRAFFIC_CAPTURE_FILE (off when unset)."""
+    global _listener
+    path = app.config.get("TRAFFIC_CAPTURE_FILE")
+    if not path:
+        return
+    sample_rate = float(app.config.get("TRAFFIC_CAPTURE_SAMPLE_RATE", 1.0))
+
+    logger = logging.getLogger(CAPTURE_LOGGER)
+    if _listener is None:
+        q = queue.Queue(maxsize=int(app.config.get("LOG_QUEUE_SIZE", 10000)))
+        logger.addHandler(DroppingQueueHandler(q))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=int(app.config.get("TRAFFIC_CAPTURE_MAX_BYTES", 50 * 1024 * 1024)),
+            backupCount=int(app.config.get("TRAFFIC_CAPTURE_BACKUP_COUNT", 5)),
+            encoding="utf-8",
+        )
+        _listener = logging.handlers.QueueListener(q, handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+    @app.before_request
+    def start_capture():
+        if request.method != "OPTIONS" and random.random() < sample_rate:
+            g.capture_started = (time.time(), time.perf_counter())
+
+    @app.after_request
+    def capture_request(response):
+        started = g.pop("capture_started", None)
+        if started is not None:
+            wall, perf = started
+            trace = build_trace(response, wall, (time.perf_counter() - perf) * 1000)
+            logger.info(json.dumps(trace, separators=(",", ":")))
+        return response
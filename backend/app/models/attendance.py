@@ -3,6 +3,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
 from backend.app.database import mongo
+from backend.app.utils import identity_map
 from .user import _oid
 
 # ------------------------
@@ -130,8 +131,7 @@ class Attendance:
 
     @classmethod
     def find_by_id(cls, attendance_id: str) -> Optional["Attendance"]:
-        doc = cls.collection().find_one({"_id": _oid(attendance_id)})
-        return cls.from_mongo(doc)
+        return cls.from_mongo(identity_map.get(cls.collection_name, _oid(attendance_id)))
 
     @classmethod
     def delete_record(cls, attendance_id: str) -> bool:
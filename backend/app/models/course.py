@@ -3,6 +3,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
 from backend.app.database import mongo
+from backend.app.utils import identity_map
 from .user import _oid
 
 
@@ -115,8 +116,7 @@ class Course:
 
     @classmethod
     def find_by_id(cls, course_id: str) -> Optional["Course"]:
-        doc = cls.collection().find_one({"_id": _oid(course_id)})
-        return cls.from_mongo(doc)
+        return cls.from_mongo(identity_map.get(cls.collection_name, _oid(course_id)))
 
     @classmethod
     def find_by_code(cls, code: str) -> Optional["Course"]:
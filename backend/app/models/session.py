@@ -3,6 +3,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
 from backend.app.database import mongo
+from backend.app.utils import identity_map
 from .user import _oid
 
 
@@ -95,8 +96,7 @@ class Session:
 
     @classmethod
     def find_by_id(cls, id_val: str) -> Optional["Session"]:
-        doc = cls.collection().find_one({"_id": _oid(id_val)})
-        return cls.from_mongo(doc)
+        return cls.from_mongo(identity_map.get(cls.collection_name, _oid(id_val)))
 
     @classmethod
     def find_for_course(cls, course_id: str, limit: int = 50) -> List["Session"]:
@@ -114,3 +114,5 @@ class Session:
     @classmethod
     def ensure_indexes(cls):
         cls.collection().create_index([("course_id", 1), ("session_date", -1)])
+        # Active-session scans used to rebuild the check-in code index
+        cls.collection().create_index([("is_active", 1), ("expires_at", 1)])
@@ -3,6 +3,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
 from backend.app.database import mongo
+from backend.app.utils import identity_map
 from .user import User, _oid, ROLE_STUDENT
 
 
@@ -115,8 +116,7 @@ class Student(User):
 
     @classmethod
     def find_by_id(cls, student_id: str) -> Optional["Student"]:
-        doc = cls.collection().find_one({"_id": _oid(student_id)})
-        return cls.from_mongo(doc)
+        return cls.from_mongo(identity_map.get(cls.collection_name, _oid(student_id)))
 
     @classmethod
     def find_by_matric(cls, matric: str) -> Optional["Student"]:
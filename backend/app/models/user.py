@@ -1,11 +1,9 @@
 from typing import Optional, Dict, Any
 from datetime import datetime
 from bson import ObjectId
-from flask_bcrypt import Bcrypt
 from backend.app.database import mongo
-
-# Initialize bcrypt
-bcrypt = Bcrypt()
+from backend.app.services.password_service import hash_password, verify_and_upgrade
+from backend.app.utils import identity_map
 
 # -------------------------------
 # Role Constants
@@ -46,11 +44,7 @@ class User:
         self._id = _oid(_id)
         self.username = username
         self.email = email.lower()
-        self.password_hash = (
-            bcrypt.generate_password_hash(password).decode("utf-8")
-            if password
-            else None
-        )
+        self.password_hash = hash_password(password) if password else None
         self.role = role
         self.active = bool(active)
         self.created_at = created_at or datetime.utcnow()
@@ -73,16 +67,18 @@ class User:
     # Password Management
     # -------------------------------
     def set_password(self, password: str):
-        """Hashes and sets a new password."""
-        self.password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+        """Hashes and sets a new password (password_service: configured cost, hashing pool)."""
+        self.password_hash = hash_password(password)
         self.updated_at = datetime.utcnow()
 
     def check_password(self, password: str) -> bool:
-        """Verifies password against bcrypt hash."""
-        return bool(
-            self.password_hash
-            and bcrypt.check_password_hash(self.password_hash, password)
-        )
+        """Verifies the password; a legacy or outdated-cost hash is upgraded and saved."""
+        ok, upgraded = verify_and_upgrade(password, self.password_hash)
+        if ok and upgraded:
+            self.password_hash = upgraded
+            if self._id:
+                self.collection().update_one({"_id": self._id}, {"$set": {"password_hash": upgraded}})
+        return ok
 
     # -------------------------------
     # Mongo Conversion Helpers
@@ -161,8 +157,7 @@ class User:
     # -------------------------------
     @classmethod
     def find_by_id(cls, id_val: str) -> Optional["User"]:
-        doc = cls.collection().find_one({"_id": _oid(id_val)})
-        return cls.from_mongo(doc)
+        return cls.from_mongo(identity_map.get(cls.collection_name, _oid(id_val)))
 
     @classmethod
     def find_by_username(cls, username: str) -> Optional["User"]:
@@ -2,19 +2,34 @@
 # SmartAttendance — Final Elite Admin Panel API (2025)
 # All your original routes preserved, all modern features added, bugs fixed
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, send_file, Response
 from flask_jwt_extended import jwt_required, verify_jwt_in_request, get_jwt, decode_token
 from flask_sock import Sock
 from bson import ObjectId
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash
+import heapq
+import itertools
 import json
 import time
 import urllib.parse
 
 from backend.app.database import mongo
-from backend.app.middlewares.role_required import role_required
+from backend.app.middlewares.role_required import role_required, forget_user_status
+from backend.app.middlewares.rate_limiter import (
+    DEFAULT_POLICIES, POLICY_SETTINGS_ID, validate_policies, reload_policies
+)
+from backend.app.middlewares import profiler
+from backend.app.services import (
+    user_directory, password_service, token_revocation, slow_query_log, log_retention, log_partitions
+)
+from backend.app.utils import identity_map, tracing, memory_profiler
+from backend.app.services.password_service import hash_password, PasswordServiceBusy
+from pymongo.errors import DuplicateKeyError
 from backend.app.schemas.system_log_schema import SystemLogSchema
+from backend.app.utils.query_budget import query_budget
+from backend.app.utils.pagination import (
+    InvalidCursor, page_args, fetch_page, finish_page, with_keyset, pagination_info
+)
 from backend.app.utils.serializers import (
     serialize_user, serialize_course, serialize_student,
     serialize_session, serialize_attendance_log
@@ -23,6 +38,16 @@ from backend.app.utils.serializers import (
 admin_bp = Blueprint("admin_bp", __name__, url_prefix="/api/admin")
 
 
+@admin_bp.errorhandler(PasswordServiceBusy)
+def password_service_busy(e):
+    return jsonify({"error": "Server busy, please retry"}), 503, {"Retry-After": "1"}
+
+
+@admin_bp.errorhandler(InvalidCursor)
+def invalid_cursor(e):
+    return jsonify({"error": str(e)}), 400
+
+
 # ===================== Helper Functions =======================
 
 def get_collection_by_role(role: str):
@@ -30,18 +55,16 @@ def get_collection_by_role(role: str):
 
 
 def get_user_or_404(user_id):
-    """Find user across all role-specific collections."""
-    try:
-        oid = ObjectId(user_id)
-    except Exception:
+    """Find user through the user directory."""
+    if not ObjectId.is_valid(str(user_id)):
         return None, jsonify({"error": "Invalid user ID"}), 400
 
-    for col, role_name in [("admins", "admin"), ("lecturers", "lecturer"), ("students", "student")]:
-        user = mongo.db[col].find_one({"_id": oid})
-        if user:
-            user["role"] = role_name
-            return user, None, None
-    return None, jsonify({"error": "User not found"}), 404
+    user, col = identity_map.get_user(user_id)
+    if not user:
+        return None, jsonify({"error": "User not found"}), 404
+    # Copy: the mapped document is shared with every other reader in the request
+    user = {**user, "role": user_directory.ROLE_BY_COLLECTION[col]}
+    return user, None, None
 
 
 def get_course_or_404(course_id):
@@ -50,7 +73,7 @@ def get_course_or_404(course_id):
     except Exception:
         return None, jsonify({"error": "Invalid course ID"}), 400
 
-    course = mongo.db.courses.find_one({"_id": oid})
+    course = identity_map.get("courses", oid)
     if not course:
         return None, jsonify({"error": "Course not found"}), 404
     return course, None, None
@@ -77,17 +100,19 @@ def create_user():
     if not col_name:
         return jsonify({"error": "Invalid role"}), 400
 
-    # check email uniqueness across all role collections
-    existing = mongo.db.admins.find_one({"email": data["email"]}) \
-        or mongo.db.lecturers.find_one({"email": data["email"]}) \
-        or mongo.db.students.find_one({"email": data["email"]})
-    if existing:
-        return jsonify({"error": "Email already exists"}), 409
+    # hash first so a saturated hashing pool (503) leaves nothing half-created
+    password_hash = hash_password(data.get("password", "TempPass2025!"))
 
+    # reserve the email in the user directory (unique across all role collections)
+    user_id = ObjectId()
     try:
-        password_hash = generate_password_hash(data.get("password", "TempPass2025!"))
+        user_directory.add_user(user_id, data["email"], col_name)
+    except DuplicateKeyError:
+        return jsonify({"error": "Email already exists"}), 409
 
+    try:
         user_doc = {
+            "_id": user_id,
             "username": data["username"],
             "email": data["email"],
             "password_hash": password_hash,
@@ -95,9 +120,10 @@ def create_user():
             "created_at": datetime.utcnow(),
             **data.get("extra", {})
         }
-        user_id = mongo.db[col_name].insert_one(user_doc).inserted_id
+        mongo.db[col_name].insert_one(user_doc)
         return jsonify({"message": "User created", "user_id": str(user_id)}), 201
     except Exception as e:
+        user_directory.remove_user(user_id)
         import traceback
         traceback.print_exc()
         print(f"[ERROR] create_user failed: {e}")
@@ -114,24 +140,36 @@ def update_user(user_id):
 
     data = request.get_json() or {}
     update_doc = {}
+    if "password" in data:
+        update_doc["password_hash"] = hash_password(data["password"])
     if "username" in data:
         update_doc["username"] = data["username"]
-    if "email" in data:
-        # ensure new email doesn't collide with other users
-        new_email = data["email"]
-        # check across all collections except the current user document
-        col_name = get_collection_by_role(user["role"])
-        existing = (mongo.db.admins.find_one({"email": new_email, "_id": {"$ne": ObjectId(user_id)}})
-                    or mongo.db.lecturers.find_one({"email": new_email, "_id": {"$ne": ObjectId(user_id)}})
-                    or mongo.db.students.find_one({"email": new_email, "_id": {"$ne": ObjectId(user_id)}}))
-        if existing:
-            return jsonify({"error": "Email already in use"}), 409
-        update_doc["email"] = new_email
-    if "password" in data:
-        update_doc["password_hash"] = generate_password_hash(data["password"])
+    if "is_active" in data:
+        update_doc["is_active"] = bool(data["is_active"])
 
     col_name = get_collection_by_role(user["role"])
-    mongo.db[col_name].update_one({"_id": ObjectId(user_id)}, {"$set": update_doc})
+    new_col = get_collection_by_role(data["role"]) if data.get("role") else col_name
+    if not new_col:
+        return jsonify({"error": "Invalid role"}), 400
+    if new_col != col_name:
+        # The role is the collection: once moved, tokens whose claims name the
+        # old collection fail the account-status check in role_required.
+        user_directory.move_user(user_id, col_name, new_col)
+        identity_map.forget(col_name, user_id)
+        col_name = new_col
+
+    if "email" in data:
+        # ensure new email doesn't collide with other users (unique in the user directory)
+        try:
+            user_directory.set_email(col_name, user_id, data["email"], extra=update_doc)
+        except DuplicateKeyError:
+            return jsonify({"error": "Email already in use"}), 409
+        update_doc["email"] = data["email"]
+    elif update_doc:
+        mongo.db[col_name].update_one({"_id": ObjectId(user_id)}, {"$set": update_doc})
+    identity_map.apply_set(col_name, user["_id"], update_doc)
+    # Deactivation and role changes must not wait out the status cache
+    forget_user_status(user_id)
     return jsonify({"message": "User updated"}), 200
 
 
@@ -147,21 +185,22 @@ def delete_user(user_id):
     result = mongo.db[col_name].delete_one({"_id": ObjectId(user_id)})
     if result.deleted_count == 0:
         return jsonify({"error": "User not found"}), 404
+    user_directory.remove_user(user_id)
+    identity_map.forget(col_name, user_id)
+    forget_user_status(user_id)
     return jsonify({"message": "User deleted"}), 200
 
 
 @admin_bp.route("/users", methods=["GET"])
 @jwt_required()
 @role_required(["admin"])
+@query_budget(9)
 def get_all_users():
-    try:
-        page = max(1, int(request.args.get("page", 1)))
-    except ValueError:
-        page = 1
-    try:
-        limit = max(1, min(100, int(request.args.get("limit", 50))))
-    except ValueError:
-        limit = 50
+    """
+    Users in creation order, `limit` per page. Pass the returned
+    `next_cursor` as ?cursor= for the next page; ?include_total=1 for an exact count.
+    """
+    limit, after, include_total = page_args(default_limit=50, max_limit=100)
 
     search = request.args.get("search", "").strip()
     role_filter = request.args.get("role")
@@ -171,30 +210,26 @@ def get_all_users():
         regex = {"$regex": search, "$options": "i"}
         query["$or"] = [{"username": regex}, {"email": regex}]
 
-    users = []
-    total = 0
-
     if role_filter and role_filter.lower() in ["admin", "lecturer", "student"]:
-        col = get_collection_by_role(role_filter.lower())
-        cursor = mongo.db[col].find(query).skip((page - 1) * limit).limit(limit)
-        total = mongo.db[col].count_documents(query)
-        for u in cursor:
-            u["role"] = role_filter.lower()
-            users.append(u)
+        collections = [get_collection_by_role(role_filter.lower())]
     else:
-        # collect users from all role collections
-        for col, role in [("admins", "admin"), ("lecturers", "lecturer"), ("students", "student")]:
-            cursor = mongo.db[col].find(query)
-            for u in cursor:
-                u["role"] = role
-                users.append(u)
-        total = sum(mongo.db[c].count_documents(query) for c in ["admins", "lecturers", "students"])
-        # manual pagination fallback
-        users = users[(page - 1) * limit: page * limit]
+        # merge all role collections by _id
+        collections = ["admins", "lecturers", "students"]
+
+    def tagged(col):
+        # Each collection is read for at most limit + 1 users past the cursor
+        for u in mongo.db[col].find(with_keyset(query, "_id", 1, after)).sort("_id", 1).limit(limit + 1):
+            u["role"] = user_directory.ROLE_BY_COLLECTION[col]
+            yield u
+
+    merged = heapq.merge(*(tagged(c) for c in collections), key=lambda u: u["_id"])
+    users, next_cursor = finish_page(list(itertools.islice(merged, limit + 1)), "_id", limit)
+    total = sum(mongo.db[c].count_documents(query) for c in collections) if include_total else None
+    estimated = sum(mongo.db[c].estimated_document_count() for c in collections)
 
     return jsonify({
         "users": [serialize_user(u) for u in users],
-        "pagination": {"page": page, "limit": limit, "total": total}
+        "pagination": pagination_info(limit, next_cursor, estimated, total)
     })
 
 
@@ -221,7 +256,7 @@ def create_course():
         return jsonify({"error": "Invalid lecturer_id"}), 400
 
     # Ensure lecturer exists
-    lecturer = mongo.db.lecturers.find_one({"_id": lecturer_obj_id})
+    lecturer = identity_map.get("lecturers", lecturer_obj_id)
     if not lecturer:
         print(f"[WARN] Lecturer not found for id: {lecturer_raw}")
         return jsonify({"error": "Lecturer not found"}), 404
@@ -234,9 +269,9 @@ def create_course():
             "student_ids": [],
             "created_at": datetime.utcnow(),
         }
-        course_id = mongo.db.courses.insert_one(course_doc).inserted_id
-        # Fetch and return the serialized course object so clients have canonical data
-        created = mongo.db.courses.find_one({"_id": course_id})
+        mongo.db.courses.insert_one(course_doc)
+        # insert_one fills in `_id`, so the inserted document is the canonical one
+        created = identity_map.put("courses", course_doc)
         return jsonify(serialize_course(created)), 201
     except Exception as e:
         import traceback
@@ -249,20 +284,13 @@ def create_course():
 @jwt_required()
 @role_required(["admin"])
 def get_all_courses():
-    try:
-        page = max(1, int(request.args.get("page", 1)))
-    except ValueError:
-        page = 1
-    try:
-        limit = max(1, min(200, int(request.args.get("limit", 50))))
-    except ValueError:
-        limit = 50
-
-    courses = mongo.db.courses.find().skip((page - 1) * limit).limit(limit)
-    total = mongo.db.courses.count_documents({})
+    """Courses in creation order; paginate with ?cursor=<next_cursor>"""
+    limit, after, include_total = page_args(default_limit=50, max_limit=200)
+    courses, next_cursor = fetch_page([mongo.db.courses], {}, limit=limit, after=after)
+    total = mongo.db.courses.count_documents({}) if include_total else None
     return jsonify({
         "courses": [serialize_course(c) for c in courses],
-        "pagination": {"page": page, "limit": limit, "total": total}
+        "pagination": pagination_info(limit, next_cursor, mongo.db.courses.estimated_document_count(), total)
     })
 
 
@@ -294,13 +322,14 @@ def update_course(course_id):
             return jsonify({"error": "Invalid lecturer_id"}), 400
 
     if update_doc:
-        mongo.db.courses.update_one({"_id": ObjectId(course_id)}, {"$set": update_doc})
+        result = mongo.db.courses.update_one({"_id": ObjectId(course_id)}, {"$set": update_doc})
+        if result.matched_count == 0:
+            return jsonify({"error": "Course not found after update"}), 404
+        # The mapped document is the one get_course_or_404 loaded; mirror the $set
+        course = identity_map.apply_set("courses", course["_id"], update_doc) or {**course, **update_doc}
 
-    # Fetch and return the canonical updated course object to help clients keep state in sync
-    updated_course = mongo.db.courses.find_one({"_id": ObjectId(course_id)})
-    if not updated_course:
-        return jsonify({"error": "Course not found after update"}), 404
-    return jsonify(serialize_course(updated_course)), 200
+    # Return the canonical updated course object to help clients keep state in sync
+    return jsonify(serialize_course(course)), 200
 
 
 @admin_bp.route("/courses/<course_id>", methods=["DELETE"])
@@ -386,6 +415,7 @@ def get_course_students(course_id):
 @admin_bp.route("/dashboard", methods=["GET"])
 @jwt_required()
 @role_required(["admin"])
+@query_budget(5)
 def get_dashboard():
     now = datetime.utcnow()
     return jsonify({
@@ -535,6 +565,7 @@ def get_course_analytics(course_id):
 @admin_bp.route("/analytics/chronic-absentees", methods=["GET"])
 @jwt_required()
 @role_required(["admin"])
+@query_budget(2)
 def chronic_absentees():
     try:
         threshold = float(request.args.get("threshold", 60))
@@ -557,15 +588,13 @@ def chronic_absentees():
         {"$limit": 30}
     ]
     results = list(mongo.db.attendance.aggregate(pipeline))
+    # One lookup for every listed student rather than one per row
+    ids = [r["student_id"] for r in results if r.get("student_id") is not None]
+    students = {s["_id"]: s for s in mongo.db.students.find({"_id": {"$in": ids}})} if ids else {}
     for r in results:
-        # r["student_id"] is likely an ObjectId, ensure we query correctly
-        try:
-            sid = r.get("student_id")
-            s = mongo.db.students.find_one({"_id": sid}) if sid is not None else None
-            if s:
-                r["student"] = serialize_student(s)
-        except Exception:
-            pass
+        s = students.get(r.get("student_id"))
+        if s:
+            r["student"] = serialize_student(s)
     return jsonify(results)
 
 
@@ -588,6 +617,14 @@ def suspicious_activity():
     })
 
 
+@admin_bp.route("/security/password-hashing", methods=["GET"])
+@jwt_required()
+@role_required(["admin"])
+def password_hashing_stats():
+    """Queue metrics of this worker's password hashing pool"""
+    return jsonify(password_service.stats())
+
+
 @admin_bp.route("/settings", methods=["GET", "PUT"])
 @jwt_required()
 @role_required(["admin"])
@@ -609,6 +646,150 @@ def system_settings():
     return jsonify({"message": "Settings updated"}), 200
 
 
+@admin_bp.route("/settings/rate-limits", methods=["GET", "PUT"])
+@jwt_required()
+@role_required(["admin"])
+def rate_limit_policies():
+    """Rate limit policy table; changes are picked up by every worker within seconds"""
+    if request.method == "GET":
+        doc = mongo.db.settings.find_one({"_id": POLICY_SETTINGS_ID}) or {}
+        return jsonify({
+            "policies": doc.get("policies") or DEFAULT_POLICIES,
+            "is_default": not doc.get("policies"),
+        })
+
+    policies = (request.get_json() or {}).get("policies")
+    error = validate_policies(policies)
+    if error:
+        return jsonify({"error": error}), 400
+    mongo.db.settings.update_one(
+        {"_id": POLICY_SETTINGS_ID},
+        {"$set": {"policies": policies, "updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+    reload_policies()
+    return jsonify({"message": "Rate limit policies updated"}), 200
+
+
+# ===================== DIAGNOSTICS =======================
+
+@admin_bp.route("/diagnostics/slow-queries", methods=["GET"])
+@jwt_required()
+@role_required(["admin"])
+def slow_queries():
+    """Slowest query shapes by total time, with their routes and latest explain plan"""
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    hours = min(max(request.args.get("hours", 24, type=int), 1), 24 * 30)
+    return jsonify({
+        "threshold_ms": current_app.config.get("DB_SLOW_QUERY_MS"),
+        "hours": hours,
+        "offenders": slow_query_log.top_offenders(limit=limit, hours=hours),
+        "writer": slow_query_log.stats(),
+    })
+
+
+@admin_bp.route("/diagnostics/profiles", methods=["GET"])
+@jwt_required()
+@role_required(["admin"])
+def list_profiles():
+    """Stored request profiles (send `X-Profile: 1` on any request to record one)"""
+    return jsonify({"profiles": profiler.list_profiles(profiler.profile_dir(current_app.config))})
+
+
+@admin_bp.route("/diagnostics/profiles/<profile_id>", methods=["GET"])
+@jwt_required()
+@role_required(["admin"])
+def download_profile(profile_id):
+    """The raw pstats file, or a text report with ?format=text&sort=tottime"""
+    path = profiler.profile_path(profiler.profile_dir(current_app.config), profile_id)
+    if not path:
+        return jsonify({"error": "Profile not found"}), 404
+    if request.args.get("format") == "text":
+        sort = request.args.get("sort", "cumulative")
+        if sort not in ("cumulative", "tottime", "ncalls", "pcalls"):
+            return jsonify({"error": "Invalid sort"}), 400
+        limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+        return Response(profiler.profile_text(path, sort=sort, limit=limit), mimetype="text/plain")
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True,
+                     download_name=f"{profile_id}.prof")
+
+
+def _memory_query_args():
+    key_type = request.args.get("key", "lineno")
+    if key_type not in memory_profiler.KEY_TYPES:
+        return None, None
+    return key_type, min(max(request.args.get("limit", 25, type=int), 1), 200)
+
+
+@admin_bp.route("/diagnostics/memory", methods=["GET"])
+@jwt_required()
+@role_required(["admin"])
+def memory_status():
+    """tracemalloc state and snapshots of the worker serving this request"""
+    return jsonify(memory_profiler.status())
+
+
+@admin_bp.route("/diagnostics/memory/start", methods=["POST"])
+@jwt_required()
+@role_required(["admin"])
+def memory_start():
+    frames = (request.get_json(silent=True) or {}).get("frames", 1)
+    if not isinstance(frames, int):
+        return jsonify({"error": "frames must be an integer"}), 400
+    return jsonify(memory_profiler.start(frames))
+
+
+@admin_bp.route("/diagnostics/memory/stop", methods=["POST"])
+@jwt_required()
+@role_required(["admin"])
+def memory_stop():
+    return jsonify(memory_profiler.stop())
+
+
+@admin_bp.route("/diagnostics/memory/snapshots", methods=["POST"])
+@jwt_required()
+@role_required(["admin"])
+def memory_take_snapshot():
+    if not memory_profiler.is_tracing():
+        return jsonify({"error": "Memory tracing is not running; POST /diagnostics/memory/start first"}), 409
+    label = (request.get_json(silent=True) or {}).get("label")
+    return jsonify(memory_profiler.take_snapshot(label)), 201
+
+
+@admin_bp.route("/diagnostics/memory/snapshots/<int:snapshot_id>", methods=["GET"])
+@jwt_required()
+@role_required(["admin"])
+def memory_snapshot_top(snapshot_id):
+    """Top allocation sites of a snapshot (?key=lineno|filename|traceback&limit=25)"""
+    key_type, limit = _memory_query_args()
+    if key_type is None:
+        return jsonify({"error": "Invalid key"}), 400
+    entry = memory_profiler.get_snapshot(snapshot_id)
+    if entry is None:
+        return jsonify({"error": "Snapshot not found in this worker"}), 404
+    snapshot, meta = entry
+    return jsonify({**meta, "top": memory_profiler.top(snapshot, key_type, limit)})
+
+
+@admin_bp.route("/diagnostics/memory/diff", methods=["GET"])
+@jwt_required()
+@role_required(["admin"])
+def memory_diff():
+    """Allocation growth between snapshots ?from=<id>&to=<id>"""
+    key_type, limit = _memory_query_args()
+    if key_type is None:
+        return jsonify({"error": "Invalid key"}), 400
+    older = memory_profiler.get_snapshot(request.args.get("from", type=int))
+    newer = memory_profiler.get_snapshot(request.args.get("to", type=int))
+    if older is None or newer is None:
+        return jsonify({"error": "Snapshot not found in this worker"}), 404
+    return jsonify({
+        "from": older[1],
+        "to": newer[1],
+        "growth": memory_profiler.diff(older[0], newer[0], key_type, limit),
+    })
+
+
 # ===================== SECURE REAL-TIME WEBSOCKET =======================
 
 def register_admin_ws(sock: Sock):
@@ -630,6 +811,10 @@ def register_admin_ws(sock: Sock):
                 ws.send(json.dumps({"error": "Invalid token"}))
                 ws.close()
                 return
+            if token_revocation.is_revoked(decoded.get("jti")):
+                ws.send(json.dumps({"error": "Token has been revoked"}))
+                ws.close()
+                return
 
             roles = claims.get("roles", []) or claims.get("role", [])
             # normalize single role string to list
@@ -645,18 +830,19 @@ def register_admin_ws(sock: Sock):
 
             while True:
                 try:
-                    now = datetime.utcnow()
-                    data = {
-                        "time": now.strftime("%H:%M:%S"),
-                        "active_sessions": mongo.db.sessions.count_documents({
-                            "status": "active", "qr_expiry": {"$gt": now}
-                        }),
-                        "recent_markings": mongo.db.attendance.count_documents({
-                            "timestamp": {"$gte": now - timedelta(minutes=1)}
-                        }),
-                        "total_students": mongo.db.students.count_documents({}),
-                        "system": "online"
-                    }
+                    with tracing.span("ws.admin.tick", category="ws"):
+                        now = datetime.utcnow()
+                        data = {
+                            "time": now.strftime("%H:%M:%S"),
+                            "active_sessions": mongo.db.sessions.count_documents({
+                                "status": "active", "qr_expiry": {"$gt": now}
+                            }),
+                            "recent_markings": mongo.db.attendance.count_documents({
+                                "timestamp": {"$gte": now - timedelta(minutes=1)}
+                            }),
+                            "total_students": mongo.db.students.count_documents({}),
+                            "system": "online"
+                        }
                     ws.send(json.dumps(data))
                     time.sleep(4)
                 except Exception:
@@ -682,16 +868,9 @@ def get_system_logs():
     - level (info, warning, error)
     - action
     - date range: start_date, end_date
-    Supports pagination with page & limit.
+    Newest first, `limit` per page; pass `next_cursor` back as ?cursor=.
     """
-    try:
-        page = max(1, int(request.args.get("page", 1)))
-    except ValueError:
-        page = 1
-    try:
-        limit = max(1, min(200, int(request.args.get("limit", 50))))
-    except ValueError:
-        limit = 50
+    limit, after, include_total = page_args(default_limit=50, max_limit=200)
 
     query = {}
 
@@ -732,15 +911,77 @@ def get_system_logs():
             except Exception:
                 return jsonify({"error": "Invalid end_date format"}), 400
 
-    # Fetch logs from MongoDB
-    logs_cursor = mongo.db.system_logs.find(query).sort("timestamp", -1).skip((page - 1) * limit).limit(limit)
-    total = mongo.db.system_logs.count_documents(query)
+    # Fetch logs from the monthly partitions overlapping the date range
+    time_range = query.get("timestamp", {})
+    start, end = time_range.get("$gte"), time_range.get("$lte")
+    logs, next_cursor = log_partitions.find_page(
+        query, sort_field="timestamp", limit=limit, after=after, start=start, end=end,
+    )
 
     # Serialize logs
     schema = SystemLogSchema(many=True)
-    logs_data = schema.dump(list(logs_cursor))
+    logs_data = schema.dump(logs)
 
     return jsonify({
         "logs": logs_data,
-        "pagination": {"page": page, "limit": limit, "total": total}
+        "pagination": pagination_info(
+            limit, next_cursor,
+            log_partitions.count(query, start, end),
+            log_partitions.count(query, start, end, exact=True) if include_total else None,
+        )
+    })
+
+
+@admin_bp.route("/logs/clear", methods=["DELETE"])
+@jwt_required()
+@role_required(["admin"])
+def clear_system_logs():
+    """
+    Delete system logs in chunks, archiving them first unless ?archive=0.
+    Optional filters: level, before (ISO date).
+    """
+    query = {}
+    level = request.args.get("level")
+    if level:
+        query["level"] = level.lower()
+    before = request.args.get("before")
+    if before:
+        try:
+            before = datetime.fromisoformat(before)
+        except ValueError:
+            return jsonify({"error": "Invalid before format"}), 400
+        query.update(log_retention.older_than(before))
+    archive = request.args.get("archive", "1") != "0"
+    deleted = log_retention.delete_in_batches(
+        query,
+        batch_size=current_app.config.get("LOG_RETENTION_BATCH_SIZE", 1000),
+        archive_dir=current_app.config.get("LOG_ARCHIVE_DIR") if archive else None,
+        before=before or None,
+    )
+    return jsonify({"message": "Logs cleared", "deleted": deleted, "archived": archive}), 200
+
+
+@admin_bp.route("/logs/retention", methods=["GET"])
+@jwt_required()
+@role_required(["admin"])
+def log_retention_status():
+    return jsonify({
+        "retention_days": log_retention.parse_retention(current_app.config.get("LOG_RETENTION_DAYS")),
+        "archive_dir": current_app.config.get("LOG_ARCHIVE_DIR"),
+        "interval_seconds": current_app.config.get("LOG_RETENTION_INTERVAL_SECONDS"),
+        "last_run": log_retention.last_run(),
     })
+
+
+@admin_bp.route("/logs/retention/run", methods=["POST"])
+@jwt_required()
+@role_required(["admin"])
+def run_log_retention():
+    """Apply retention now (at most 50 batches per level; repeat for large backlogs)"""
+    deleted = log_retention.apply_retention(
+        log_retention.parse_retention(current_app.config.get("LOG_RETENTION_DAYS")),
+        current_app.config.get("LOG_ARCHIVE_DIR"),
+        batch_size=current_app.config.get("LOG_RETENTION_BATCH_SIZE", 1000),
+        max_batches=50,
+    )
+    return jsonify({"deleted": deleted}), 200
@@ -8,6 +8,7 @@ import os
 from backend.app.database import mongo
 from backend.app.utils.serializers import serialize_attendance
 from backend.app.middlewares.role_required import role_required
+from backend.app.utils import tracing
 
 attendance_bp = Blueprint("attendance_bp", __name__, url_prefix="/api/attendance")
 
@@ -94,7 +95,8 @@ def submit_attendance(session_id):
 
         session_loc = (session["location"]["lat"], session["location"]["lng"])
         student_loc = (latitude, longitude)
-        distance = geodesic(session_loc, student_loc).meters
+        with tracing.span("geo.geodesic"):
+            distance = geodesic(session_loc, student_loc).meters
 
         if distance > ALLOWED_RADIUS_METERS:
             return jsonify({
@@ -2,14 +2,19 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import (
     create_access_token, create_refresh_token,
-    jwt_required, get_jwt_identity, decode_token
+    jwt_required, get_jwt_identity, get_jwt, decode_token
 )
 from flask_mail import Message
 from datetime import datetime, timedelta
 from bson import ObjectId
 from functools import wraps
 from backend.app.database import mongo  # ✅ Fixed import
-import bcrypt
+from backend.app.middlewares.role_required import is_user_active
+from backend.app.services import user_directory, token_revocation
+from backend.app.services.password_service import (
+    hash_password, verify_password, verify_and_upgrade, PasswordServiceBusy
+)
+from pymongo.errors import DuplicateKeyError
 import secrets
 
 # =====================================================
@@ -34,21 +39,13 @@ def ensure_jwt_config():
 USER_COLLECTIONS = ["admins", "lecturers", "students"]
 
 def find_user_by_email(email):
-    """Search for user across all role-specific collections"""
-    for col in USER_COLLECTIONS:
-        user = mongo.db[col].find_one({"email": email.lower().strip()})
-        if user:
-            return user, col
-    return None, None
+    """Find a user and their role collection through the user directory"""
+    return user_directory.find_by_email(email)
 
 
 def find_user_by_id(user_id):
-    """Search for user by ID across all collections"""
-    for col in USER_COLLECTIONS:
-        user = mongo.db[col].find_one({"_id": ObjectId(user_id)})
-        if user:
-            return user, col
-    return None, None
+    """Find a user by ID and their role collection through the user directory"""
+    return user_directory.find_by_id(user_id)
 
 
 def get_collection_by_role(role):
@@ -63,14 +60,16 @@ def get_collection_by_role(role):
     return "students"  # default
 
 
-def hash_password(password):
-    """Hash password using bcrypt"""
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+def build_token_claims(user, collection):
+    """Signed claims that let `role_required` authorize without a DB lookup."""
+    role = user.get("role") or {"admins": "admin", "lecturers": "lecturer"}.get(collection, "student")
+    return {"role": str(role).lower(), "user_type": collection}
 
 
-def verify_password(password, hashed):
-    """Verify password against hash"""
-    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+@auth_bp.errorhandler(PasswordServiceBusy)
+def password_service_busy(e):
+    """Hashing pool saturated (e.g. a login rush); ask the client to retry shortly"""
+    return jsonify({"message": "Server busy, please retry"}), 503, {"Retry-After": "1"}
 
 
 # =====================================================
@@ -115,17 +114,13 @@ def register():
     if role not in ["admin", "lecturer", "student"]:
         return jsonify({"message": "Invalid role"}), 400
 
-    # Check if email already exists
-    existing_user, _ = find_user_by_email(email)
-    if existing_user:
-        return jsonify({"message": "Email already registered"}), 409
-
     # Split full name into first and last name
     name_parts = name.split(" ", 1)
     first_name = name_parts[0]
     last_name = name_parts[1] if len(name_parts) > 1 else ""
 
     user_doc = {
+        "_id": ObjectId(),
         "username": name,
         "first_name": first_name,
         "last_name": last_name,
@@ -139,11 +134,20 @@ def register():
     }
 
     collection = get_collection_by_role(role)
-    result = mongo.db[collection].insert_one(user_doc)
-    user_doc["_id"] = result.inserted_id
+    # Reserving the email in the directory enforces uniqueness across all roles
+    try:
+        user_directory.add_user(user_doc["_id"], user_doc["email"], collection)
+    except DuplicateKeyError:
+        return jsonify({"message": "Email already registered"}), 409
+    try:
+        mongo.db[collection].insert_one(user_doc)
+    except Exception:
+        user_directory.remove_user(user_doc["_id"])
+        raise
 
-    access_token = create_access_token(identity=str(user_doc["_id"]))
-    refresh_token = create_refresh_token(identity=str(user_doc["_id"]))
+    claims = build_token_claims(user_doc, collection)
+    access_token = create_access_token(identity=str(user_doc["_id"]), additional_claims=claims)
+    refresh_token = create_refresh_token(identity=str(user_doc["_id"]), additional_claims=claims)
 
     return jsonify({
         "access_token": access_token,
@@ -174,12 +178,19 @@ def login():
     if not all([email, password]):
         return jsonify({"message": "Missing email or password"}), 400
 
-    user, _ = find_user_by_email(email)
-    if not user or not verify_password(password, user["password_hash"]):
+    user, col = find_user_by_email(email)
+    if not user:
         return jsonify({"message": "Invalid credentials"}), 401
+    ok, upgraded_hash = verify_and_upgrade(password, user.get("password_hash"))
+    if not ok:
+        return jsonify({"message": "Invalid credentials"}), 401
+    if upgraded_hash:
+        # Legacy Werkzeug hash or outdated bcrypt cost: store the upgraded hash
+        mongo.db[col].update_one({"_id": user["_id"]}, {"$set": {"password_hash": upgraded_hash}})
 
-    access_token = create_access_token(identity=str(user["_id"]))
-    refresh_token = create_refresh_token(identity=str(user["_id"]))
+    claims = build_token_claims(user, col)
+    access_token = create_access_token(identity=str(user["_id"]), additional_claims=claims)
+    refresh_token = create_refresh_token(identity=str(user["_id"]), additional_claims=claims)
 
     role = str(user.get("role", "")).lower()  # ✅ Normalize role
 
@@ -209,7 +220,20 @@ def refresh():
     """Refresh access token"""
     ensure_jwt_config()
     user_id = get_jwt_identity()
-    new_access_token = create_access_token(identity=user_id)
+    token = get_jwt()
+    if token.get("role") and token.get("user_type"):
+        claims = {"role": token["role"], "user_type": token["user_type"]}
+    else:
+        # Refresh tokens issued before role claims existed
+        user, col = find_user_by_id(user_id)
+        if not user:
+            return jsonify({"error": "User not found"}), 401
+        claims = build_token_claims(user, col)
+
+    if not is_user_active(user_id, claims["user_type"]):
+        return jsonify({"error": "User not found or deactivated"}), 401
+
+    new_access_token = create_access_token(identity=user_id, additional_claims=claims)
     return jsonify({"access_token": new_access_token}), 200
 
 
@@ -257,7 +281,7 @@ def change_password():
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    if not verify_password(old_password, user["password_hash"]):
+    if not verify_password(old_password, user.get("password_hash")):
         return jsonify({"error": "Incorrect old password"}), 401
 
     new_hash = hash_password(new_password)
@@ -331,13 +355,12 @@ def reset_password():
     new_hash = hash_password(new_password)
     
     # Update password in correct collection
-    for col in USER_COLLECTIONS:
-        result = mongo.db[col].update_one(
-            {"_id": user_id}, 
+    _, col = find_user_by_id(user_id)
+    if col:
+        mongo.db[col].update_one(
+            {"_id": user_id},
             {"$set": {"password_hash": new_hash}}
         )
-        if result.matched_count > 0:
-            break
 
     mongo.db.password_resets.delete_one({"_id": reset_doc["_id"]})
     return jsonify({"message": "Password has been reset successfully"}), 200
@@ -349,5 +372,16 @@ def reset_password():
 @auth_bp.route("/logout", methods=["POST"])
 @jwt_required()
 def logout():
-    """Logout user (client-side token removal)"""
+    """Logout user: revoke the access token and, if sent, the refresh token"""
+    token_revocation.revoke_payload(get_jwt())
+
+    refresh_token = (request.get_json(silent=True) or {}).get("refresh_token")
+    if refresh_token:
+        try:
+            payload = decode_token(refresh_token)
+        except Exception:
+            payload = None
+        if payload and payload.get("sub") == get_jwt_identity():
+            token_revocation.revoke_payload(payload)
+
     return jsonify({"message": "Logged out successfully"}), 200
\ No newline at end of file
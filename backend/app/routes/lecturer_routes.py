@@ -3,15 +3,19 @@ from bson import ObjectId
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from geopy.distance import geodesic
-import uuid
 import os
-import qrcode
 import io
 import base64
 
 from backend.app.database import mongo
 from backend.app.middlewares.role_required import role_required
 from backend.app.utils.serializers import serialize_course, serialize_student, serialize_attendance
+from backend.app.services.qr_sheet_service import start_qr_sheet_job
+from backend.app.services.qr_service import make_compact_token, build_qr_payload, render_qr_png
+from backend.app.services import session_index, checkin_code_service, user_directory
+from pymongo.errors import DuplicateKeyError
+from backend.app.utils import identity_map
+from backend.app.utils.query_budget import query_budget
 from flask_sock import Sock
 import json, time
 import csv
@@ -42,10 +46,19 @@ def get_my_course(course_id, lecturer_id):
     """Return course owned by the lecturer."""
     if not ObjectId.is_valid(course_id):
         return None
-    return mongo.db.courses.find_one({
-        "_id": ObjectId(course_id),
-        "lecturer_id": ObjectId(lecturer_id)
-    })
+    course = identity_map.get("courses", course_id)
+    if not course or course.get("lecturer_id") != ObjectId(lecturer_id):
+        return None
+    return course
+
+def get_course_session(course_id, session_id):
+    """Return a session of the given course."""
+    if not ObjectId.is_valid(session_id):
+        return None
+    session = identity_map.get("sessions", session_id)
+    if not session or session.get("course_id") != ObjectId(course_id):
+        return None
+    return session
 
 # =====================================================
 #             CORS Preflight Support for Vite
@@ -66,6 +79,7 @@ def handle_options():
 @lecturer_bp.route("/dashboard", methods=["GET"])
 @jwt_required()
 @role_required(["lecturer"])
+@query_budget(2)
 def get_dashboard():
     """Fetch lecturer dashboard overview."""
     lecturer_id = get_jwt_identity()
@@ -144,6 +158,7 @@ def update_course(course_id):
 
     if update_doc:
         mongo.db.courses.update_one({"_id": ObjectId(course_id)}, {"$set": update_doc})
+        identity_map.apply_set("courses", course_id, update_doc)
         return jsonify({"message": "Course updated successfully"}), 200
     return jsonify({"message": "No changes made"}), 200
 
@@ -194,8 +209,10 @@ def add_student_to_course(course_id):
                 "email": data.get("email"),
                 "created_at": datetime.utcnow()
             }
-            result = mongo.db.students.insert_one(new_student)
-            student_id = result.inserted_id
+            try:
+                student_id = user_directory.insert_user("students", new_student)
+            except DuplicateKeyError:
+                return jsonify({"error": "Email already registered"}), 409
     
     if not student_id:
         return jsonify({"error": "Missing student_id or indexNumber"}), 400
@@ -208,9 +225,10 @@ def add_student_to_course(course_id):
         {"_id": ObjectId(course_id)},
         {"$addToSet": {"student_ids": student_id}}
     )
+    identity_map.forget("courses", course_id)
     
     # Return the added student data
-    student = mongo.db.students.find_one({"_id": student_id})
+    student = identity_map.get("students", student_id)
     return jsonify({
         "message": "Student added successfully",
         "student": serialize_student(student)
@@ -232,6 +250,7 @@ def remove_student_from_course(course_id, student_id):
         {"_id": ObjectId(course_id)},
         {"$pull": {"student_ids": ObjectId(student_id)}}
     )
+    identity_map.forget("courses", course_id)
     return jsonify({"message": "Student removed successfully"}), 200
 
 
@@ -240,7 +259,7 @@ def remove_student_from_course(course_id, student_id):
 @role_required(["lecturer"])
 def get_course_students(course_id):
     """Retrieve students enrolled in a course."""
-    course = mongo.db.courses.find_one({"_id": ObjectId(course_id)})
+    course = identity_map.get("courses", course_id) if ObjectId.is_valid(course_id) else None
     if not course:
         return jsonify({"error": "Course not found"}), 404
 
@@ -265,13 +284,17 @@ def create_session(course_id):
     qr_expires_in = int(data.get("qr_expires_in_minutes", 15))
     location = data.get("location")
 
+    # Allocate the _id up front so the compact QR token can embed it
+    session_oid = ObjectId()
     session_doc = {
+        "_id": session_oid,
         "course_id": ObjectId(course_id),
         "session_date": data.get("session_date"),
         "start_time": data.get("start_time"),
         "end_time": data.get("end_time"),
         "is_active": True,
-        "qr_code_uuid": str(uuid.uuid4()),
+        "qr_code_uuid": make_compact_token(session_oid),
+        "code_seq": checkin_code_service.next_code_seq(),
         "expires_at": datetime.utcnow() + timedelta(minutes=qr_expires_in),
         "location": location,
         "created_at": datetime.utcnow()
@@ -279,18 +302,17 @@ def create_session(course_id):
 
     session_id = mongo.db.sessions.insert_one(session_doc).inserted_id
 
-    qr_base_url = os.getenv("QR_BASE_URL", "http://localhost:5000/api/students/scan")
-    qr_data = f"{qr_base_url}/{session_doc['qr_code_uuid']}"
-    qr_img = qrcode.make(qr_data)
-    buffer = io.BytesIO()
-    qr_img.save(buffer, format="PNG")
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    qr_data = build_qr_payload(session_doc["qr_code_uuid"])
+    qr_base64 = base64.b64encode(render_qr_png(qr_data)).decode("utf-8")
+    checkin_code, code_expires_in = checkin_code_service.current_code(session_doc)
 
     return jsonify({
         "message": "Session created successfully",
         "session_id": str(session_id),
         "qr_code_uuid": session_doc["qr_code_uuid"],
         "qr_code_base64": qr_base64,
+        "checkin_code": checkin_code,
+        "checkin_code_expires_in": code_expires_in,
         "expires_at": session_doc["expires_at"].isoformat(),
         "location_required": bool(location)
     }), 201
@@ -484,9 +506,11 @@ def import_students(course_id):
                     skipped += 1
                 else:
                     student_doc = {'indexNumber': index, 'name': name, 'email': email, 'created_at': datetime.utcnow()}
-                    sid = mongo.db.students.insert_one(student_doc).inserted_id
+                    sid = user_directory.insert_user('students', student_doc)
                     mongo.db.courses.update_one({'_id': ObjectId(course_id)}, {'$addToSet': {'student_ids': sid}})
                     created += 1
+            except DuplicateKeyError:
+                errors.append({'row': i + 1, 'error': 'email already registered'})
             except Exception as e:
                 errors.append({'row': i + 1, 'error': str(e)})
 
@@ -563,9 +587,11 @@ def bulk_students(course_id):
             if existing:
                 sid = existing['_id']
             else:
-                sid = mongo.db.students.insert_one({'indexNumber': index, 'name': name, 'email': email, 'created_at': datetime.utcnow()}).inserted_id
+                sid = user_directory.insert_user('students', {'indexNumber': index, 'name': name, 'email': email, 'created_at': datetime.utcnow()})
             mongo.db.courses.update_one({'_id': ObjectId(course_id)}, {'$addToSet': {'student_ids': sid}})
             added.append(str(sid))
+        except DuplicateKeyError:
+            errors.append({'item': item, 'error': 'email already registered'})
         except Exception as e:
             errors.append({'item': item, 'error': str(e)})
 
@@ -588,14 +614,39 @@ def regenerate_qr(course_id, session_id):
     if not course:
         return jsonify({'error': 'Course not found'}), 404
 
-    session = mongo.db.sessions.find_one({'_id': ObjectId(session_id), 'course_id': ObjectId(course_id)})
+    session = get_course_session(course_id, session_id)
     if not session:
         return jsonify({'error': 'Session not found'}), 404
 
-    qr_uuid = str(uuid.uuid4())
+    qr_uuid = make_compact_token(session['_id'])
     expires_at = datetime.utcnow() + timedelta(minutes=15)
     mongo.db.sessions.update_one({'_id': session['_id']}, {'$set': {'qr_code_uuid': qr_uuid, 'expires_at': expires_at}})
-    return jsonify({'qr_code_uuid': qr_uuid, 'expires_at': expires_at.isoformat()}), 200
+    identity_map.apply_set('sessions', session['_id'], {'qr_code_uuid': qr_uuid, 'expires_at': expires_at})
+    session_index.invalidate(session['_id'])
+    qr_base64 = base64.b64encode(render_qr_png(build_qr_payload(qr_uuid))).decode('utf-8')
+    return jsonify({'qr_code_uuid': qr_uuid, 'qr_code_base64': qr_base64, 'expires_at': expires_at.isoformat()}), 200
+
+
+@lecturer_bp.route('/courses/<course_id>/sessions/<session_id>/code', methods=['GET'])
+@jwt_required()
+@role_required(['lecturer'])
+def get_checkin_code(course_id, session_id):
+    """Current 6-digit check-in code to display next to the QR; rotates every period."""
+    lecturer_id = get_jwt_identity()
+    course = get_my_course(course_id, lecturer_id)
+    if not course:
+        return jsonify({'error': 'Course not found'}), 404
+    if not ObjectId.is_valid(session_id):
+        return jsonify({'error': 'Invalid session id'}), 400
+
+    session = get_course_session(course_id, session_id)
+    if not session:
+        return jsonify({'error': 'Session not found'}), 404
+    if not session.get('is_active'):
+        return jsonify({'error': 'Session is not active'}), 400
+
+    code, expires_in = checkin_code_service.current_code(session)
+    return jsonify({'code': code, 'expires_in': expires_in, 'period': current_app.config.get('CHECKIN_CODE_PERIOD_SECONDS', 30)}), 200
 
 
 @lecturer_bp.route('/courses/<course_id>/sessions/<session_id>/extend', methods=['POST'])
@@ -610,11 +661,13 @@ def extend_session(course_id, session_id):
     data = request.get_json() or {}
     minutes = int(data.get('minutes', 10))
     try:
-        session = mongo.db.sessions.find_one({'_id': ObjectId(session_id), 'course_id': ObjectId(course_id)})
+        session = get_course_session(course_id, session_id)
         if not session:
             return jsonify({'error': 'Session not found'}), 404
         new_expiry = (session.get('expires_at') or datetime.utcnow()) + timedelta(minutes=minutes)
         mongo.db.sessions.update_one({'_id': session['_id']}, {'$set': {'expires_at': new_expiry}})
+        identity_map.apply_set('sessions', session['_id'], {'expires_at': new_expiry})
+        session_index.invalidate(session['_id'])
         return jsonify({'expires_at': new_expiry.isoformat()}), 200
     except Exception as e:
         traceback.print_exc()
@@ -633,6 +686,8 @@ def force_close_session(course_id, session_id):
     result = mongo.db.sessions.update_one({'_id': ObjectId(session_id), 'course_id': ObjectId(course_id)}, {'$set': {'is_active': False, 'expires_at': datetime.utcnow()}})
     if result.matched_count == 0:
         return jsonify({'error': 'Session not found'}), 404
+    session_index.invalidate(session_id)
+    checkin_code_service.invalidate()
     return jsonify({'message': 'Session closed', 'closed_at': datetime.utcnow().isoformat()}), 200
 
 
@@ -651,19 +706,121 @@ def clone_session(course_id):
     if not source_session_id or not new_date:
         return jsonify({'error': 'source_session_id and new_date required'}), 400
 
-    src = mongo.db.sessions.find_one({'_id': ObjectId(source_session_id), 'course_id': ObjectId(course_id)})
+    src = get_course_session(course_id, source_session_id)
     if not src:
         return jsonify({'error': 'Source session not found'}), 404
 
     new_doc = {k: v for k, v in src.items() if k != '_id'}
+    new_doc['_id'] = ObjectId()
     new_doc['session_date'] = new_date
     new_doc['is_active'] = False
-    new_doc['qr_code_uuid'] = str(uuid.uuid4())
+    new_doc['qr_code_uuid'] = make_compact_token(new_doc['_id'])
+    new_doc['code_seq'] = checkin_code_service.next_code_seq()
     new_doc['created_at'] = datetime.utcnow()
     new_id = mongo.db.sessions.insert_one(new_doc).inserted_id
     return jsonify({'new_session_id': str(new_id)}), 201
 
 
+@lecturer_bp.route('/courses/<course_id>/sessions/qr_sheets', methods=['POST'])
+@jwt_required()
+@role_required(['lecturer'])
+def create_qr_sheets(course_id):
+    """Queue a printable multi-page PDF of session QR codes for a course.
+
+    Expected JSON body (all optional):
+    {
+        "session_ids": ["..."],          # explicit sessions, otherwise the date range is used
+        "start_date": "YYYY-MM-DD",
+        "end_date": "YYYY-MM-DD",
+        "copies": 1,                     # e.g. one code per seat
+        "columns": 2, "rows": 3          # codes per page
+    }
+    """
+    lecturer_id = get_jwt_identity()
+    course = get_my_course(course_id, lecturer_id)
+    if not course:
+        return jsonify({'error': 'Course not found'}), 404
+
+    data = request.get_json() or {}
+    try:
+        copies = max(1, int(data.get('copies', 1)))
+        columns = min(6, max(1, int(data.get('columns', 2))))
+        rows = min(8, max(1, int(data.get('rows', 3))))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'copies, columns and rows must be integers'}), 400
+
+    query = {'course_id': ObjectId(course_id)}
+    if data.get('session_ids'):
+        try:
+            query['_id'] = {'$in': [ObjectId(sid) for sid in data['session_ids']]}
+        except Exception:
+            return jsonify({'error': 'Invalid session id'}), 400
+    date_range = {}
+    if data.get('start_date'):
+        date_range['$gte'] = data['start_date']
+    if data.get('end_date'):
+        date_range['$lte'] = data['end_date']
+    if date_range:
+        query['session_date'] = date_range
+
+    sessions = list(mongo.db.sessions.find(query, {'qr_code_uuid': 1, 'session_date': 1, 'start_time': 1, 'end_time': 1}).sort('session_date', 1))
+    sessions = [s for s in sessions if s.get('qr_code_uuid')]
+    if not sessions:
+        return jsonify({'error': 'No sessions with QR codes in range'}), 404
+
+    total = len(sessions) * copies
+    if total > current_app.config.get('QR_SHEET_MAX_CODES', 2000):
+        return jsonify({'error': f"Too many codes requested ({total})"}), 400
+
+    entries = []
+    for s in sessions:
+        when = ' '.join(filter(None, [s.get('session_date'), s.get('start_time')]))
+        for seat in range(1, copies + 1):
+            caption = [course.get('name', ''), when]
+            if copies > 1:
+                caption.append(f'Seat {seat}')
+            entries.append((build_qr_payload(s['qr_code_uuid']), caption))
+
+    job = {
+        'course_id': course_id,
+        'lecturer_id': lecturer_id,
+        'status': 'queued',
+        'progress': {'rendered': 0, 'unique_codes': len(sessions), 'total_codes': total},
+        'created_at': datetime.utcnow()
+    }
+    job_id = mongo.db.qr_sheet_jobs.insert_one(job).inserted_id
+    start_qr_sheet_job(current_app._get_current_object(), job_id, entries, columns=columns, rows=rows)
+    return jsonify({'job_id': str(job_id), 'status': 'queued', 'total_codes': total}), 202
+
+
+@lecturer_bp.route('/qr_sheets/<job_id>', methods=['GET'])
+@jwt_required()
+@role_required(['lecturer'])
+def get_qr_sheet_job(job_id):
+    if not ObjectId.is_valid(job_id):
+        return jsonify({'error': 'Invalid job id'}), 400
+    job = mongo.db.qr_sheet_jobs.find_one({'_id': ObjectId(job_id), 'lecturer_id': get_jwt_identity()}, {'file_path': 0})
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    job['_id'] = str(job['_id'])
+    return jsonify(job), 200
+
+
+@lecturer_bp.route('/qr_sheets/<job_id>/download', methods=['GET'])
+@jwt_required()
+@role_required(['lecturer'])
+def download_qr_sheet(job_id):
+    if not ObjectId.is_valid(job_id):
+        return jsonify({'error': 'Invalid job id'}), 400
+    job = mongo.db.qr_sheet_jobs.find_one({'_id': ObjectId(job_id), 'lecturer_id': get_jwt_identity()})
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.get('status') != 'completed' or not os.path.exists(job.get('file_path', '')):
+        return jsonify({'error': 'Sheet not ready', 'status': job.get('status')}), 409
+    return send_file(job['file_path'], mimetype='application/pdf', as_attachment=True,
+                     download_name=f"qr_sheet_{job['course_id']}.pdf")
+
+
 @lecturer_bp.route('/courses/<course_id>/sessions/<session_id>/attendance/export', methods=['GET'])
 @jwt_required()
 @role_required(['lecturer'])
@@ -877,9 +1034,26 @@ def search_students(course_id):
 @jwt_required()
 @role_required(['lecturer'])
 def sync_roster(course_id):
-    file = request.files.get('file')
     created = 0
     updated = 0
+    errors = []
+
+    def upsert_student(index, name, email):
+        nonlocal created, updated
+        existing = mongo.db.students.find_one({'indexNumber': index})
+        try:
+            if existing:
+                # Email changes go through the user directory so logins follow them
+                user_directory.set_email('students', existing['_id'], email, extra={'name': name})
+                updated += 1
+            else:
+                sid = user_directory.insert_user('students', {'indexNumber': index, 'name': name, 'email': email, 'created_at': datetime.utcnow()})
+                mongo.db.courses.update_one({'_id': ObjectId(course_id)}, {'$addToSet': {'student_ids': sid}})
+                created += 1
+        except DuplicateKeyError:
+            errors.append({'index': index, 'error': 'email already registered'})
+
+    file = request.files.get('file')
     if file:
         stream = io.TextIOWrapper(file.stream, encoding='utf-8')
         reader = csv.DictReader(stream)
@@ -889,15 +1063,8 @@ def sync_roster(course_id):
             email = (row.get('email') or '').strip() or None
             if not index or not name:
                 continue
-            existing = mongo.db.students.find_one({'indexNumber': index})
-            if existing:
-                mongo.db.students.update_one({'_id': existing['_id']}, {'$set': {'name': name, 'email': email}})
-                updated += 1
-            else:
-                sid = mongo.db.students.insert_one({'indexNumber': index, 'name': name, 'email': email, 'created_at': datetime.utcnow()}).inserted_id
-                mongo.db.courses.update_one({'_id': ObjectId(course_id)}, {'$addToSet': {'student_ids': sid}})
-                created += 1
-        return jsonify({'created': created, 'updated': updated}), 200
+            upsert_student(index, name, email)
+        return jsonify({'created': created, 'updated': updated, 'errors': errors}), 200
 
     data = request.get_json() or {}
     studs = data.get('students', [])
@@ -907,12 +1074,5 @@ def sync_roster(course_id):
         email = s.get('email')
         if not index or not name:
             continue
-        existing = mongo.db.students.find_one({'indexNumber': index})
-        if existing:
-            mongo.db.students.update_one({'_id': existing['_id']}, {'$set': {'name': name, 'email': email}})
-            updated += 1
-        else:
-            sid = mongo.db.students.insert_one({'indexNumber': index, 'name': name, 'email': email, 'created_at': datetime.utcnow()}).inserted_id
-            mongo.db.courses.update_one({'_id': ObjectId(course_id)}, {'$addToSet': {'student_ids': sid}})
-            created += 1
-    return jsonify({'created': created, 'updated': updated}), 200
+        upsert_student(index, name, email)
+    return jsonify({'created': created, 'updated': updated, 'errors': errors}), 200
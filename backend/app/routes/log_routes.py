@@ -1,19 +1,25 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
 from datetime import datetime
-from backend.app.database import mongo
 from backend.app.middlewares.role_required import role_required
+from backend.app.services import log_partitions
+from backend.app.utils.pagination import InvalidCursor, page_args, pagination_info
 
 log_bp = Blueprint("log_bp", __name__, url_prefix="/api/logs")
 
+
+@log_bp.errorhandler(InvalidCursor)
+def invalid_cursor(e):
+    return jsonify({"error": str(e)}), 400
+
+
 @log_bp.route("/", methods=["GET"])
 @jwt_required()
 @role_required(["admin"])
 def get_logs():
     """Get system logs (Admin only)"""
     # Get query parameters
-    page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', 50, type=int)
+    limit, after, include_total = page_args(default_limit=50, max_limit=200)
     log_type = request.args.get('type')
     user_filter = request.args.get('user')
     
@@ -24,14 +30,8 @@ def get_logs():
     if user_filter:
         query['user'] = {'$regex': user_filter, '$options': 'i'}
     
-    # Get total count
-    total = mongo.db.system_logs.count_documents(query)
-    
-    # Get paginated logs
-    logs = mongo.db.system_logs.find(query)\
-        .sort("created_at", -1)\
-        .skip((page - 1) * limit)\
-        .limit(limit)
+    # Get the page (keyset on created_at) across the monthly log partitions
+    logs, next_cursor = log_partitions.find_page(query, sort_field="created_at", limit=limit, after=after)
     
     logs_list = []
     for log in logs:
@@ -45,12 +45,11 @@ def get_logs():
     
     return jsonify({
         "logs": logs_list,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "total_pages": (total + limit - 1) // limit
-        }
+        "pagination": pagination_info(
+            limit, next_cursor,
+            log_partitions.count(query),
+            log_partitions.count(query, exact=True) if include_total else None,
+        )
     }), 200
 
 @log_bp.route("/types", methods=["GET"])
@@ -58,5 +57,5 @@ def get_logs():
 @role_required(["admin"])
 def get_log_types():
     """Get available log types"""
-    types = mongo.db.system_logs.distinct("type")
+    types = log_partitions.distinct("type")
     return jsonify({"types": types}), 200
\ No newline at end of file
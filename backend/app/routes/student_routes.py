@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from bson import ObjectId
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
@@ -7,16 +7,24 @@ from geopy.distance import geodesic
 from backend.app.database import mongo
 from backend.app.utils.serializers import serialize_student, serialize_course, serialize_attendance
 from backend.app.middlewares.role_required import role_required
+from backend.app.middlewares.rate_limiter import get_limiter
+from backend.app.services import session_index, checkin_code_service, user_directory
+from pymongo.errors import DuplicateKeyError
+from backend.app.utils import identity_map, tracing
+from backend.app.utils.query_budget import query_budget
 
 student_bp = Blueprint("student_bp", __name__, url_prefix="/api/student")
 
+# Short-code attempts per student are counted in the shared rate-limit backend
+CHECKIN_CODE_WINDOW_SECONDS = 300
+
 # ======================= Helper Functions =======================
 def check_student_or_admin_access(student_id):
     """Verify if the current user is the student themselves or an admin."""
     user_id = get_jwt_identity()
     user = (
-        mongo.db.admins.find_one({"_id": ObjectId(user_id)}) or
-        mongo.db.students.find_one({"_id": ObjectId(user_id)})
+        identity_map.get("admins", user_id) or
+        identity_map.get("students", user_id)
     )
     if not user:
         return None, jsonify({"error": "Access denied"}), 403
@@ -42,7 +50,7 @@ def get_student(student_id):
     if err_response:
         return err_response, err_code
 
-    student = mongo.db.students.find_one({"_id": ObjectId(student_id)})
+    student = identity_map.get("students", student_id)
     if not student:
         return jsonify({"error": "Student not found"}), 404
     return jsonify(serialize_student(student)), 200
@@ -56,7 +64,16 @@ def update_student(student_id):
         return err_response, err_code
 
     data = request.get_json() or {}
-    mongo.db.students.update_one({"_id": ObjectId(student_id)}, {"$set": data})
+    if "email" in data:
+        # The directory answers logins by email, so both change together
+        fields = {k: v for k, v in data.items() if k != "email"}
+        try:
+            user_directory.set_email("students", student_id, data["email"], extra=fields)
+        except DuplicateKeyError:
+            return jsonify({"error": "Email already in use"}), 409
+    else:
+        mongo.db.students.update_one({"_id": ObjectId(student_id)}, {"$set": data})
+    identity_map.forget("students", student_id)
     return jsonify({"message": "Student updated successfully"}), 200
 
 
@@ -65,6 +82,8 @@ def update_student(student_id):
 @role_required(["admin"])
 def delete_student(student_id):
     mongo.db.students.delete_one({"_id": ObjectId(student_id)})
+    user_directory.remove_user(student_id)
+    identity_map.forget("students", student_id)
     return jsonify({"message": "Student deleted successfully"}), 200
 
 
@@ -87,8 +106,8 @@ def enroll_in_course(student_id, course_id):
     if str(user_id) != student_id:
         return jsonify({"error": "Students can only enroll themselves"}), 403
 
-    student = mongo.db.students.find_one({"_id": ObjectId(student_id)})
-    course = mongo.db.courses.find_one({"_id": ObjectId(course_id)})
+    student = identity_map.get("students", student_id)
+    course = identity_map.get("courses", course_id)
     if not student or not course:
         return jsonify({"error": "Student or course not found"}), 404
 
@@ -128,10 +147,11 @@ def get_student_attendance(student_id):
 # ======================= Dashboard =======================
 @student_bp.route("/dashboard", methods=["GET"])
 @jwt_required()
+@query_budget(3)
 def get_dashboard():
     """Get student dashboard."""
     student_id = get_jwt_identity()
-    student = mongo.db.students.find_one({"_id": ObjectId(student_id)})
+    student = identity_map.get("students", student_id)
 
     if not student:
         return jsonify({"error": "Student not found"}), 404
@@ -153,30 +173,16 @@ def get_dashboard():
 
 
 # ======================= QR Code Scan =======================
-@student_bp.route("/scan", methods=["POST"])
-@jwt_required()
-def scan_qr():
-    """Scan QR code to mark attendance."""
-    student_id = get_jwt_identity()
-    data = request.get_json() or {}
-    qr_data = data.get("qr_data")
-
-    if not qr_data:
-        return jsonify({"message": "QR data required"}), 400
-
-    # Extract UUID from QR code data
-    qr_uuid = qr_data.split("/")[-1] if "/" in qr_data else qr_data
-    session = mongo.db.sessions.find_one({
-        "qr_code_uuid": qr_uuid,
-        "is_active": True
-    })
-
-    if not session:
-        return jsonify({"message": "Invalid or inactive QR code"}), 404
-
+def record_check_in(student_id, session, data):
+    """Validate a resolved session for the student and record attendance."""
     # Check expiration
     if session.get("expires_at") and datetime.utcnow() > session["expires_at"]:
-        return jsonify({"message": "QR code has expired"}), 400
+        return jsonify({"message": "This check-in has expired"}), 400
+
+    # Only students enrolled in the session's course can check in
+    course = identity_map.get("courses", session["course_id"])
+    if not course or ObjectId(student_id) not in course.get("student_ids", []):
+        return jsonify({"message": "You are not enrolled in this course"}), 403
 
     # Check if already marked
     existing = mongo.db.attendance.find_one({
@@ -190,7 +196,8 @@ def scan_qr():
     if session.get("location") and data.get("location"):
         session_loc = (session["location"]["lat"], session["location"]["lng"])
         student_loc = (data["location"]["latitude"], data["location"]["longitude"])
-        distance = geodesic(session_loc, student_loc).meters
+        with tracing.span("geo.geodesic"):
+            distance = geodesic(session_loc, student_loc).meters
         if distance > 100:
             return jsonify({"message": "You are too far from the class location"}), 400
 
@@ -209,3 +216,57 @@ def scan_qr():
         "session_id": str(session["_id"]),
         "marked_at": attendance_doc["timestamp"].isoformat()
     }), 200
+
+
+@student_bp.route("/scan", methods=["POST"])
+@jwt_required()
+@query_budget(5)
+def scan_qr():
+    """Scan QR code to mark attendance."""
+    student_id = get_jwt_identity()
+    data = request.get_json() or {}
+    qr_data = data.get("qr_data")
+
+    if not qr_data:
+        return jsonify({"message": "QR data required"}), 400
+
+    # Compact tokens resolve from the per-worker session index; legacy UUIDs hit the DB
+    session = session_index.resolve_qr(qr_data)
+
+    if not session:
+        return jsonify({"message": "Invalid or inactive QR code"}), 404
+
+    return record_check_in(student_id, session, data)
+
+
+# ======================= Short-Code Check-in =======================
+@student_bp.route("/checkin/code", methods=["POST"])
+@jwt_required()
+def check_in_with_code():
+    """Mark attendance with the 6-digit rotating code shown by the lecturer."""
+    student_id = get_jwt_identity()
+    data = request.get_json() or {}
+    code = str(data.get("code") or "").strip()
+
+    if not code.isdigit() or len(code) != 6:
+        return jsonify({"message": "A 6-digit code is required"}), 400
+
+    # Throttle guessing: codes are short, so cap attempts per student. Every
+    # attempt is counted up front with one atomic hit on the shared backend, so
+    # neither extra workers nor concurrent requests buy more guesses.
+    max_attempts = current_app.config.get("CHECKIN_CODE_MAX_ATTEMPTS", 10)
+    allowed, _, retry_after = get_limiter().hit(
+        f"checkin-code|user:{student_id}", max_attempts, CHECKIN_CODE_WINDOW_SECONDS
+    )
+    if not allowed:
+        return jsonify({"message": "Too many code attempts, try again later"}), 429, {"Retry-After": str(retry_after)}
+
+    try:
+        session = checkin_code_service.resolve_code(code)
+    except checkin_code_service.AmbiguousCode:
+        # The code just rotated into another session's current code
+        return jsonify({"message": "This code has changed, enter the code now shown"}), 409
+    if not session:
+        return jsonify({"message": "Invalid or expired code"}), 404
+
+    return record_check_in(student_id, session, data)
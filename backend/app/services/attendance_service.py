@@ -3,10 +3,11 @@ from datetime import datetime
 from bson import ObjectId
 from backend.app.database import mongo
 from backend.app.services.geo_service import is_within_radius
+from backend.app.services.session_index import resolve_qr
 
 def validate_session(qr_uuid):
     """Validate if the session exists and is active."""
-    session = mongo.db.sessions.find_one({"qr_code_uuid": qr_uuid})
+    session = resolve_qr(qr_uuid, active_only=False)
     if not session or not session.get("is_active"):
         return None, "Session is inactive or invalid."
     if session.get("expires_at") and session["expires_at"] < datetime.utcnow():
@@ -0,0 +1,132 @@
+# backend/app/services/audit_log.py
+import atexit
+import queue
+import threading
+import time
+
+from pymongo.errors import BulkWriteError
+
+from backend.app.services.log_partitions import PartitionedLogs
+from backend.app.utils.metrics import registry
+
+registry.counter("audit_records_total", "Audit records by outcome (written, dropped, failed)")
+registry.gauge("audit_queue_depth", "Audit records waiting to be written")
+
+
+class AuditWriter:
+    """
+    Buffers audit records in memory and writes them with `insert_many`.
+
+    A background thread flushes whenever `batch_size` records are waiting or
+    `flush_interval` seconds have passed since the first one arrived. The
+    queue is bounded: when the database falls behind, new records are dropped
+    and counted rather than slowing requests down.
+    """
+
+    def __init__(self, collection_getter, batch_size=200, flush_interval=1.0, max_queue=10000):
+        self._collection = collection_getter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stats = {"written": 0, "dropped": 0, "failed": 0, "batches": 0}
+
+    def submit(self, record):
+        """Queue one record; returns False if it was dropped."""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count("dropped", 1)
+            return False
+        return True
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _count(self, outcome, n):
+        with self._lock:
+            self._stats[outcome] += n
+        registry.inc("audit_records_total", {"outcome": outcome}, n)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            self._write(self._next_batch())
+
+    def _write(self, batch):
+        with self._write_lock:
+            try:
+                self._collection().insert_many(batch, ordered=False)
+                self._count("written", len(batch))
+            except BulkWriteError as e:
+                # Unordered: every record without a write error was inserted
+                written = e.details.get("nInserted", 0)
+                self._count("written", written)
+                self._count("failed", len(batch) - written)
+                print(f"[WARN] could not write {len(batch) - written} of {len(batch)} audit records: {e}")
+            except Exception as e:
+                self._count("failed", len(batch))
+                print(f"[WARN] could not write {len(batch)} audit records: {e}")
+            with self._lock:
+                self._stats["batches"] += 1
+            registry.set("audit_queue_depth", None, self._queue.qsize())
+
+    def flush(self):
+        """Write everything queued right now on the calling thread (shutdown, tests)."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "queued": self._queue.qsize(), "max_queue": self._queue.maxsize}
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer(config=None):
+    """This process's audit writer, built from AUDIT_* settings on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                config = config or {}
+                partitioned = PartitionedLogs()
+                _writer = AuditWriter(
+                    lambda: partitioned,
+                    batch_size=int(config.get("AUDIT_BATCH_SIZE", 200)),
+                    flush_interval=float(config.get("AUDIT_FLUSH_SECONDS", 1.0)),
+                    max_queue=int(config.get("AUDIT_QUEUE_SIZE", 10000)),
+                )
+    return _writer
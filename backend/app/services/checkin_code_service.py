@@ -0,0 +1,140 @@
+# backend/services/checkin_code_service.py
+import hmac
+import hashlib
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from pymongo import ReturnDocument
+
+from backend.app.database import mongo
+from backend.app.services.session_index import SESSION_FIELDS
+
+# Six-digit codes: 10^6 values split into two base-1000 halves for the Feistel rounds
+CODE_SPACE = 10 ** 6
+_HALF = 1000
+_ROUNDS = 4
+
+# Minimum seconds between index rebuilds triggered by unknown codes
+REBUILD_MIN_INTERVAL = 5
+
+
+class AmbiguousCode(Exception):
+    """A typed code is one session's current code and another's previous one."""
+
+
+def _secret():
+    cfg = current_app.config
+    return str(cfg.get("CHECKIN_CODE_SECRET") or cfg.get("JWT_SECRET_KEY", "")).encode("utf-8")
+
+
+def _period():
+    return int(current_app.config.get("CHECKIN_CODE_PERIOD_SECONDS", 30))
+
+
+def current_slot(now=None):
+    """Index of the rotation window containing `now` (epoch seconds)."""
+    return int((time.time() if now is None else now) // _period())
+
+
+def code_for(code_seq, slot, secret=None):
+    """
+    Return the 6-digit code for a session sequence number in a time slot.
+
+    The sequence number is pushed through a keyed Feistel permutation of
+    [0, 10^6) that changes every slot. Because it is a bijection, sessions
+    with distinct sequence numbers never share a code within one slot, and
+    every worker derives the same codes without coordination.
+    """
+    secret = _secret() if secret is None else secret
+    left, right = divmod(int(code_seq) % CODE_SPACE, _HALF)
+    for rnd in range(_ROUNDS):
+        digest = hmac.new(secret, f"{slot}:{rnd}:{right}".encode("ascii"), hashlib.sha256).digest()
+        left, right = right, (left + int.from_bytes(digest[:4], "big")) % _HALF
+    return f"{left * _HALF + right:06d}"
+
+
+def next_code_seq():
+    """Allocate the sequence number a new session uses for its rotating codes."""
+    counter = mongo.db.counters.find_one_and_update(
+        {"_id": "checkin_code_seq"},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return counter["seq"] % CODE_SPACE
+
+
+def ensure_code_seq(session):
+    """Give a session created before short codes existed its own sequence number."""
+    if session.get("code_seq") is None:
+        session["code_seq"] = next_code_seq()
+        mongo.db.sessions.update_one({"_id": session["_id"]}, {"$set": {"code_seq": session["code_seq"]}})
+    return session["code_seq"]
+
+
+def current_code(session):
+    """Return (code, seconds until it rotates) for a session."""
+    now = time.time()
+    period = _period()
+    slot = int(now // period)
+    return code_for(ensure_code_seq(session), slot), int(period - now % period)
+
+
+# ---------------------------------------------------------------------
+# Per-worker index: code -> active session, rebuilt when the slot rotates
+# ---------------------------------------------------------------------
+_index = {"slot": None, "built_at": 0.0, "current": {}, "previous": {}}
+_index_lock = threading.Lock()
+
+
+def _rebuild(slot):
+    secret = _secret()
+    fields = dict(SESSION_FIELDS, code_seq=1)
+    sessions = list(mongo.db.sessions.find({
+        "is_active": True,
+        "expires_at": {"$gt": datetime.utcnow()},
+        "code_seq": {"$exists": True},
+    }, fields))
+
+    # The previous slot's codes stay valid as a grace period. Codes are only
+    # unique within one slot, so the two slots are kept apart.
+    current = {code_for(s["code_seq"], slot, secret): s for s in sessions}
+    previous = {code_for(s["code_seq"], slot - 1, secret): s for s in sessions}
+    _index.update(slot=slot, built_at=time.monotonic(), current=current, previous=previous)
+
+
+def _match(code):
+    current = _index["current"].get(code)
+    previous = _index["previous"].get(code)
+    if current is not None and previous is not None and current["_id"] != previous["_id"]:
+        raise AmbiguousCode(code)
+    return current if current is not None else previous
+
+
+def resolve_code(code):
+    """
+    Resolve a typed 6-digit code to its active session document, or None.
+
+    Lookups are answered from memory; the index only touches MongoDB when
+    the rotation slot changes or (rate-limited) when a code is unknown.
+    Raises AmbiguousCode when the code is one session's current code and
+    another's grace-period code.
+    """
+    slot = current_slot()
+    with _index_lock:
+        if _index["slot"] != slot:
+            _rebuild(slot)
+        session = _match(code)
+        if session is None and time.monotonic() - _index["built_at"] >= REBUILD_MIN_INTERVAL:
+            # Pick up sessions created since the last rebuild
+            _rebuild(slot)
+            session = _match(code)
+    return session
+
+
+def invalidate():
+    """Force the next lookup to rebuild this worker's code index."""
+    with _index_lock:
+        _index["slot"] = None
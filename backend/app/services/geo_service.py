@@ -1,6 +1,8 @@
 # backend/services/geo_service.py
 from geopy.distance import geodesic
 
+from backend.app.utils import tracing
+
 def is_within_radius(student_location, session_location, radius_meters=100):
     """
     Check if a student's current location is within a certain radius (default 100m)
@@ -20,7 +22,8 @@ def is_within_radius(student_location, session_location, radius_meters=100):
     try:
         student_coords = (student_location["lat"], student_location["lng"])
         session_coords = (session_location["lat"], session_location["lng"])
-        distance = geodesic(student_coords, session_coords).meters
+        with tracing.span("geo.geodesic"):
+            distance = geodesic(student_coords, session_coords).meters
         return distance <= radius_meters
     except Exception:
         return False
@@ -0,0 +1,154 @@
+# backend/app/services/log_partitions.py
+import re
+import threading
+from datetime import datetime
+
+from backend.app.database import mongo
+from backend.app.utils.cache import TTLCache
+from backend.app.utils.pagination import with_keyset, finish_page
+
+# System logs are written to one collection per calendar month (UTC),
+# `system_logs_YYYY_MM`, keyed on `created_at`. Partitions never overlap in
+# time, so a newest-first query is answered by walking the partitions that
+# overlap its date range newest-first and concatenating. The original
+# `system_logs` collection is read as the oldest partition, since everything
+# in it predates partitioning.
+LEGACY_COLLECTION = "system_logs"
+PARTITION_PREFIX = "system_logs_"
+_PARTITION_RE = re.compile(r"^system_logs_(\d{4})_(\d{2})$")
+
+_names = TTLCache(maxsize=1, ttl=30)
+_indexed = set()
+_lock = threading.Lock()
+
+
+def partition_name(when):
+    return f"{PARTITION_PREFIX}{when.year:04d}_{when.month:02d}"
+
+
+def partition_month(name):
+    """(year, month) of a partition name, or None for other collections."""
+    match = _PARTITION_RE.match(name)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def partition_bounds(name):
+    """[start, end) datetimes covered by a partition."""
+    year, month = partition_month(name)
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+def _collection_names():
+    names = _names.get("names")
+    if names is None:
+        names = set(mongo.db.list_collection_names())
+        _names.set("names", names)
+    return names
+
+
+def forget_partitions():
+    """Re-list collections on next use (after creating or dropping partitions)."""
+    _names.clear()
+
+
+def partitions(newest_first=True):
+    """Existing monthly partitions."""
+    found = [n for n in _collection_names() if partition_month(n)]
+    return sorted(found, key=partition_month, reverse=newest_first)
+
+
+def collections_for_range(start=None, end=None, newest_first=True):
+    """
+    Collections that can hold entries created in [start, end], in time order,
+    with the legacy collection (if present) as the oldest.
+    """
+    names = []
+    for name in partitions(newest_first=True):
+        p_start, p_end = partition_bounds(name)
+        if (start is None or p_end > start) and (end is None or p_start <= end):
+            names.append(name)
+    if LEGACY_COLLECTION in _collection_names():
+        names.append(LEGACY_COLLECTION)
+    return names if newest_first else names[::-1]
+
+
+def ensure_partition_indexes(name):
+    if name in _indexed:
+        return
+    col = mongo.db[name]
+    # (sort key, _id) so keyset pages are pure index range scans
+    col.create_index([("created_at", -1), ("_id", -1)])
+    col.create_index([("timestamp", -1), ("_id", -1)])
+    col.create_index([("level", 1), ("created_at", 1)])
+    with _lock:
+        _indexed.add(name)
+
+
+class PartitionedLogs:
+    """`insert_many` target that spreads log records over their monthly partitions."""
+
+    def insert_many(self, docs, ordered=False):
+        by_partition = {}
+        for doc in docs:
+            when = doc.get("created_at") or doc.get("timestamp") or datetime.utcnow()
+            by_partition.setdefault(partition_name(when), []).append(doc)
+        for name, batch in by_partition.items():
+            if name not in _collection_names():
+                ensure_partition_indexes(name)
+                forget_partitions()
+            mongo.db[name].insert_many(batch, ordered=ordered)
+
+
+def find_page(query, sort_field="created_at", limit=50, after=None, start=None, end=None):
+    """
+    One newest-first keyset page of matching logs across the partitions
+    overlapping [start, end]. `after` is the decoded cursor (sort value, _id);
+    partitions newer than it are not touched at all. Returns (docs, next_cursor).
+    """
+    if after is not None and after[0] is not None:
+        end = after[0] if end is None else min(end, after[0])
+    bounded = with_keyset(query, sort_field, -1, after)
+    docs = []
+    for name in collections_for_range(start, end):
+        need = limit + 1 - len(docs)
+        if need <= 0:
+            break
+        docs.extend(mongo.db[name].find(bounded).sort([(sort_field, -1), ("_id", -1)]).limit(need))
+    return finish_page(docs, sort_field, limit)
+
+
+def count(query, start=None, end=None, exact=False):
+    """Matching entries (exact) or the size of the routed partitions (metadata only)."""
+    names = collections_for_range(start, end)
+    if exact:
+        return sum(mongo.db[n].count_documents(query) for n in names)
+    return sum(mongo.db[n].estimated_document_count() for n in names)
+
+
+def distinct(field, query=None):
+    values = set()
+    for name in collections_for_range():
+        values.update(v for v in mongo.db[name].distinct(field, query or {}) if v is not None)
+    return sorted(values, key=str)
+
+
+def drop_partitions_before(cutoff, archive=None):
+    """
+    Drop whole partitions that end on or before `cutoff`, calling
+    `archive(name, collection)` first when given. Returns the dropped names.
+    """
+    dropped = []
+    for name in partitions(newest_first=False):
+        if partition_bounds(name)[1] > cutoff:
+            break
+        if archive:
+            archive(name, mongo.db[name])
+        mongo.db.drop_collection(name)
+        with _lock:
+            _indexed.discard(name)
+        dropped.append(name)
+    if dropped:
+        forget_partitions()
+    return dropped
@@ -0,0 +1,184 @@
+# backend/app/services/log_retention.py
+import gzip
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from bson import json_util
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from backend.app.database import mongo
+from backend.app.services import log_partitions
+
+# Entries older than their level's retention are archived to gzipped JSON
+# lines (one gzip member appended per batch, so files stay valid however
+# often they are appended to) and then deleted in batches. Monthly
+# partitions past the longest retention are archived whole and dropped. A
+# TTL index cannot archive first, hence the periodic job. One worker per
+# deployment runs it at a time, under a lease in the `locks` collection.
+DEFAULT_RETENTION_DAYS = {"info": 30, "warning": 90, "error": 365, "default": 30}
+_LOCK_ID = "log_retention"
+
+_state = {"worker": None, "indexed": False, "last_run": None}
+_lock = threading.Lock()
+
+
+def _collection():
+    return mongo.db[log_partitions.LEGACY_COLLECTION]
+
+
+def parse_retention(spec):
+    """'info=30,warning=90' -> {level: days}, on top of the defaults."""
+    days = dict(DEFAULT_RETENTION_DAYS)
+    for part in (spec or "").split(","):
+        level, _, value = part.partition("=")
+        if level.strip() and value.strip():
+            days[level.strip().lower()] = int(value)
+    return days
+
+
+def ensure_indexes():
+    if _state["indexed"]:
+        return
+    col = _collection()
+    col.create_index([("level", 1), ("created_at", 1)])
+    col.create_index([("created_at", -1), ("_id", -1)])
+    col.create_index([("timestamp", -1), ("_id", -1)])
+    _state["indexed"] = True
+
+
+def older_than(cutoff):
+    """Entries written before `cutoff`."""
+    # Audit records carry both fields; older entries may only have `timestamp`
+    return {"$or": [
+        {"created_at": {"$lt": cutoff}},
+        {"created_at": {"$exists": False}, "timestamp": {"$lt": cutoff}},
+    ]}
+
+
+def retention_filters(retention, now=None):
+    """One (level, filter) per retention rule; `default` covers every other level."""
+    now = now or datetime.utcnow()
+    named = [lvl for lvl in retention if lvl != "default"]
+    filters = []
+    for level, days in retention.items():
+        level_filter = {"level": {"$nin": named}} if level == "default" else {"level": level}
+        filters.append((level, {**level_filter, **older_than(now - timedelta(days=days))}))
+    return filters
+
+
+def archive_path(archive_dir, now=None):
+    return os.path.join(archive_dir, f"system_logs_{(now or datetime.utcnow()):%Y-%m-%d}.jsonl.gz")
+
+
+def _archive(docs, archive_dir):
+    os.makedirs(archive_dir, exist_ok=True)
+    with gzip.open(archive_path(archive_dir), "at", encoding="utf-8") as f:
+        for doc in docs:
+            f.write(json_util.dumps(doc) + "\n")
+
+
+def delete_in_batches(query, batch_size=1000, archive_dir=None, max_batches=None, before=None):
+    """
+    Delete matching entries `batch_size` at a time from every log collection
+    (only those that can hold entries older than `before`, if given),
+    archiving each batch first when `archive_dir` is set. Returns the number deleted.
+    """
+    deleted = 0
+    for name in log_partitions.collections_for_range(end=before, newest_first=False):
+        deleted += _delete_from(mongo.db[name], query, batch_size, archive_dir, max_batches)
+    return deleted
+
+
+def _delete_from(col, query, batch_size, archive_dir, max_batches):
+    deleted, batches = 0, 0
+    while max_batches is None or batches < max_batches:
+        if archive_dir:
+            docs = list(col.find(query).sort("_id", 1).limit(batch_size))
+            ids = [d["_id"] for d in docs]
+        else:
+            ids = [d["_id"] for d in col.find(query, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+        if not ids:
+            break
+        if archive_dir:
+            _archive(docs, archive_dir)
+        deleted += col.delete_many({"_id": {"$in": ids}}).deleted_count
+        batches += 1
+    return deleted
+
+
+def _archive_partition(archive_dir):
+    def archive(name, col):
+        os.makedirs(archive_dir, exist_ok=True)
+        with gzip.open(os.path.join(archive_dir, f"{name}.jsonl.gz"), "at", encoding="utf-8") as f:
+            for doc in col.find().sort("_id", 1):
+                f.write(json_util.dumps(doc) + "\n")
+    return archive if archive_dir else None
+
+
+def apply_retention(retention, archive_dir, batch_size=1000, max_batches=None, now=None):
+    """
+    Drop partitions past the longest retention, then archive and delete
+    expired entries per level. Returns {level: deleted, "dropped_partitions": [...]}.
+    """
+    if log_partitions.LEGACY_COLLECTION in mongo.db.list_collection_names():
+        ensure_indexes()
+    now = now or datetime.utcnow()
+    started = time.monotonic()
+    longest = now - timedelta(days=max(retention.values()))
+    dropped = log_partitions.drop_partitions_before(longest, archive=_archive_partition(archive_dir))
+    result = {}
+    for level, query in retention_filters(retention, now=now):
+        cutoff = now - timedelta(days=retention[level])
+        result[level] = delete_in_batches(query, batch_size, archive_dir, max_batches, before=cutoff)
+    result["dropped_partitions"] = dropped
+    _state["last_run"] = {
+        "at": datetime.utcnow().isoformat(),
+        "deleted": result,
+        "seconds": round(time.monotonic() - started, 2),
+    }
+    return result
+
+
+def _acquire_lease(seconds):
+    now = datetime.utcnow()
+    try:
+        doc = mongo.db.locks.find_one_and_update(
+            {"_id": _LOCK_ID, "$or": [{"lease_until": {"$lt": now}}, {"lease_until": {"$exists": False}}]},
+            {"$set": {"lease_until": now + timedelta(seconds=seconds), "owner": os.getpid()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        return False  # another worker holds the lease
+    return bool(doc)
+
+
+def _run_forever(config):
+    interval = float(config.get("LOG_RETENTION_INTERVAL_SECONDS", 3600))
+    retention = parse_retention(config.get("LOG_RETENTION_DAYS"))
+    while True:
+        time.sleep(interval)
+        try:
+            if _acquire_lease(interval * 0.9):
+                apply_retention(retention, config.get("LOG_ARCHIVE_DIR"),
+                                batch_size=int(config.get("LOG_RETENTION_BATCH_SIZE", 1000)))
+        except Exception as e:
+            print(f"[WARN] log retention run failed: {e}")
+
+
+def start_retention_worker(app):
+    """Run retention every LOG_RETENTION_INTERVAL_SECONDS in a daemon thread (once per process)."""
+    with _lock:
+        if _state["worker"] is None:
+            _state["worker"] = threading.Thread(
+                target=_run_forever, args=(dict(app.config),), name="log-retention", daemon=True
+            )
+            _state["worker"].start()
+    return _state["worker"]
+
+
+def last_run():
+    return _state["last_run"]
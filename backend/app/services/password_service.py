@@ -0,0 +1,177 @@
+# backend/services/password_service.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+from flask import current_app
+from werkzeug.security import check_password_hash
+
+from backend.app.utils import tracing
+
+# Prefixes of hashes produced by bcrypt and by Werkzeug's generate_password_hash
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+WERKZEUG_PREFIXES = ("pbkdf2:", "scrypt:")
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+
+class _HashPool:
+    """
+    Bounded executor for password hashing.
+
+    bcrypt releases the GIL, so a few threads give real parallelism while
+    capping how many request threads can be tied up hashing at once. Work
+    beyond `max_queue` pending jobs is rejected instead of piling up.
+    """
+
+    def __init__(self, workers, max_queue, timeout):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._stats = {"completed": 0, "rejected": 0, "timeouts": 0,
+                       "wait_ms_total": 0.0, "run_ms_total": 0.0, "wait_ms_max": 0.0}
+
+    def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_queue + self.workers:
+                self._stats["rejected"] += 1
+                raise PasswordServiceBusy("Password hashing queue is full")
+            self._pending += 1
+        queued_at = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+            try:
+                with tracing.span(f"password.{fn.__name__}", wait_ms=round((started - queued_at) * 1000, 2)):
+                    return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+                    wait_ms = (started - queued_at) * 1000
+                    self._stats["completed"] += 1
+                    self._stats["wait_ms_total"] += wait_ms
+                    self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], wait_ms)
+                    self._stats["run_ms_total"] += (finished - started) * 1000
+
+        future = self._executor.submit(tracing.bind(job))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Drop the job if it is still queued, so it doesn't burn CPU for a
+            # caller that has already given up; a started job runs to the end
+            cancelled = future.cancel()
+            with self._lock:
+                self._stats["timeouts"] += 1
+                if cancelled:
+                    self._pending -= 1
+            raise PasswordServiceBusy("Password hashing timed out")
+
+    def stats(self):
+        with self._lock:
+            done = self._stats["completed"] or 1
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self._stats["completed"],
+                "rejected": self._stats["rejected"],
+                "timeouts": self._stats["timeouts"],
+                "avg_wait_ms": round(self._stats["wait_ms_total"] / done, 2),
+                "max_wait_ms": round(self._stats["wait_ms_max"], 2),
+                "avg_hash_ms": round(self._stats["run_ms_total"] / done, 2),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                cfg = current_app.config
+                _pool = _HashPool(
+                    workers=int(cfg.get("PASSWORD_HASH_WORKERS", 4)),
+                    max_queue=int(cfg.get("PASSWORD_HASH_MAX_QUEUE", 64)),
+                    timeout=float(cfg.get("PASSWORD_HASH_TIMEOUT_SECONDS", 10)),
+                )
+    return _pool
+
+
+def _rounds():
+    return int(current_app.config.get("PASSWORD_BCRYPT_ROUNDS", 12))
+
+
+def _bcrypt_hash(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _check(password, hashed):
+    if hashed.startswith(BCRYPT_PREFIXES):
+        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+    if hashed.startswith(WERKZEUG_PREFIXES):
+        # Users created through the admin panel before hashing was unified
+        return check_password_hash(hashed, password)
+    return False
+
+
+def bcrypt_cost(hashed):
+    """Cost factor encoded in a bcrypt hash, or None for other formats."""
+    if isinstance(hashed, str) and hashed.startswith(BCRYPT_PREFIXES):
+        try:
+            return int(hashed.split("$")[2])
+        except (IndexError, ValueError):
+            return None
+    return None
+
+
+def needs_rehash(hashed, rounds=None):
+    """True if a stored hash is not bcrypt at the configured cost."""
+    return bcrypt_cost(hashed) != (rounds or _rounds())
+
+
+# ======================= Public API =======================
+def hash_password(password):
+    """Hash a password with bcrypt at the configured cost, on the hashing pool."""
+    return _get_pool().run(_bcrypt_hash, password, _rounds())
+
+
+def verify_password(password, hashed):
+    """Check a password against a bcrypt or legacy Werkzeug hash, on the hashing pool."""
+    if not password or not isinstance(hashed, str) or not hashed:
+        return False
+    return _get_pool().run(_check, password, hashed)
+
+
+def verify_and_upgrade(password, hashed):
+    """
+    Verify a password and, when it matches a legacy or outdated-cost hash,
+    compute its replacement. Returns (ok, new_hash_or_None).
+    """
+    if not verify_password(password, hashed):
+        return False, None
+    if needs_rehash(hashed):
+        try:
+            return True, hash_password(password)
+        except PasswordServiceBusy:
+            # The login itself succeeded; upgrade on a quieter attempt
+            return True, None
+    return True, None
+
+
+def stats():
+    return _get_pool().stats()
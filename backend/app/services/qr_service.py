@@ -4,6 +4,29 @@ import io
 import base64
 import uuid
 import os
+import re
+import secrets
+from bson import ObjectId
+
+from backend.app.utils import tracing
+
+# Compact payloads use base36 uppercase so the QR encoder can pick alphanumeric
+# mode (5.5 bits/char) instead of byte mode, keeping codes at version 2 or below.
+COMPACT_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+COMPACT_CODE_LENGTH = 6
+_COMPACT_TOKEN_RE = re.compile(r"^([0-9A-Z]{1,19})\.([0-9A-Z]{%d})$" % COMPACT_CODE_LENGTH)
+
+@tracing.traced("qr.render")
+def render_qr_png(data: str) -> bytes:
+    """
+    Render a QR code for `data` and return the raw PNG bytes.
+
+    Kept free of Flask/Mongo state so it can run inside worker processes.
+    """
+    qr_img = qrcode.make(data)
+    buffer = io.BytesIO()
+    qr_img.save(buffer, format="PNG")
+    return buffer.getvalue()
 
 def generate_qr_code(data: str):
     """
@@ -15,15 +38,65 @@ def generate_qr_code(data: str):
     qr_uuid = str(uuid.uuid4())
     qr_data = f"{data}/{qr_uuid}"
 
-    qr_img = qrcode.make(qr_data)
-    buffer = io.BytesIO()
-    qr_img.save(buffer, format="PNG")
-
     return {
         "uuid": qr_uuid,
-        "qr_code_base64": base64.b64encode(buffer.getvalue()).decode("utf-8")
+        "qr_code_base64": base64.b64encode(render_qr_png(qr_data)).decode("utf-8")
     }
 
 def get_qr_base_url():
     """Return the base URL for QR scan endpoints."""
     return os.getenv("QR_BASE_URL", "http://localhost:5000/api/attendance/scan")
+
+def encode_session_key(session_id) -> str:
+    """Encode a session ObjectId as a base36 key (at most 19 characters)."""
+    n = int.from_bytes(ObjectId(session_id).binary, "big")
+    out = []
+    while True:
+        n, rem = divmod(n, 36)
+        out.append(COMPACT_ALPHABET[rem])
+        if not n:
+            break
+    return "".join(reversed(out))
+
+def decode_session_key(key: str):
+    """Return the ObjectId for a base36 session key, or None if it is not valid."""
+    try:
+        n = int(key, 36)
+        return ObjectId(n.to_bytes(12, "big"))
+    except (ValueError, OverflowError):
+        return None
+
+def make_compact_token(session_id) -> str:
+    """Build a `<session key>.<rotating code>` token for a session."""
+    code = "".join(secrets.choice(COMPACT_ALPHABET) for _ in range(COMPACT_CODE_LENGTH))
+    return f"{encode_session_key(session_id)}.{code}"
+
+def parse_compact_token(token: str):
+    """
+    Split a compact token into (session ObjectId, token).
+
+    Returns (None, None) for anything else, e.g. legacy uuid4 tokens.
+    """
+    match = _COMPACT_TOKEN_RE.match((token or "").strip().upper())
+    if not match:
+        return None, None
+    session_id = decode_session_key(match.group(1))
+    if session_id is None:
+        return None, None
+    return session_id, match.group(0)
+
+def build_qr_payload(token: str) -> str:
+    """
+    Return the string encoded into a session's QR image.
+
+    Payloads are URLs: compact tokens use QR_COMPACT_BASE_URL (ideally short
+    and uppercase) when set, otherwise QR_BASE_URL like legacy uuid tokens.
+    Bare compact tokens, the densest QR, are opt-in with QR_BARE_TOKENS=1 for
+    deployments whose scanner app accepts them.
+    """
+    qr_base_url = os.getenv("QR_BASE_URL", "http://localhost:5000/api/students/scan")
+    if parse_compact_token(token)[0] is not None:
+        if os.getenv("QR_BARE_TOKENS", "0") == "1":
+            return token
+        qr_base_url = os.getenv("QR_COMPACT_BASE_URL") or qr_base_url
+    return f"{qr_base_url.rstrip('/')}/{token}"
@@ -0,0 +1,146 @@
+# backend/services/qr_sheet_service.py
+import os
+import io
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from PIL import Image, ImageDraw, ImageFont
+
+from backend.app.database import mongo
+from backend.app.services.qr_service import render_qr_png
+from backend.app.utils import tracing
+
+# A4 portrait at 150 dpi
+PAGE_SIZE = (1240, 1754)
+PAGE_DPI = 150
+PAGE_MARGIN = 60
+CAPTION_HEIGHT = 90
+
+# Don't write progress to Mongo more often than every N rendered codes
+PROGRESS_STEP = 25
+
+
+@tracing.traced("qr.render_batch")
+def render_qr_batch(payloads, workers=2, on_progress=None):
+    """
+    Render PNG bytes for every payload using a process pool.
+
+    Each distinct payload is rendered once; the returned dict maps
+    payload -> PNG bytes. `on_progress(done, total)` is called as
+    results come back.
+    """
+    unique = list(dict.fromkeys(payloads))
+    total = len(unique)
+    rendered = {}
+    if not total:
+        return rendered
+
+    # "spawn" avoids forking a process that holds open MongoClient sockets/threads
+    ctx = multiprocessing.get_context("spawn")
+    chunksize = max(1, total // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        for i, png in enumerate(pool.map(render_qr_png, unique, chunksize=chunksize), start=1):
+            rendered[unique[i - 1]] = png
+            if on_progress and (i % PROGRESS_STEP == 0 or i == total):
+                on_progress(i, total)
+    return rendered
+
+
+def _load_font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Older Pillow without scalable default font
+        return ImageFont.load_default()
+
+
+@tracing.traced("qr.compose_pdf")
+def compose_pdf(items, path, columns=2, rows=3):
+    """
+    Lay out QR images on A4 pages and save them as one multi-page PDF.
+
+    Args:
+        items (list): [(png_bytes, [caption_line, ...]), ...]
+        path (str): Output file path.
+        columns (int), rows (int): Grid of codes per page.
+    """
+    width, height = PAGE_SIZE
+    cell_w = (width - 2 * PAGE_MARGIN) // columns
+    cell_h = (height - 2 * PAGE_MARGIN) // rows
+    qr_side = max(10, min(cell_w, cell_h - CAPTION_HEIGHT) - 20)
+    font = _load_font(24)
+
+    decoded = {}
+    pages = []
+    per_page = columns * rows
+    for start in range(0, len(items), per_page):
+        page = Image.new("RGB", PAGE_SIZE, "white")
+        draw = ImageDraw.Draw(page)
+        for slot, (png, caption) in enumerate(items[start:start + per_page]):
+            if png not in decoded:
+                img = Image.open(io.BytesIO(png)).convert("RGB")
+                decoded[png] = img.resize((qr_side, qr_side), Image.NEAREST)
+            col, row = slot % columns, slot // columns
+            x = PAGE_MARGIN + col * cell_w
+            y = PAGE_MARGIN + row * cell_h
+            page.paste(decoded[png], (x + (cell_w - qr_side) // 2, y))
+            text_y = y + qr_side + 8
+            for line in caption:
+                draw.text((x + 10, text_y), str(line), fill="black", font=font)
+                text_y += 28
+        pages.append(page)
+
+    if not pages:
+        raise ValueError("No QR codes to place on the sheet")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pages[0].save(path, "PDF", save_all=True, append_images=pages[1:], resolution=PAGE_DPI)
+    return path
+
+
+def _run_sheet_job(app, job_id, entries, columns, rows):
+    with app.app_context(), tracing.span("qr_sheet.job", category="job", job_id=str(job_id)):
+        jobs = mongo.db.qr_sheet_jobs
+        try:
+            jobs.update_one({"_id": job_id}, {"$set": {"status": "processing", "started_at": datetime.utcnow()}})
+
+            def progress(done, total):
+                jobs.update_one({"_id": job_id}, {"$set": {"progress.rendered": done, "progress.unique_codes": total}})
+
+            rendered = render_qr_batch(
+                [payload for payload, _ in entries],
+                workers=app.config.get("QR_SHEET_WORKERS", 2),
+                on_progress=progress,
+            )
+            items = [(rendered[payload], caption) for payload, caption in entries]
+            path = os.path.join(app.config["QR_SHEET_DIR"], f"qr_sheet_{job_id}.pdf")
+            compose_pdf(items, path, columns=columns, rows=rows)
+
+            jobs.update_one({"_id": job_id}, {"$set": {
+                "status": "completed",
+                "file_path": path,
+                "pages": -(-len(items) // (columns * rows)),
+                "completed_at": datetime.utcnow(),
+            }})
+        except Exception as e:
+            traceback.print_exc()
+            jobs.update_one({"_id": job_id}, {"$set": {"status": "failed", "error": str(e), "completed_at": datetime.utcnow()}})
+
+
+def start_qr_sheet_job(app, job_id, entries, columns=2, rows=3):
+    """
+    Render `entries` ([(payload, caption_lines), ...]) into a PDF in the background.
+
+    Progress and the final file path are written to the `qr_sheet_jobs` document `job_id`.
+    """
+    thread = threading.Thread(
+        target=tracing.bind(_run_sheet_job),
+        args=(app, job_id, entries, columns, rows),
+        name=f"qr-sheet-{job_id}",
+        daemon=True,
+    )
+    thread.start()
+    return thread
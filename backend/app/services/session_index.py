@@ -0,0 +1,83 @@
+# backend/services/session_index.py
+import os
+from datetime import datetime
+from bson import ObjectId
+
+from backend.app.database import mongo
+from backend.app.services.qr_service import parse_compact_token
+from backend.app.utils.cache import TTLCache
+
+# Fields needed to validate a check-in; keeps cached documents small.
+SESSION_FIELDS = {
+    "course_id": 1, "qr_code_uuid": 1, "is_active": 1,
+    "expires_at": 1, "location": 1, "session_date": 1,
+}
+
+# Fields any session writer may change; re-read before a scan is accepted.
+LIVE_FIELDS = {"qr_code_uuid": 1, "is_active": 1, "expires_at": 1}
+
+# Per-worker cache of session documents keyed by _id. Writes made by this
+# worker invalidate their entry; the fields a scan is accepted on are always
+# confirmed against MongoDB, so closes and rotations made by other workers
+# take effect immediately.
+_sessions = TTLCache(
+    maxsize=int(os.getenv("SESSION_INDEX_MAX_ENTRIES", 5000)),
+    ttl=float(os.getenv("SESSION_INDEX_TTL_SECONDS", 15)),
+)
+
+
+def _load(session_id):
+    doc = mongo.db.sessions.find_one({"_id": session_id}, SESSION_FIELDS)
+    if doc:
+        _sessions.set(session_id, doc)
+    return doc
+
+
+def get_session(session_id, refresh=False):
+    """Return the (cached) session document for `session_id`, or None."""
+    session_id = ObjectId(session_id)
+    doc = None if refresh else _sessions.get(session_id)
+    return doc if doc is not None else _load(session_id)
+
+
+def invalidate(session_id):
+    """Drop a session from this worker's index after it was modified."""
+    _sessions.pop(ObjectId(session_id))
+
+
+def resolve_qr(qr_data, active_only=True):
+    """
+    Resolve scanned QR data to its session document.
+
+    Compact `<key>.<code>` tokens are answered from the in-memory index by
+    session _id. A cached entry that would accept the scan has its live fields
+    (token, active flag, expiry) confirmed with a small projected read; one
+    that would reject it is re-read in full, so rotations, closes and
+    extensions from other workers are honoured. Legacy uuid payloads fall
+    back to a query on `qr_code_uuid`.
+    """
+    token = qr_data.split("/")[-1] if "/" in qr_data else qr_data
+    session_id, token = parse_compact_token(token) if token else (None, None)
+
+    if session_id is None:
+        query = {"qr_code_uuid": qr_data.split("/")[-1]}
+        if active_only:
+            query["is_active"] = True
+        return mongo.db.sessions.find_one(query)
+
+    def matches(doc):
+        return bool(doc) and doc.get("qr_code_uuid") == token and (doc.get("is_active") or not active_only)
+
+    session = get_session(session_id)
+    expires_at = (session or {}).get("expires_at")
+    if not matches(session) or (expires_at and expires_at < datetime.utcnow()):
+        session = get_session(session_id, refresh=True)
+    else:
+        live = mongo.db.sessions.find_one({"_id": session_id}, LIVE_FIELDS)
+        if live is None:
+            invalidate(session_id)
+            return None
+        if any(session.get(k) != live.get(k) for k in LIVE_FIELDS):
+            session = {**session, **live}
+            _sessions.set(session_id, session)
+    return session if matches(session) else None
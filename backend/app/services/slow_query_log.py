@@ -0,0 +1,166 @@
+# backend/app/services/slow_query_log.py
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from pymongo.errors import CollectionInvalid
+
+from backend.app.database import mongo
+
+# Slow MongoDB commands are queued by the command listener and written by a
+# background thread to a capped collection, so neither the insert nor the
+# sampled `explain` ever runs on the request thread (or inside the listener).
+COLLECTION = "slow_queries"
+CAPPED_BYTES = 16 * 1024 * 1024
+
+# An explain per shape at most this often, however many slow samples arrive
+EXPLAIN_COOLDOWN_SECONDS = 300
+
+_EXPLAINABLE = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+# Session, transaction and routing fields the driver adds; explain rejects or ignores them
+_DRIVER_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+_queue = queue.Queue(maxsize=1000)
+_state = {"worker": None, "ready": False, "dropped": 0, "explained_at": {}}
+_lock = threading.Lock()
+
+
+def explain_command(command_name, command):
+    """The `explain` command for a captured command, or None if it cannot be explained."""
+    if command_name not in _EXPLAINABLE:
+        return None
+    inner = {k: v for k, v in command.items() if not k.startswith("$") and k not in _DRIVER_FIELDS}
+    return {"explain": inner, "verbosity": "queryPlanner"}
+
+
+def _find_query_planner(value, depth=0):
+    if depth > 6:
+        return None
+    if isinstance(value, dict):
+        if "queryPlanner" in value:
+            return value["queryPlanner"]
+        children = value.values()
+    elif isinstance(value, list):
+        children = value
+    else:
+        return None
+    for child in children:
+        found = _find_query_planner(child, depth + 1)
+        if found:
+            return found
+    return None
+
+
+def summarize_plan(explain):
+    """Winning plan as a list of stages (with index names) plus rejected plan count."""
+    planner = _find_query_planner(explain) or {}
+    stages, indexes = [], []
+    node = planner.get("winningPlan") or {}
+    while isinstance(node, dict) and node:
+        node = node.get("queryPlan", node)  # SBE wraps the classic tree
+        if node.get("stage"):
+            stages.append(node["stage"])
+        if node.get("indexName"):
+            indexes.append(node["indexName"])
+        child = node.get("inputStage")
+        if child is None and node.get("inputStages"):
+            child = node["inputStages"][0]
+        node = child
+    return {
+        "namespace": planner.get("namespace"),
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "rejected_plans": len(planner.get("rejectedPlans") or []),
+    }
+
+
+def _collection():
+    if not _state["ready"]:
+        try:
+            mongo.db.create_collection(COLLECTION, capped=True, size=CAPPED_BYTES)
+        except CollectionInvalid:
+            pass  # already exists
+        _state["ready"] = True
+    return mongo.db[COLLECTION]
+
+
+def _explain(entry, command):
+    shape = entry["shape"]
+    now = time.monotonic()
+    if now - _state["explained_at"].get(shape, -EXPLAIN_COOLDOWN_SECONDS) < EXPLAIN_COOLDOWN_SECONDS:
+        return
+    explain = explain_command(entry["command"], command)
+    if explain is None:
+        return
+    _state["explained_at"][shape] = now
+    try:
+        entry["explain"] = summarize_plan(mongo.db.command(explain))
+    except Exception as e:
+        entry["explain"] = {"error": str(e)}
+
+
+def _worker():
+    while True:
+        entry, command = _queue.get()
+        try:
+            if command is not None:
+                _explain(entry, command)
+            _collection().insert_one(entry)
+        except Exception as e:
+            print(f"[WARN] could not record slow query: {e}")
+
+
+def record(entry, command=None):
+    """
+    Queue a slow command for the log. Pass the original `command` to have it
+    explained; entries are dropped (and counted) if the writer falls behind.
+    """
+    if _state["worker"] is None:
+        with _lock:
+            if _state["worker"] is None:
+                _state["worker"] = threading.Thread(target=_worker, name="slow-query-log", daemon=True)
+                _state["worker"].start()
+    entry.setdefault("ts", datetime.utcnow())
+    try:
+        _queue.put_nowait((entry, command))
+    except queue.Full:
+        _state["dropped"] += 1
+
+
+def top_offenders(limit=20, hours=24):
+    """Query shapes ranked by total time spent in slow executions."""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    pipeline = [
+        {"$match": {"ts": {"$gte": since}}},
+        {"$sort": {"ts": 1}},
+        {"$group": {
+            "_id": "$shape",
+            "command": {"$last": "$command"},
+            "collection": {"$last": "$collection"},
+            "count": {"$sum": 1},
+            "total_ms": {"$sum": "$duration_ms"},
+            "max_ms": {"$max": "$duration_ms"},
+            "routes": {"$addToSet": "$route"},
+            "last_seen": {"$last": "$ts"},
+            "explains": {"$push": "$explain"},
+        }},
+        {"$sort": {"total_ms": -1}},
+        {"$limit": limit},
+    ]
+    offenders = []
+    for doc in _collection().aggregate(pipeline):
+        explains = [e for e in doc.pop("explains") if e]
+        doc["shape"] = doc.pop("_id")
+        doc["avg_ms"] = round(doc["total_ms"] / doc["count"], 2)
+        doc["total_ms"] = round(doc["total_ms"], 2)
+        doc["routes"] = sorted(r for r in doc["routes"] if r)
+        doc["last_seen"] = doc["last_seen"].isoformat() if doc.get("last_seen") else None
+        doc["explain"] = explains[-1] if explains else None
+        offenders.append(doc)
+    return offenders
+
+
+def stats():
+    return {"queued": _queue.qsize(), "dropped": _state["dropped"]}
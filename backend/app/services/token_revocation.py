@@ -0,0 +1,157 @@
+# backend/services/token_revocation.py
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+
+from backend.app.database import mongo
+
+# Revoked JWTs live in `revoked_tokens` (keyed by jti) until their own expiry,
+# when a TTL index removes them. Every revocation bumps a version counter;
+# workers keep the revoked jtis in memory and re-read only when it changes.
+_COUNTER_ID = "token_revocation_seq"
+
+POLL_SECONDS = float(os.getenv("TOKEN_REVOCATION_POLL_SECONDS", 2))
+
+# Revocations allocate their seq before inserting, so concurrent ones can land
+# out of order. Re-reading a few seqs below the high-water mark catches those.
+_SEQ_OVERLAP = 64
+
+# After a failed refresh, wait POLL_SECONDS * 2**failures (capped) before the next
+RETRY_MAX_SECONDS = float(os.getenv("TOKEN_REVOCATION_RETRY_MAX_SECONDS", 30))
+# How long a request waits for another thread's first load before answering
+READY_WAIT_SECONDS = 2.0
+
+_state = {"ready": False, "seq": 0, "next_poll": 0.0, "refreshing": False, "failures": 0, "jtis": {}}
+# Guards `_state` only; MongoDB is never read while it is held
+_lock = threading.Lock()
+_loaded = threading.Event()
+
+
+def _collection():
+    return mongo.db.revoked_tokens
+
+
+def _expiry(exp):
+    if exp is None:
+        # Non-expiring token: keep the entry for as long as a refresh token lives
+        return datetime.utcnow() + timedelta(days=30)
+    if isinstance(exp, datetime):
+        return exp
+    return datetime.fromtimestamp(int(exp), tz=timezone.utc).replace(tzinfo=None)
+
+
+def _current_version():
+    doc = mongo.db.counters.find_one({"_id": _COUNTER_ID}, {"seq": 1}) or {}
+    return doc.get("seq", 0)
+
+
+def _load(since_seq=None):
+    query = {"expires_at": {"$gt": datetime.utcnow()}}
+    if since_seq is not None:
+        query["seq"] = {"$gt": since_seq}
+    return {doc["_id"]: doc["expires_at"] for doc in _collection().find(query, {"expires_at": 1, "seq": 1})}
+
+
+def _prune():
+    now = datetime.utcnow()
+    expired = [jti for jti, exp in _state["jtis"].items() if exp <= now]
+    for jti in expired:
+        del _state["jtis"][jti]
+
+
+def _refresh():
+    """Read revocations since the last refresh (outside `_lock`) and merge them in."""
+    with _lock:
+        ready, seq = _state["ready"], _state["seq"]
+    if not ready:
+        _collection().create_index("expires_at", expireAfterSeconds=0)
+        _collection().create_index("seq")
+        version = _current_version()
+        loaded = _load()
+    else:
+        version = _current_version()
+        loaded = _load(since_seq=seq - _SEQ_OVERLAP) if version != seq else {}
+    with _lock:
+        _state["jtis"].update(loaded)
+        _prune()
+        _state.update(ready=True, seq=version)
+
+
+def _claim_refresh():
+    """True if this caller should run the refresh (one at a time per worker)."""
+    with _lock:
+        if _state["refreshing"] or time.monotonic() < _state["next_poll"]:
+            return False
+        _state["refreshing"] = True
+        return True
+
+
+def _finish_refresh(ok):
+    with _lock:
+        _state["failures"] = 0 if ok else _state["failures"] + 1
+        delay = POLL_SECONDS if ok else min(POLL_SECONDS * 2 ** _state["failures"], RETRY_MAX_SECONDS)
+        _state["next_poll"] = time.monotonic() + delay
+        _state["refreshing"] = False
+    if ok:
+        _loaded.set()
+
+
+def revoke(jti, exp, user_id=None, token_type=None):
+    """Revoke a token by jti until its expiry (`exp` as epoch seconds or datetime)."""
+    if not jti:
+        return
+    expires_at = _expiry(exp)
+    counter = mongo.db.counters.find_one_and_update(
+        {"_id": _COUNTER_ID},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    _collection().update_one(
+        {"_id": jti},
+        {"$set": {
+            "seq": counter["seq"],
+            "user_id": user_id,
+            "type": token_type,
+            "expires_at": expires_at,
+            "revoked_at": datetime.utcnow(),
+        }},
+        upsert=True,
+    )
+    with _lock:
+        _state["jtis"][jti] = expires_at
+
+
+def revoke_payload(payload):
+    """Revoke a decoded JWT payload."""
+    revoke(payload.get("jti"), payload.get("exp"), payload.get("sub"), payload.get("type"))
+
+
+def is_revoked(jti):
+    """
+    Check a jti against this worker's revocation set.
+
+    Answered from memory; MongoDB is only consulted (one counter read) when
+    the last poll is older than TOKEN_REVOCATION_POLL_SECONDS, by a single
+    request per worker while the others keep answering from memory.
+    """
+    if not jti:
+        return False
+    if _claim_refresh():
+        ok = False
+        try:
+            _refresh()
+            ok = True
+        except Exception as e:
+            # Keep serving from the last known set; retry with backoff
+            print(f"[WARN] token revocation refresh failed: {e}")
+        finally:
+            _finish_refresh(ok)
+    elif not _loaded.is_set() and _state["refreshing"]:
+        # Another request is loading the set for the first time
+        _loaded.wait(READY_WAIT_SECONDS)
+    with _lock:
+        return jti in _state["jtis"]
@@ -0,0 +1,305 @@
+# backend/services/user_directory.py
+# Single index of every account across the role collections. Each entry maps a
+# user `_id` (and lower-cased email) to the collection holding the full document,
+# so identity lookups are one indexed read instead of probing `admins`,
+# `lecturers` and `students` in turn, and email uniqueness is a unique index.
+import threading
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from backend.app.database import mongo
+
+# Role collection -> role name
+ROLE_BY_COLLECTION = {"admins": "admin", "lecturers": "lecturer", "students": "student"}
+
+_SYNC_MARKER = "user_directory_sync"
+_ready = False
+_ready_lock = threading.Lock()
+
+# Minimum seconds between directory syncs triggered by lookup misses
+SYNC_MIN_INTERVAL = 60
+_last_sync = {"at": float("-inf")}
+_sync_lock = threading.Lock()
+
+# ObjectIds from different clients are only roughly ordered, so incremental
+# syncs re-scan this far behind the high-water mark, and a full reconcile
+# runs at least this often to catch anything older.
+SYNC_OVERLAP = timedelta(minutes=10)
+FULL_SYNC_INTERVAL = timedelta(hours=24)
+
+
+def _directory():
+    return mongo.db.user_directory
+
+
+def normalize_email(email):
+    return email.lower().strip() if isinstance(email, str) and email.strip() else None
+
+
+# ======================= Writes =======================
+def add_user(user_id, email, collection):
+    """Register a user. Raises DuplicateKeyError if the email is already taken."""
+    ensure_ready()
+    entry = {
+        "_id": ObjectId(user_id),
+        "collection": collection,
+        "role": ROLE_BY_COLLECTION.get(collection),
+        "created_at": datetime.utcnow(),
+    }
+    email = normalize_email(email)
+    if email:
+        entry["email"] = email
+    try:
+        _directory().insert_one(entry)
+    except DuplicateKeyError:
+        if not _reclaim_email(email):
+            raise
+        _directory().insert_one(entry)
+    return entry
+
+
+def insert_user(collection, doc):
+    """
+    Insert a user document into its role collection, registering it in the
+    directory first. Raises DuplicateKeyError (and inserts nothing) if the
+    email is already taken. Returns the new `_id`.
+    """
+    doc.setdefault("_id", ObjectId())
+    add_user(doc["_id"], doc.get("email"), collection)
+    try:
+        mongo.db[collection].insert_one(doc)
+    except Exception:
+        remove_user(doc["_id"])
+        raise
+    return doc["_id"]
+
+
+def _write_email(user_id, email):
+    """Set (or clear) an entry's email; returns the entry as it was, or None."""
+    update = {"$set": {"email": email}} if email else {"$unset": {"email": ""}}
+    return _directory().find_one_and_update(
+        {"_id": ObjectId(user_id)}, update, projection={"email": 1}, return_document=ReturnDocument.BEFORE
+    )
+
+
+def update_email(user_id, email, collection=None):
+    """
+    Change a user's email. Raises DuplicateKeyError if the email is already
+    taken. A user missing from the directory is registered when `collection`
+    is given. Returns the previous entry (None if there was none), which
+    `restore_email` takes to undo the change.
+    """
+    email = normalize_email(email)
+    try:
+        previous = _write_email(user_id, email)
+    except DuplicateKeyError:
+        if not _reclaim_email(email):
+            raise
+        previous = _write_email(user_id, email)
+    if previous is None and collection:
+        add_user(user_id, email, collection)
+    return previous
+
+
+def restore_email(user_id, previous):
+    """Undo `update_email` after the role-collection write failed."""
+    if previous is None:
+        remove_user(user_id)
+    else:
+        _write_email(user_id, previous.get("email"))
+
+
+def set_email(collection, user_id, email, extra=None):
+    """
+    Change the email on a user document and its directory entry together.
+    The directory goes first, so a duplicate (DuplicateKeyError) leaves the
+    document untouched, and is rolled back if the document update fails.
+    `extra` fields are written in the same update.
+    """
+    previous = update_email(user_id, email, collection)
+    fields = dict(extra or {}, email=email)
+    try:
+        mongo.db[collection].update_one({"_id": ObjectId(user_id)}, {"$set": fields})
+    except Exception:
+        restore_email(user_id, previous)
+        raise
+
+
+def move_user(user_id, from_collection, to_collection):
+    """
+    Move a user document to another role collection (a role change) and
+    repoint its directory entry. Returns the moved document, or None if the
+    user is not in `from_collection`.
+    """
+    user_id = ObjectId(user_id)
+    doc = mongo.db[from_collection].find_one({"_id": user_id})
+    if doc is None:
+        return None
+    role = ROLE_BY_COLLECTION[to_collection]
+    doc["role"] = role
+    mongo.db[to_collection].insert_one(doc)
+    try:
+        _directory().update_one({"_id": user_id}, {"$set": {"collection": to_collection, "role": role}})
+    except Exception:
+        mongo.db[to_collection].delete_one({"_id": user_id})
+        raise
+    mongo.db[from_collection].delete_one({"_id": user_id})
+    return doc
+
+
+def remove_user(user_id):
+    return _directory().delete_one({"_id": ObjectId(user_id)}).deleted_count == 1
+
+
+# ======================= Lookups =======================
+def _lookup(query):
+    entry = _directory().find_one(query)
+    if entry is None and _sync_due():
+        # Users written straight into a role collection by other tools are not
+        # registered yet; catch up (rate-limited, so unknown emails stay cheap)
+        if sync():
+            entry = _directory().find_one(query)
+    return entry
+
+
+def _sync_due():
+    with _sync_lock:
+        now = time.monotonic()
+        if now - _last_sync["at"] < SYNC_MIN_INTERVAL:
+            return False
+        _last_sync["at"] = now
+        return True
+
+
+def _resolve(entry):
+    if not entry:
+        return None, None
+    doc = mongo.db[entry["collection"]].find_one({"_id": entry["_id"]})
+    if not doc:
+        # Deleted straight from its role collection; drop the stale entry
+        remove_user(entry["_id"])
+        return None, None
+    return doc, entry["collection"]
+
+
+def find_by_email(email):
+    """Return (user document, collection name) for an email, or (None, None)."""
+    email = normalize_email(email)
+    if not email:
+        return None, None
+    ensure_ready()
+    return _resolve(_lookup({"email": email}))
+
+
+def find_by_id(user_id):
+    """Return (user document, collection name) for a user id, or (None, None)."""
+    if not ObjectId.is_valid(str(user_id)):
+        return None, None
+    ensure_ready()
+    return _resolve(_lookup({"_id": ObjectId(user_id)}))
+
+
+# ======================= Sync =======================
+def _reclaim_email(email):
+    """Free an email held by an entry whose user no longer exists. Returns True if freed."""
+    holder = _directory().find_one({"email": email}) if email else None
+    if holder and not mongo.db[holder["collection"]].find_one({"_id": holder["_id"]}, {"_id": 1}):
+        remove_user(holder["_id"])
+        return True
+    return False
+
+
+def _full_sync_due(marker, now):
+    full_at = marker.get("full_synced_at")
+    return full_at is None or now - full_at >= FULL_SYNC_INTERVAL
+
+
+def _since_query(high_water):
+    """Incremental scan from SYNC_OVERLAP before the high-water `_id`."""
+    if not high_water:
+        return {}
+    return {"_id": {"$gte": ObjectId.from_datetime(high_water.generation_time - SYNC_OVERLAP)}}
+
+
+def sync(batch_size=1000, full=False):
+    """
+    Copy users added to the role collections since the last sync into the
+    directory: data that predates the directory, or documents written by
+    tools outside the API. The API registers users as it inserts them
+    (`insert_user`), so it never depends on this.
+
+    Incremental from a per-collection `_id` high-water mark, re-scanning
+    SYNC_OVERLAP behind it because ids from other clients arrive out of
+    order; a full reconcile runs every FULL_SYNC_INTERVAL (or with `full`).
+    Upserts only fill missing entries, so re-scans are idempotent. An entry
+    whose email is held by another live user is skipped. Returns the number
+    upserted.
+    """
+    marker = mongo.db.counters.find_one({"_id": _SYNC_MARKER}) or {}
+    state = marker.get("high_water", {})
+    now = datetime.utcnow()
+    full = full or _full_sync_due(marker, now)
+    new_state = dict(state)
+    upserted = 0
+
+    def flush(batch):
+        nonlocal upserted
+        if not batch:
+            return
+        ops = [UpdateOne({"_id": _id}, {"$setOnInsert": entry}, upsert=True) for _id, entry in batch]
+        try:
+            upserted += _directory().bulk_write(ops, ordered=False).upserted_count
+        except BulkWriteError as e:
+            upserted += e.details.get("nUpserted", 0)
+            skipped = 0
+            for err in e.details.get("writeErrors", []):
+                _id, entry = batch[err["index"]]
+                if _reclaim_email(entry.get("email")):
+                    _directory().update_one({"_id": _id}, {"$setOnInsert": entry}, upsert=True)
+                    upserted += 1
+                else:
+                    skipped += 1
+            if skipped:
+                print(f"[WARN] user_directory sync skipped {skipped} entries with duplicate emails")
+
+    for col, role in ROLE_BY_COLLECTION.items():
+        query = {} if full else _since_query(state.get(col))
+        batch = []
+        for doc in mongo.db[col].find(query, {"email": 1}).sort("_id", 1):
+            entry = {"collection": col, "role": role, "created_at": datetime.utcnow()}
+            email = normalize_email(doc.get("email"))
+            if email:
+                entry["email"] = email
+            batch.append((doc["_id"], entry))
+            new_state[col] = max(doc["_id"], new_state.get(col) or doc["_id"])
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        flush(batch)
+
+    if new_state != state or full:
+        fields = {"high_water": new_state, "synced_at": now}
+        if full:
+            fields["full_synced_at"] = now
+        mongo.db.counters.update_one({"_id": _SYNC_MARKER}, {"$set": fields}, upsert=True)
+    return upserted
+
+
+def ensure_ready():
+    """Create the directory indexes and run one incremental sync per worker."""
+    global _ready
+    if _ready:
+        return
+    with _ready_lock:
+        if _ready:
+            return
+        _directory().create_index(
+            "email", unique=True, partialFilterExpression={"email": {"$type": "string"}}
+        )
+        _directory().create_index("collection")
+        sync()
+        _last_sync["at"] = time.monotonic()
+        _ready = True
@@ -0,0 +1,94 @@
+# backend/app/utils/identity_map.py
+from bson import ObjectId
+from flask import g, has_request_context
+
+from backend.app.database import mongo
+from backend.app.services import user_directory
+
+# Per-request identity map: each (collection, _id) is read from MongoDB at most
+# once per request, and every helper that loads it gets the same dict back.
+# Outside a request (background jobs, CLI) lookups go straight to MongoDB.
+
+_MISSING = object()
+
+# Directory lookups (id -> role collection) live under their own namespace so
+# they never shadow a real collection such as "users".
+_DIRECTORY = "__directory__"
+
+
+def _store():
+    if not has_request_context():
+        return None
+    store = g.get("_identity_map")
+    if store is None:
+        store = g._identity_map = {}
+    return store
+
+
+def _key(collection, doc_id):
+    if isinstance(doc_id, str) and ObjectId.is_valid(doc_id):
+        doc_id = ObjectId(doc_id)
+    return collection, doc_id
+
+
+def get(collection, doc_id):
+    """Return the document with `_id` from `collection` (None if it does not exist)."""
+    key = _key(collection, doc_id)
+    store = _store()
+    if store is not None:
+        doc = store.get(key, _MISSING)
+        if doc is not _MISSING:
+            return doc
+    doc = mongo.db[collection].find_one({"_id": key[1]})
+    if store is not None:
+        store[key] = doc
+    return doc
+
+
+def put(collection, doc):
+    """Register a document loaded (or inserted) elsewhere in this request."""
+    store = _store()
+    if store is not None and doc is not None and "_id" in doc:
+        store[(collection, doc["_id"])] = doc
+    return doc
+
+
+def apply_set(collection, doc_id, fields):
+    """Mirror a `$set` written by this request onto the mapped document."""
+    store = _store()
+    doc = store.get(_key(collection, doc_id)) if store is not None else None
+    if doc is not None:
+        doc.update(fields)
+    return doc
+
+
+def forget(collection, doc_id):
+    """Drop a document after a write whose result this request can't mirror."""
+    store = _store()
+    if store is not None:
+        store.pop(_key(collection, doc_id), None)
+
+
+def get_user(user_id):
+    """Return (user document, role collection) for an id, or (None, None)."""
+    store = _store()
+    key = _key(_DIRECTORY, user_id)
+    if store is not None and key in store:
+        col = store[key]
+        return (store.get((col, key[1])), col) if col else (None, None)
+    user, col = user_directory.find_by_id(user_id)
+    if store is not None:
+        store[key] = col if user is not None else None
+        if user is not None:
+            store[(col, user["_id"])] = user
+    return user, col
+
+
+def clear(exc=None):
+    g.pop("_identity_map", None)
+
+
+def init_identity_map(app):
+    # The test client can reuse one app context across requests, so the map is
+    # cleared explicitly when each request ends rather than with the context.
+    app.teardown_request(clear)
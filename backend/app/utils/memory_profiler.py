@@ -0,0 +1,111 @@
+# backend/app/utils/memory_profiler.py
+import linecache
+import os
+import threading
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime
+
+# Snapshots stay in this worker's memory (they can be tens of MB each), so
+# only the most recent few are kept. Everything here is per process: with
+# several workers, each request may reach a different one (see "pid").
+MAX_SNAPSHOTS = 5
+KEY_TYPES = ("lineno", "filename", "traceback")
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_snapshots = OrderedDict()  # id -> (snapshot, meta)
+_state = {"next_id": 1}
+_lock = threading.Lock()
+
+
+def is_tracing():
+    return tracemalloc.is_tracing()
+
+
+def start(frames=1):
+    """Start tracing allocations, keeping `frames` frames of traceback per allocation."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(max(1, min(int(frames), 50)))
+    return status()
+
+
+def stop():
+    """Stop tracing and drop all snapshots (tracing memory is freed)."""
+    tracemalloc.stop()
+    with _lock:
+        _snapshots.clear()
+    return status()
+
+
+def status():
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    with _lock:
+        snapshots = [meta for _, meta in _snapshots.values()]
+    return {
+        "pid": os.getpid(),
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else None,
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "overhead_kb": round(tracemalloc.get_tracemalloc_memory() / 1024, 1),
+        "snapshots": snapshots,
+    }
+
+
+def take_snapshot(label=None):
+    """Snapshot current allocations; the oldest snapshot is evicted beyond MAX_SNAPSHOTS."""
+    snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+    with _lock:
+        snapshot_id = _state["next_id"]
+        _state["next_id"] += 1
+        meta = {
+            "id": snapshot_id,
+            "label": label,
+            "taken_at": datetime.utcnow().isoformat(),
+            "total_kb": round(sum(s.size for s in snapshot.statistics("filename")) / 1024, 1),
+        }
+        _snapshots[snapshot_id] = (snapshot, meta)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return meta
+
+
+def get_snapshot(snapshot_id):
+    with _lock:
+        return _snapshots.get(snapshot_id)
+
+
+def _location(stat):
+    frames = stat.traceback
+    if len(frames) > 1:
+        return [f"{f.filename}:{f.lineno}" for f in frames]
+    return f"{frames[0].filename}:{frames[0].lineno}"
+
+
+def top(snapshot, key_type="lineno", limit=25):
+    """Largest allocation sites of one snapshot."""
+    return [
+        {"location": _location(s), "size_kb": round(s.size / 1024, 1), "count": s.count}
+        for s in snapshot.statistics(key_type)[:limit]
+    ]
+
+
+def diff(older, newer, key_type="lineno", limit=25):
+    """Allocation sites ranked by growth from `older` to `newer`."""
+    return [
+        {
+            "location": _location(s),
+            "size_diff_kb": round(s.size_diff / 1024, 1),
+            "size_kb": round(s.size / 1024, 1),
+            "count_diff": s.count_diff,
+            "count": s.count,
+        }
+        for s in newer.compare_to(older, key_type)[:limit]
+    ]
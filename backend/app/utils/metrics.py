@@ -0,0 +1,202 @@
+# backend/app/utils/metrics.py
+import glob
+import json
+import math
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Registry:
+    """
+    Minimal metrics registry rendered in the Prometheus text exposition format.
+
+    Series are keyed by (name, sorted label pairs). With a multiprocess
+    directory configured, each worker periodically dumps a snapshot to
+    `metrics_<pid>.json` there, and whichever worker serves /metrics merges
+    its live values with every other worker's file: counters and histograms
+    are summed (including workers that have exited), gauges only across
+    live workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}        # name -> {"type", "help", "buckets"}
+        self._counters = {}    # (name, labels) -> value
+        self._gauges = {}      # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._dir = None
+        self._flusher = None
+
+    # ----------------------- declaration -----------------------
+    def counter(self, name, help_text):
+        self._meta[name] = {"type": "counter", "help": help_text}
+
+    def gauge(self, name, help_text):
+        self._meta[name] = {"type": "gauge", "help": help_text}
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self._meta[name] = {"type": "histogram", "help": help_text, "buckets": list(buckets)}
+
+    # ----------------------- recording -----------------------
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((labels or {}).items()))
+
+    def inc(self, name, labels=None, value=1.0):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set(self, name, labels=None, value=0.0):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def add(self, name, labels=None, value=1.0):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0.0) + value
+
+    def observe(self, name, labels=None, value=0.0):
+        buckets = self._meta[name]["buckets"]
+        key = self._key(name, labels)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * len(buckets) + [0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    # ----------------------- multiprocess -----------------------
+    def snapshot(self):
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "counters": [[n, list(map(list, l)), v] for (n, l), v in self._counters.items()],
+                "gauges": [[n, list(map(list, l)), v] for (n, l), v in self._gauges.items()],
+                "histograms": [[n, list(map(list, l)), list(v)] for (n, l), v in self._histograms.items()],
+            }
+
+    def enable_multiprocess(self, directory, interval=5.0):
+        os.makedirs(directory, exist_ok=True)
+        self._dir = directory
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, args=(interval,),
+                                             name="metrics-flusher", daemon=True)
+            self._flusher.start()
+
+    def flush(self):
+        if not self._dir:
+            return
+        path = os.path.join(self._dir, f"metrics_{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def _flush_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[WARN] metrics flush failed: {e}")
+
+    def _other_snapshots(self):
+        if not self._dir:
+            return []
+        snapshots = []
+        for path in glob.glob(os.path.join(self._dir, "metrics_*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    snap = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snap.get("pid") != os.getpid():
+                snapshots.append(snap)
+        return snapshots
+
+    @staticmethod
+    def _alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True
+        return True
+
+    def collect(self):
+        """Merge this worker's series with the other workers' snapshots."""
+        counters, gauges, histograms = {}, {}, {}
+        snaps = [self.snapshot()] + self._other_snapshots()
+        for snap in snaps:
+            alive = snap["pid"] == os.getpid() or self._alive(snap["pid"])
+            for name, labels, value in snap["counters"]:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0.0) + value
+            if alive:
+                for name, labels, value in snap["gauges"]:
+                    key = (name, tuple(map(tuple, labels)))
+                    gauges[key] = gauges.get(key, 0.0) + value
+            for name, labels, values in snap["histograms"]:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.get(key)
+                histograms[key] = list(values) if merged is None else [a + b for a, b in zip(merged, values)]
+        return counters, gauges, histograms
+
+    # ----------------------- exposition -----------------------
+    @staticmethod
+    def _labels(pairs, extra=None):
+        pairs = list(pairs) + (extra or [])
+        if not pairs:
+            return ""
+        body = ",".join(
+            '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for k, v in pairs
+        )
+        return "{" + body + "}"
+
+    @staticmethod
+    def _num(value):
+        if value == math.inf:
+            return "+Inf"
+        return repr(float(value)) if isinstance(value, float) else str(value)
+
+    def render(self):
+        counters, gauges, histograms = self.collect()
+        lines = []
+        for name, meta in sorted(self._meta.items()):
+            lines.append(f"# HELP {name} {meta['help']}")
+            lines.append(f"# TYPE {name} {meta['type']}")
+            if meta["type"] == "counter":
+                for (n, labels), v in sorted(counters.items()):
+                    if n == name:
+                        lines.append(f"{name}{self._labels(labels)} {self._num(v)}")
+            elif meta["type"] == "gauge":
+                for (n, labels), v in sorted(gauges.items()):
+                    if n == name:
+                        lines.append(f"{name}{self._labels(labels)} {self._num(v)}")
+            else:
+                buckets = meta["buckets"]
+                for (n, labels), v in sorted(histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets, v[:len(buckets)]):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{self._labels(labels, [('le', self._num(float(bound)))])} {cumulative}")
+                    lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {v[-1]}")
+                    lines.append(f"{name}_sum{self._labels(labels)} {self._num(float(v[-2]))}")
+                    lines.append(f"{name}_count{self._labels(labels)} {v[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
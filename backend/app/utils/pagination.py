@@ -0,0 +1,101 @@
+# backend/app/utils/pagination.py
+import base64
+import heapq
+
+from bson import json_util
+from flask import request
+
+# Keyset pagination: a page is "the next `limit` documents after the last one
+# seen" in (sort_key, _id) order, answered by an index range scan, so page
+# 1000 costs the same as page 1. The cursor handed to clients is that last
+# (sort value, _id) pair, base64-encoded; it is opaque, not signed, and only
+# ever used as a query bound.
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursors that cannot be decoded; routes answer 400."""
+
+
+def encode_cursor(sort_value, doc_id):
+    raw = json_util.dumps([sort_value, doc_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """(sort value, _id) from a cursor token, or None for an empty token."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        value, doc_id = json_util.loads(raw.decode("utf-8"))
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    return value, doc_id
+
+
+def keyset_filter(sort_field, direction, after):
+    """Documents strictly after `after` = (value, _id) in (sort_field, _id) `direction` order."""
+    if after is None:
+        return {}
+    value, doc_id = after
+    op = "$lt" if direction < 0 else "$gt"
+    if sort_field == "_id":
+        return {"_id": {op: doc_id}}
+    return {"$or": [{sort_field: {op: value}}, {sort_field: value, "_id": {op: doc_id}}]}
+
+
+def with_keyset(query, sort_field, direction, after):
+    bound = keyset_filter(sort_field, direction, after)
+    if not bound:
+        return query
+    return {"$and": [query, bound]} if query else bound
+
+
+def page_args(default_limit=50, max_limit=100):
+    """(limit, after, include_total) from the query string; may raise InvalidCursor."""
+    try:
+        limit = max(1, min(max_limit, int(request.args.get("limit", default_limit))))
+    except ValueError:
+        limit = default_limit
+    after = decode_cursor(request.args.get("cursor"))
+    include_total = request.args.get("include_total", "").lower() in ("1", "true")
+    return limit, after, include_total
+
+
+def _sort_key(doc, sort_field):
+    return doc.get(sort_field), doc["_id"]
+
+
+def fetch_page(collections, query, sort_field="_id", direction=1, limit=50, after=None):
+    """
+    One page from one or more collections, merged in (sort_field, _id) order.
+    Each collection is read for at most `limit + 1` documents past the cursor.
+    Returns (docs, next_cursor); next_cursor is None on the last page.
+    """
+    sort = [(sort_field, direction)] if sort_field == "_id" else [(sort_field, direction), ("_id", direction)]
+    bounded = with_keyset(query, sort_field, direction, after)
+    streams = [col.find(bounded).sort(sort).limit(limit + 1) for col in collections]
+    if len(streams) == 1:
+        docs = list(streams[0])
+    else:
+        docs = list(heapq.merge(*streams, key=lambda d: _sort_key(d, sort_field), reverse=direction < 0))
+    return finish_page(docs, sort_field, limit)
+
+
+def finish_page(docs, sort_field, limit):
+    """Trim a `limit + 1` read to a page and derive the next cursor."""
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(*_sort_key(docs[-1], sort_field))
+
+
+def pagination_info(limit, next_cursor, estimated_total, total=None):
+    return {
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+        # Exact only with ?include_total=1; otherwise the collection-size estimate
+        "total": total,
+        "estimated_total": estimated_total,
+    }
@@ -0,0 +1,81 @@
+# backend/app/utils/query_budget.py
+from functools import wraps
+
+from flask import current_app, g, has_request_context
+
+# Query budgets, counted by the per-request command listener (db_profiler).
+#
+# A handler decorated with @query_budget(n) may issue at most n MongoDB
+# commands itself. The decorator goes directly above the `def`, so the
+# count covers the handler body only: auth, revocation and rate-limit
+# lookups wrap it and depend on cache state, not on the route. Budgets are
+# the handler's worst-case path, so one extra round trip goes over.
+#
+# Every other route falls under QUERY_BUDGET_DEFAULT, a whole-request
+# ceiling (auth overhead included) that catches runaway per-row queries.
+#
+# getMore batches are not counted: they grow with result size, not code.
+# Over budget, the request logs a warning; with QUERY_BUDGET_ENFORCE (on
+# under TESTING) it raises, so a test hitting the route fails.
+
+BUDGET_ATTR = "query_budget"
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request issued more MongoDB commands than its route allows."""
+
+
+def query_budget(max_queries):
+    """Declare the most MongoDB commands this handler body may issue (place directly above the def)."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            stats = g.get("db_stats") if has_request_context() else None
+            if stats is None:
+                return fn(*args, **kwargs)
+            stats.scope_depth += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stats.scope_depth -= 1
+        # Outer decorators (jwt_required, role_required) copy this via functools.wraps
+        setattr(wrapper, BUDGET_ATTR, int(max_queries))
+        return wrapper
+    return decorator
+
+
+def budget_of(endpoint, app=None):
+    """Declared handler budget of an endpoint, or None."""
+    app = app or current_app
+    view = app.view_functions.get(endpoint)
+    return getattr(view, BUDGET_ATTR, None) if view is not None else None
+
+
+def default_budget(app=None):
+    app = app or current_app
+    value = app.config.get("QUERY_BUDGET_DEFAULT")
+    return int(value) if value is not None else None
+
+
+def over_budget(endpoint, stats, app=None):
+    """(budget, message) when `stats` exceeds the endpoint's budget, else None."""
+    budget = budget_of(endpoint, app)
+    if budget is not None:
+        shapes, scope = stats.scoped, "handler"
+    else:
+        budget = default_budget(app)
+        if budget is None:
+            return None
+        shapes, scope = stats.shapes, "request (default budget)"
+    used = sum(shapes.values())
+    if used <= budget:
+        return None
+    top = sorted(shapes.items(), key=lambda x: -x[1])[:5]
+    detail = "; ".join(f"{n}x {s}" for s, n in top)
+    return budget, f"{endpoint} {scope} issued {used} MongoDB commands (budget {budget}): {detail}"
+
+
+def enforcing(app=None):
+    app = app or current_app
+    enforce = app.config.get("QUERY_BUDGET_ENFORCE")
+    return app.config.get("TESTING", False) if enforce is None else enforce
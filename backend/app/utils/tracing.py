@@ -0,0 +1,158 @@
+# backend/app/utils/tracing.py
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_LOGGER = "smartattendance.trace"
+
+# Spans are written as Chrome trace-event "complete" events (ph "X"), which
+# chrome://tracing, Perfetto and speedscope import directly. Trace, span and
+# parent ids go in `args` so a request's spans can be regrouped across files.
+_current = contextvars.ContextVar("trace_span", default=None)
+_config = {"enabled": False, "sample_rate": 1.0}
+_logger = logging.getLogger(TRACE_LOGGER)
+
+
+def _new_id(bits=64):
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """One timed operation; use via `span()` / `traced()` or `start_span()` + `end()`."""
+
+    __slots__ = ("name", "category", "trace_id", "span_id", "parent_id", "sampled",
+                 "attrs", "wall_start", "start", "_token")
+
+    def __init__(self, name, category, trace_id, parent_id, sampled, attrs):
+        self.name = name
+        self.category = category
+        self.trace_id = trace_id
+        self.span_id = _new_id()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attrs = attrs
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self._token = None
+
+    def set(self, key, value):
+        self.attrs[key] = value
+
+    def end(self, error=None):
+        duration = time.perf_counter() - self.start
+        if self._token is not None:
+            try:
+                _current.reset(self._token)
+            except ValueError:
+                # Ended from another context (e.g. a different hook); just unwind
+                _current.set(None)
+            self._token = None
+        if error is not None:
+            self.attrs["error"] = repr(error)
+        if self.sampled:
+            _write(self.name, self.category, self.wall_start, duration, self.trace_id,
+                   self.span_id, self.parent_id, self.attrs)
+
+
+def _write(name, category, wall_start, duration, trace_id, span_id, parent_id, attrs):
+    event = {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": int(wall_start * 1_000_000),
+        "dur": max(1, int(duration * 1_000_000)),
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "args": {"trace_id": trace_id, "span_id": span_id, "parent_id": parent_id, **attrs},
+    }
+    _logger.info(json.dumps(event, default=str, ensure_ascii=False))
+
+
+def configure(enabled=True, sample_rate=1.0):
+    _config.update(enabled=enabled, sample_rate=float(sample_rate))
+
+
+def enabled():
+    return _config["enabled"]
+
+
+def current_span():
+    return _current.get()
+
+
+def start_span(name, category="app", new_trace=False, **attrs):
+    """
+    Start a span as a child of the current one and make it current.
+
+    With no current span (or `new_trace`), a new trace is started and the
+    sampling decision is made; children inherit it. Returns None when
+    tracing is off, in which case there is nothing to end.
+    """
+    if not _config["enabled"]:
+        return None
+    parent = None if new_trace else _current.get()
+    if parent is None:
+        span = Span(name, category, _new_id(128), None, random.random() < _config["sample_rate"], attrs)
+    else:
+        span = Span(name, category, parent.trace_id, parent.span_id, parent.sampled, attrs)
+    span._token = _current.set(span)
+    return span
+
+
+@contextmanager
+def span(name, category="app", **attrs):
+    s = start_span(name, category, **attrs)
+    if s is None:
+        yield None
+        return
+    try:
+        yield s
+    except BaseException as e:
+        s.end(error=e)
+        raise
+    s.end()
+
+
+def traced(name=None, category="app"):
+    """Decorator running the function inside a span (named after it by default)."""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _config["enabled"]:
+                return fn(*args, **kwargs)
+            with span(span_name, category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name, wall_start, duration, category="app", parent=None, **attrs):
+    """Write an already-finished operation (e.g. from a driver event) as a child span."""
+    parent = parent or _current.get()
+    if parent is None or not parent.sampled:
+        return
+    _write(name, category, wall_start, duration, parent.trace_id, _new_id(), parent.span_id, attrs)
+
+
+def bind(fn):
+    """
+    Wrap `fn` to run in a copy of the caller's context, so spans it starts on
+    another thread (executor job, background job) join the caller's trace.
+    Call once per submission: a context can only be entered by one thread at a time.
+    """
+    if not _config["enabled"]:
+        return fn
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return ctx.run(fn, *args, **kwargs)
+    return wrapper
@@ -111,3 +111,30 @@ def test_delete_course(client, admin_user, test_course):
 
     response = client.delete(f"/api/admin/courses/{course_id}", headers=headers)
     assert response.status_code in [200, 403]
+
+def test_create_user_rejects_email_of_other_role(client, admin_user, test_student):
+    token = create_jwt(admin_user["_id"])
+    headers = {"Authorization": token}
+    payload = {"username": "dup", "email": test_student["email"].upper(), "role": "lecturer"}
+
+    response = client.post("/api/admin/users", json=payload, headers=headers)
+    assert response.status_code in [409, 403]
+
+def _claims_headers(user_id, role, user_type):
+    from flask_jwt_extended import create_access_token
+    token = create_access_token(identity=str(user_id), additional_claims={"role": role, "user_type": user_type})
+    return {"Authorization": f"Bearer {token}"}
+
+def test_deactivation_and_role_change_take_effect_immediately(client, admin_user):
+    admin_headers = _claims_headers(admin_user["_id"], "admin", "admins")
+    lecturers = [mongo.db.lecturers.insert_one({"username": f"lect{i}", "role": "lecturer"}).inserted_id for i in range(2)]
+    headers = [_claims_headers(_id, "lecturer", "lecturers") for _id in lecturers]
+    # Warm the account-status cache
+    assert all(client.get("/api/lecturer/dashboard", headers=h).status_code == 200 for h in headers)
+
+    client.put(f"/api/admin/users/{lecturers[0]}", json={"is_active": False}, headers=admin_headers)
+    assert client.get("/api/lecturer/dashboard", headers=headers[0]).status_code == 401
+
+    client.put(f"/api/admin/users/{lecturers[1]}", json={"role": "student"}, headers=admin_headers)
+    assert client.get("/api/lecturer/dashboard", headers=headers[1]).status_code == 401
+    assert mongo.db.students.find_one({"_id": lecturers[1]})["role"] == "student"
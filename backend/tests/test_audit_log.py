@@ -0,0 +1,87 @@
+# backend/tests/test_audit_log.py
+import time
+
+from flask import Flask
+from pymongo.errors import BulkWriteError
+
+from backend.app.middlewares import audit
+from backend.app.services.audit_log import AuditWriter
+
+
+class FakeCollection:
+    def __init__(self, fail=False, rejected=0):
+        self.batches = []
+        self.fail = fail
+        self.rejected = rejected
+
+    def insert_many(self, docs, ordered=True):
+        if self.fail:
+            raise RuntimeError("db down")
+        if self.rejected:
+            errors = [{"index": i, "code": 11000} for i in range(self.rejected)]
+            raise BulkWriteError({"nInserted": len(docs) - self.rejected, "writeErrors": errors})
+        self.batches.append(list(docs))
+
+
+def test_flush_writes_in_batches():
+    col = FakeCollection()
+    writer = AuditWriter(lambda: col, batch_size=3, flush_interval=60, max_queue=100)
+    writer._thread = object()  # keep the background thread out of the way
+    for i in range(7):
+        writer.submit({"n": i})
+    writer.flush()
+    assert [len(b) for b in col.batches] == [3, 3, 1]
+    assert writer.stats()["written"] == 7
+
+
+def test_full_queue_drops_and_failures_are_counted():
+    writer = AuditWriter(lambda: FakeCollection(fail=True), batch_size=10, max_queue=2)
+    writer._thread = object()
+    assert [writer.submit({"n": i}) for i in range(3)] == [True, True, False]
+    writer.flush()
+    stats = writer.stats()
+    assert (stats["dropped"], stats["failed"], stats["written"]) == (1, 2, 0)
+
+
+def test_partial_bulk_failures_count_what_was_inserted():
+    writer = AuditWriter(lambda: FakeCollection(rejected=2), batch_size=10, max_queue=100)
+    writer._thread = object()
+    for i in range(10):
+        writer.submit({"n": i})
+    writer.flush()
+    stats = writer.stats()
+    assert (stats["failed"], stats["written"]) == (2, 8)
+
+
+def test_background_thread_flushes_on_interval():
+    col = FakeCollection()
+    writer = AuditWriter(lambda: col, batch_size=100, flush_interval=0.05)
+    writer.submit({"n": 1})
+    writer.submit({"n": 2})
+    deadline = time.time() + 2
+    while not col.batches and time.time() < deadline:
+        time.sleep(0.01)
+    assert col.batches == [[{"n": 1}, {"n": 2}]]
+
+
+def test_only_mutating_requests_are_audited(monkeypatch):
+    col = FakeCollection()
+    writer = AuditWriter(lambda: col, batch_size=100, flush_interval=60)
+    writer._thread = object()
+    monkeypatch.setattr(audit, "get_writer", lambda config: writer)
+    app = Flask(__name__)
+    audit.init_audit(app)
+
+    @app.route("/courses/<course_id>", methods=["GET", "DELETE"])
+    def course(course_id):
+        return ({"error": "nope"}, 404) if course_id == "missing" else {"ok": True}
+
+    client = app.test_client()
+    client.get("/courses/c1")
+    client.delete("/courses/c1")
+    client.delete("/courses/missing")
+    writer.flush()
+    ok, missing = col.batches[0]
+    assert (ok["action"], ok["method"], ok["target"], ok["status"]) == ("course", "DELETE", "course_id=c1", "success")
+    assert (missing["level"], missing["status_code"]) == ("warning", 404)
+    assert ok["timestamp"] == ok["created_at"] and ok["latency_ms"] >= 0
@@ -9,3 +9,31 @@ def test_login_student(client, test_user):
     }
     response = client.post("/api/auth/login", json=payload)
     assert response.status_code in [200, 401]  # if password not hashed correctly
+
+
+def test_logout_revokes_access_token(client):
+    payload = {"name": "Revoke Me", "email": "revoke.me@example.com", "password": "pass1234"}
+    response = client.post("/api/auth/register", json=payload)
+    if response.status_code == 409:
+        response = client.post("/api/auth/login", json=payload)
+    headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+
+
+def test_login_follows_an_email_change(client):
+    payload = {"name": "Moving Student", "email": "moving.before@example.com", "password": "pass1234"}
+    response = client.post("/api/auth/register", json=payload)
+    if response.status_code == 409:
+        response = client.post("/api/auth/login", json=payload)
+    body = response.get_json()
+    headers = {"Authorization": f"Bearer {body['access_token']}"}
+
+    new_email = "moving.after@example.com"
+    update = client.put(f"/api/student/{body['user']['id']}", json={"email": new_email}, headers=headers)
+    assert update.status_code == 200
+
+    assert client.post("/api/auth/login", json={**payload, "email": new_email}).status_code == 200
+    assert client.post("/api/auth/login", json=payload).status_code == 401
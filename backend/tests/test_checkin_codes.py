@@ -0,0 +1,73 @@
+# backend/tests/test_checkin_codes.py
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from backend.app.services import checkin_code_service as svc
+from backend.app.services.checkin_code_service import code_for, CODE_SPACE
+
+SECRET = b"test-secret"
+
+
+def test_codes_are_unique_within_a_slot():
+    codes = [code_for(seq, 12345, SECRET) for seq in range(20000)]
+    assert len(set(codes)) == len(codes)
+    assert all(len(c) == 6 and c.isdigit() for c in codes)
+
+
+def test_codes_rotate_between_slots():
+    assert code_for(42, 1, SECRET) != code_for(42, 2, SECRET)
+    assert code_for(42, 1, SECRET) == code_for(42 + CODE_SPACE, 1, SECRET)
+
+
+def _colliding_seqs(slot):
+    """(a, b) where a's previous-slot code equals b's current-slot code."""
+    previous, current = {}, {}
+    for seq in range(1, 20000):
+        previous[code_for(seq, slot - 1, SECRET)] = seq
+        current[code_for(seq, slot, SECRET)] = seq
+        for code in (code_for(seq, slot - 1, SECRET), code_for(seq, slot, SECRET)):
+            if code in previous and code in current and previous[code] != current[code]:
+                return previous[code], current[code], code
+    raise AssertionError("no collision found")
+
+
+def test_grace_codes_colliding_with_current_codes_are_rejected(monkeypatch):
+    slot = 777
+    a, b, code = _colliding_seqs(slot)
+    sessions = [{"_id": "A", "code_seq": a}, {"_id": "B", "code_seq": b}]
+    db = SimpleNamespace(sessions=SimpleNamespace(find=lambda query, fields: sessions))
+    monkeypatch.setattr(svc, "mongo", SimpleNamespace(db=db))
+    monkeypatch.setattr(svc, "_secret", lambda: SECRET)
+    monkeypatch.setattr(svc, "current_slot", lambda: slot)
+    svc.invalidate()
+
+    with pytest.raises(svc.AmbiguousCode):
+        svc.resolve_code(code)
+    assert svc.resolve_code(code_for(a, slot, SECRET))["_id"] == "A"
+    assert svc.resolve_code(code_for(b, slot - 1, SECRET))["_id"] == "B"
+    svc.invalidate()
+
+
+def test_code_attempts_are_counted_before_resolving(app, monkeypatch):
+    from flask_jwt_extended import create_access_token
+    from backend.app.middlewares import rate_limiter
+    from backend.app.middlewares.rate_limit_backends import SlidingWindowLimiter
+    from backend.app.services import token_revocation
+
+    app.config["CHECKIN_CODE_MAX_ATTEMPTS"] = 3
+    monkeypatch.setattr(token_revocation, "is_revoked", lambda jti: False)
+    monkeypatch.setattr(rate_limiter, "_limiter", SlidingWindowLimiter())
+    resolved = []
+    monkeypatch.setattr(svc, "resolve_code", lambda code: resolved.append(code))
+
+    token = create_access_token(identity=str(ObjectId()))
+    client = app.test_client()
+    statuses = [
+        client.post("/api/student/checkin/code", json={"code": "123456"},
+                    headers={"Authorization": f"Bearer {token}"}).status_code
+        for _ in range(4)
+    ]
+    assert statuses == [404, 404, 404, 429]
+    assert len(resolved) == 3
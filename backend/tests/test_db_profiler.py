@@ -0,0 +1,96 @@
+# backend/tests/test_db_profiler.py
+from types import SimpleNamespace
+
+from flask import Flask
+
+from backend.app.middlewares.db_profiler import (
+    RequestCommandListener, RequestDbStats, command_shape, init_db_profiler,
+)
+
+
+def test_shape_ignores_literal_values():
+    a = command_shape("find", {"find": "students", "filter": {"_id": 1, "active": True}})
+    b = command_shape("find", {"find": "students", "filter": {"active": False, "_id": 2}})
+    c = command_shape("find", {"find": "students", "filter": {"email": "x@y.z"}})
+    assert a == b
+    assert a != c
+
+
+def _event(request_id, name="find", command=None, reply=None):
+    return SimpleNamespace(
+        request_id=request_id, command_name=name, duration_micros=1500,
+        command=command or {"find": "courses", "filter": {"_id": request_id}},
+        reply=reply or {"cursor": {"firstBatch": [{}]}},
+    )
+
+
+def test_repeated_shapes_are_reported_as_n_plus_one():
+    app = Flask(__name__)
+    app.config.update(DB_N_PLUS_ONE_THRESHOLD=3, DB_DEBUG_HEADERS=True)
+    init_db_profiler(app)
+    listener = RequestCommandListener()
+
+    @app.route("/loop")
+    def loop():
+        for i in range(4):
+            listener.started(_event(i))
+            listener.succeeded(_event(i))
+        listener.started(_event(99, "hello", {"hello": 1}))
+        return {"ok": True}
+
+    response = app.test_client().get("/loop")
+    assert response.headers["X-DB-Queries"] == "4"
+    assert response.headers["X-DB-Documents"] == "4"
+    assert response.headers["X-DB-N-Plus-One"].startswith("4x find courses")
+
+
+def test_commands_outside_requests_are_ignored():
+    listener = RequestCommandListener()
+    listener.started(_event(1))
+    listener.succeeded(_event(1))
+
+    stats = RequestDbStats()
+    assert stats.n_plus_one(1) == []
+    assert "n_plus_one" not in stats.as_dict(1)
+
+
+def test_slow_commands_are_sent_to_the_slow_query_log(monkeypatch):
+    from backend.app.services import slow_query_log
+
+    recorded = []
+    monkeypatch.setattr(slow_query_log, "record", lambda entry, command=None: recorded.append((entry, command)))
+    app = Flask(__name__)
+    init_db_profiler(app)
+    listener = RequestCommandListener(slow_ms=1.0, explain_rate=1.0)
+
+    @app.route("/slow")
+    def slow():
+        listener.started(_event(1))
+        listener.succeeded(_event(1))
+        return {"ok": True}
+
+    app.test_client().get("/slow")
+    entry, command = recorded[0]
+    assert entry["route"] == "slow"
+    assert entry["collection"] == "courses"
+    assert entry["duration_ms"] == 1.5
+    assert command == {"find": "courses", "filter": {"_id": 1}}
+
+
+def test_explain_plan_summary():
+    from backend.app.services.slow_query_log import explain_command, summarize_plan
+
+    cmd = explain_command("find", {"find": "attendance", "filter": {"x": 1}, "lsid": {}, "$db": "sa"})
+    assert cmd == {"explain": {"find": "attendance", "filter": {"x": 1}}, "verbosity": "queryPlanner"}
+    assert explain_command("insert", {"insert": "attendance"}) is None
+
+    plan = {"stages": [{"$cursor": {"queryPlanner": {
+        "namespace": "sa.attendance",
+        "winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "session_id_1"}},
+        "rejectedPlans": [{}],
+    }}}]}
+    summary = summarize_plan(plan)
+    assert summary["stages"] == ["FETCH", "IXSCAN"]
+    assert summary["indexes"] == ["session_id_1"]
+    assert summary["rejected_plans"] == 1
+    assert not summary["collection_scan"]
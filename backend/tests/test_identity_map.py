@@ -0,0 +1,38 @@
+# backend/tests/test_identity_map.py
+from bson import ObjectId
+from flask import Flask
+
+from backend.app.utils import identity_map
+
+
+def test_documents_are_shared_within_a_request_and_dropped_after():
+    app = Flask(__name__)
+    identity_map.init_identity_map(app)
+    course = {"_id": ObjectId(), "name": "Algorithms"}
+
+    with app.test_request_context():
+        identity_map.put("courses", course)
+        # String and ObjectId ids resolve to the same mapped document
+        assert identity_map.get("courses", str(course["_id"])) is course
+        identity_map.apply_set("courses", course["_id"], {"name": "Algorithms II"})
+        assert identity_map.get("courses", course["_id"])["name"] == "Algorithms II"
+        identity_map.forget("courses", course["_id"])
+        assert ("courses", course["_id"]) not in identity_map._store()
+
+    with app.test_request_context():
+        assert identity_map._store() == {}
+
+
+def test_directory_lookups_do_not_shadow_the_users_collection(monkeypatch):
+    app = Flask(__name__)
+    identity_map.init_identity_map(app)
+    student = {"_id": ObjectId(), "name": "Ama"}
+    monkeypatch.setattr(identity_map.user_directory, "find_by_id", lambda _id: (student, "students"))
+
+    with app.test_request_context():
+        assert identity_map.get_user(student["_id"]) == (student, "students")
+        # A second lookup comes from the map and returns the shared document
+        assert identity_map.get_user(str(student["_id"]))[0] is student
+        identity_map.put("users", {"_id": student["_id"], "username": "ama"})
+        assert identity_map.get("users", student["_id"])["username"] == "ama"
+        assert identity_map.get_user(student["_id"]) == (student, "students")
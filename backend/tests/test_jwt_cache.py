@@ -0,0 +1,94 @@
+# backend/tests/test_jwt_cache.py
+import time
+from datetime import timedelta
+
+import flask_jwt_extended.jwt_manager
+import pytest
+from flask import Flask
+from flask_jwt_extended import create_access_token, decode_token, jwt_required
+from jwt import ExpiredSignatureError
+
+from backend.app.auth.jwt_manager import CachingJWTManager
+
+
+@pytest.fixture
+def manager():
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY="test-secret")
+    jwt = CachingJWTManager(app)
+    with app.app_context():
+        yield jwt
+
+
+def test_verified_token_is_served_from_cache(manager):
+    token = create_access_token(identity="u1", additional_claims={"role": "admin"})
+    first = decode_token(token)
+    assert len(manager._verified) == 1
+    second = decode_token(token)
+    assert second == first and second["role"] == "admin"
+    assert len(manager._verified) == 1
+
+
+def test_expired_and_tampered_tokens_are_not_cached(manager):
+    expired = create_access_token(identity="u1", expires_delta=timedelta(seconds=-1))
+    with pytest.raises(ExpiredSignatureError):
+        decode_token(expired)
+
+    token = create_access_token(identity="u1")
+    head, body, sig = token.split(".")
+    with pytest.raises(Exception):
+        decode_token(f"{head}.{body}.{sig[:-2]}AA")
+    assert len(manager._verified) == 0
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Count signature-verifying decodes (flask_jwt_extended's _decode_jwt)."""
+    calls = []
+    real_decode = flask_jwt_extended.jwt_manager._decode_jwt
+
+    def counting_decode(**kwargs):
+        calls.append(1)
+        return real_decode(**kwargs)
+
+    monkeypatch.setattr(flask_jwt_extended.jwt_manager, "_decode_jwt", counting_decode)
+    return calls
+
+
+def test_cached_tokens_skip_signature_verification_until_expiry(manager, decodes):
+    token = create_access_token(identity="u1", expires_delta=timedelta(seconds=1))
+    decode_token(token)
+    decode_token(token)
+    assert len(decodes) == 1
+
+    time.sleep(1.1)
+    with pytest.raises(ExpiredSignatureError):
+        decode_token(token)
+    # Verified again (flask_jwt_extended decodes once more to attach the expired payload)
+    assert len(decodes) > 1
+
+
+def test_revocation_is_checked_on_the_cached_path(decodes):
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY="test-secret")
+    manager = CachingJWTManager(app)
+    revoked = set()
+    manager.token_in_blocklist_loader(lambda header, payload: payload["jti"] in revoked)
+
+    @app.route("/me")
+    @jwt_required()
+    def me():
+        return {"ok": True}
+
+    with app.app_context():
+        token = create_access_token(identity="u1")
+    headers = {"Authorization": f"Bearer {token}"}
+    client = app.test_client()
+    assert client.get("/me", headers=headers).status_code == 200
+    assert client.get("/me", headers=headers).status_code == 200
+    assert len(decodes) == 1
+
+    with app.app_context():
+        revoked.add(decode_token(token)["jti"])
+    assert client.get("/me", headers=headers).status_code == 401
+    assert len(decodes) == 1
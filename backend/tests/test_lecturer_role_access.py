@@ -48,3 +48,28 @@ def test_student_cannot_access_lecturer_routes(client, app):
 def test_no_token_denied(client):
     resp = client.get("/api/lecturer/courses")
     assert resp.status_code == 401
+
+
+def test_role_claims_authorize_without_role_field(client, app):
+    # lecturers created by older code paths may lack a `role` field; the signed
+    # claims issued at login are enough to authorize
+    res = mongo.db.lecturers.insert_one({"username": "lecturer2", "email": "lecturer2@example.com"})
+    with app.app_context():
+        token = create_access_token(
+            identity=str(res.inserted_id),
+            additional_claims={"role": "lecturer", "user_type": "lecturers"},
+        )
+
+    resp = client.get("/api/lecturer/courses", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+
+
+def test_role_claims_reject_deleted_user(client, app):
+    with app.app_context():
+        token = create_access_token(
+            identity=str(ObjectId()),
+            additional_claims={"role": "lecturer", "user_type": "lecturers"},
+        )
+
+    resp = client.get("/api/lecturer/courses", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 401
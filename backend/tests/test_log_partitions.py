@@ -0,0 +1,122 @@
+# backend/tests/test_log_partitions.py
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from bson import ObjectId
+
+from backend.app.services import log_partitions
+from backend.app.utils.pagination import decode_cursor
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        if key == "$and":
+            ok = all(matches(doc, q) for q in cond)
+        elif key == "$or":
+            ok = any(matches(doc, q) for q in cond)
+        elif isinstance(cond, dict):
+            ok = all({"$lt": doc[key] < v, "$gt": doc[key] > v}[op] for op, v in cond.items())
+        else:
+            ok = doc.get(key) == cond
+        if not ok:
+            return False
+    return True
+
+
+class FakeCursor(list):
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.sort_in_place(field, direction)
+        return self
+
+    def sort_in_place(self, field, direction):
+        list.sort(self, key=lambda d: d[field], reverse=direction < 0)
+
+    def limit(self, n):
+        return FakeCursor(self[:n])
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+        self.reads = 0
+
+    def insert_many(self, docs, ordered=False):
+        self.docs.extend(docs)
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def find(self, query=None):
+        self.reads += 1
+        return FakeCursor(d for d in self.docs if matches(d, query or {}))
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+    def list_collection_names(self):
+        return list(self)
+
+    def drop_collection(self, name):
+        self.pop(name, None)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(log_partitions, "mongo", SimpleNamespace(db=fake))
+    log_partitions.forget_partitions()
+    yield fake
+    log_partitions.forget_partitions()
+
+
+def _log(day, month):
+    when = datetime(2025, month, day)
+    return {"_id": ObjectId(), "created_at": when, "timestamp": when}
+
+
+def test_records_are_written_to_their_month(db):
+    log_partitions.PartitionedLogs().insert_many([_log(31, 1), _log(1, 2), _log(2, 2)])
+    assert len(db["system_logs_2025_01"].docs) == 1
+    assert len(db["system_logs_2025_02"].docs) == 2
+    assert log_partitions.partitions() == ["system_logs_2025_02", "system_logs_2025_01"]
+
+
+def test_date_ranges_only_touch_overlapping_partitions(db):
+    log_partitions.PartitionedLogs().insert_many([_log(5, m) for m in (1, 2, 3)])
+    db["system_logs"].insert_many([{"created_at": datetime(2024, 6, 1)}])
+    log_partitions.forget_partitions()
+
+    routed = log_partitions.collections_for_range(datetime(2025, 2, 10), datetime(2025, 3, 1))
+    assert routed == ["system_logs_2025_03", "system_logs_2025_02", "system_logs"]
+
+
+def test_keyset_pages_are_merged_newest_first_across_partitions(db):
+    log_partitions.PartitionedLogs().insert_many([_log(d, m) for m in (1, 2) for d in (1, 2, 3)])
+    pages, cursor = [], None
+    while True:
+        docs, token = log_partitions.find_page({}, limit=4, after=decode_cursor(cursor))
+        pages.append([(d["created_at"].month, d["created_at"].day) for d in docs])
+        if token is None:
+            break
+        cursor = token
+    assert pages == [[(2, 3), (2, 2), (2, 1), (1, 3)], [(1, 2), (1, 1)]]
+    # The second page started below February's range, so February was not read again
+    assert db["system_logs_2025_02"].reads == 1
+    assert log_partitions.count({}) == 6
+
+
+def test_old_partitions_are_dropped_whole(db):
+    log_partitions.PartitionedLogs().insert_many([_log(1, m) for m in (1, 2, 3)])
+    archived = []
+    dropped = log_partitions.drop_partitions_before(datetime(2025, 3, 1), archive=lambda n, c: archived.append(n))
+    assert dropped == archived == ["system_logs_2025_01", "system_logs_2025_02"]
+    assert log_partitions.partitions() == ["system_logs_2025_03"]
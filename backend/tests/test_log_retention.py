@@ -0,0 +1,71 @@
+# backend/tests/test_log_retention.py
+import gzip
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from bson import ObjectId, json_util
+
+from backend.app.services import log_retention
+
+
+class FakeCursor(list):
+    def sort(self, *args):
+        return self
+
+    def limit(self, n):
+        return FakeCursor(self[:n])
+
+
+class FakeLogs:
+    """Every remaining document matches; enough to exercise batching and archiving."""
+
+    def __init__(self, n):
+        self.docs = [{"_id": ObjectId(), "level": "info", "created_at": datetime(2024, 1, 1)} for _ in range(n)]
+        self.deletes = 0
+
+    def find(self, query, projection=None):
+        return FakeCursor(self.docs)
+
+    def delete_many(self, query):
+        ids = set(query["_id"]["$in"])
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if d["_id"] not in ids]
+        self.deletes += 1
+        return SimpleNamespace(deleted_count=before - len(self.docs))
+
+
+def use_collection(monkeypatch, logs):
+    monkeypatch.setattr(log_retention, "mongo", SimpleNamespace(db={"system_logs": logs}))
+    monkeypatch.setattr(log_retention.log_partitions, "collections_for_range", lambda **kw: ["system_logs"])
+
+
+def test_retention_rules_per_level():
+    retention = log_retention.parse_retention("info=7,debug=1")
+    assert retention == {"info": 7, "warning": 90, "error": 365, "default": 30, "debug": 1}
+
+    now = datetime(2025, 3, 1)
+    filters = dict(log_retention.retention_filters(retention, now=now))
+    assert filters["info"]["level"] == "info"
+    assert filters["info"]["$or"][0] == {"created_at": {"$lt": now - timedelta(days=7)}}
+    assert filters["default"]["level"] == {"$nin": ["info", "warning", "error", "debug"]}
+
+
+def test_expired_entries_are_archived_then_deleted_in_batches(tmp_path, monkeypatch):
+    logs = FakeLogs(5)
+    originals = list(logs.docs)
+    use_collection(monkeypatch, logs)
+
+    deleted = log_retention.delete_in_batches({}, batch_size=2, archive_dir=str(tmp_path))
+    assert deleted == 5 and logs.deletes == 3 and logs.docs == []
+
+    with gzip.open(log_retention.archive_path(str(tmp_path)), "rt", encoding="utf-8") as f:
+        archived = [json_util.loads(line) for line in f]
+    assert [d["_id"] for d in archived] == [d["_id"] for d in originals]
+    assert archived[0]["created_at"] == datetime(2024, 1, 1)
+
+
+def test_max_batches_bounds_one_run(monkeypatch):
+    logs = FakeLogs(10)
+    use_collection(monkeypatch, logs)
+    assert log_retention.delete_in_batches({}, batch_size=3, max_batches=2) == 6
+    assert len(logs.docs) == 4
@@ -0,0 +1,32 @@
+# backend/tests/test_memory_profiler.py
+from backend.app.utils import memory_profiler
+
+
+def test_diff_points_at_the_growing_line():
+    memory_profiler.start(frames=1)
+    try:
+        before = memory_profiler.take_snapshot("before")
+        hoard = [bytearray(1024) for _ in range(2000)]  # the "leak"
+        after = memory_profiler.take_snapshot("after")
+
+        older = memory_profiler.get_snapshot(before["id"])[0]
+        newer = memory_profiler.get_snapshot(after["id"])[0]
+        growth = memory_profiler.diff(older, newer, limit=5)
+        assert "test_memory_profiler.py" in growth[0]["location"]
+        assert growth[0]["size_diff_kb"] >= 2000
+        assert memory_profiler.top(newer, "filename", 3)
+        assert len(hoard) == 2000
+    finally:
+        memory_profiler.stop()
+    assert memory_profiler.status()["snapshots"] == []
+
+
+def test_only_recent_snapshots_are_kept():
+    memory_profiler.start()
+    try:
+        ids = [memory_profiler.take_snapshot()["id"] for _ in range(memory_profiler.MAX_SNAPSHOTS + 2)]
+        kept = [s["id"] for s in memory_profiler.status()["snapshots"]]
+        assert kept == ids[-memory_profiler.MAX_SNAPSHOTS:]
+        assert memory_profiler.get_snapshot(ids[0]) is None
+    finally:
+        memory_profiler.stop()
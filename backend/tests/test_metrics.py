@@ -0,0 +1,57 @@
+# backend/tests/test_metrics.py
+import json
+
+from backend.app.utils.metrics import Registry
+
+
+def make_registry():
+    reg = Registry()
+    reg.counter("requests_total", "Requests")
+    reg.gauge("in_flight", "In flight")
+    reg.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    return reg
+
+
+def test_histogram_exposition_is_cumulative():
+    reg = make_registry()
+    for v in (0.05, 0.5, 3.0):
+        reg.observe("latency_seconds", {"endpoint": "login"}, v)
+    text = reg.render()
+    assert 'latency_seconds_bucket{endpoint="login",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{endpoint="login",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{endpoint="login",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{endpoint="login"} 3' in text
+
+
+def test_worker_snapshots_are_merged(tmp_path):
+    reg = make_registry()
+    reg._dir = str(tmp_path)
+    reg.inc("requests_total", {"status": "200"}, 2)
+    reg.set("in_flight", None, 1)
+
+    # A worker that has since exited: its counters still count, its gauges do not
+    exited = {"pid": 2 ** 22 + 12345,
+              "counters": [["requests_total", [["status", "200"]], 3]],
+              "gauges": [["in_flight", [], 7]],
+              "histograms": []}
+    (tmp_path / "metrics_99999.json").write_text(json.dumps(exited))
+
+    text = reg.render()
+    assert 'requests_total{status="200"} 5.0' in text
+    assert "in_flight 1" in text
+
+
+def test_metrics_endpoint_refuses_proxied_and_unauthenticated_scrapes():
+    from flask import Flask
+    from backend.app.middlewares.metrics import init_metrics
+
+    app = Flask(__name__)
+    init_metrics(app)
+    client = app.test_client()
+    assert client.get("/metrics").status_code == 200
+    # Behind a same-host reverse proxy every request comes from loopback
+    assert client.get("/metrics", headers={"X-Forwarded-For": "203.0.113.7"}).status_code == 404
+
+    app.config["METRICS_TOKEN"] = "scrape-me"
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-me"}).status_code == 200
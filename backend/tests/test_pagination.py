@@ -0,0 +1,57 @@
+# backend/tests/test_pagination.py
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from backend.app.utils import pagination
+
+
+class FakeCursor(list):
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            list.sort(self, key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        return FakeCursor(self[:n])
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query):
+        bound = query.get("_id", {}).get("$gt")
+        return FakeCursor(d for d in self.docs if bound is None or d["_id"] > bound)
+
+
+def test_cursor_round_trip_keeps_types():
+    when, doc_id = datetime(2025, 3, 1, 12, 30), ObjectId()
+    token = pagination.encode_cursor(when, doc_id)
+    assert pagination.decode_cursor(token) == (when, doc_id)
+    assert pagination.decode_cursor("") is None
+
+    with pytest.raises(pagination.InvalidCursor):
+        pagination.decode_cursor("not-a-cursor")
+
+
+def test_keyset_filter_breaks_ties_on_id():
+    when, doc_id = datetime(2025, 3, 1), ObjectId()
+    assert pagination.keyset_filter("_id", 1, (doc_id, doc_id)) == {"_id": {"$gt": doc_id}}
+    assert pagination.keyset_filter("created_at", -1, (when, doc_id)) == {
+        "$or": [{"created_at": {"$lt": when}}, {"created_at": when, "_id": {"$lt": doc_id}}]
+    }
+    assert pagination.with_keyset({"level": "error"}, "_id", 1, None) == {"level": "error"}
+
+
+def test_pages_merge_collections_in_id_order():
+    ids = sorted(ObjectId() for _ in range(5))
+    cols = [FakeCollection([{"_id": i} for i in ids[::2]]), FakeCollection([{"_id": i} for i in ids[1::2]])]
+
+    docs, token = pagination.fetch_page(cols, {}, limit=3)
+    assert [d["_id"] for d in docs] == ids[:3]
+
+    docs, token = pagination.fetch_page(cols, {}, limit=3, after=pagination.decode_cursor(token))
+    assert [d["_id"] for d in docs] == ids[3:]
+    assert token is None
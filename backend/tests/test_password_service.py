@@ -0,0 +1,75 @@
+# backend/tests/test_password_service.py
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from flask import Flask
+from werkzeug.security import generate_password_hash
+
+from backend.app.models.user import User
+from backend.app.services import password_service
+from backend.app.services.password_service import _HashPool, PasswordServiceBusy
+
+
+@pytest.fixture
+def app_ctx():
+    app = Flask(__name__)
+    app.config.update(PASSWORD_BCRYPT_ROUNDS=4)
+    with app.app_context():
+        yield
+
+
+def test_legacy_werkzeug_hash_verifies_and_is_upgraded(app_ctx):
+    legacy = generate_password_hash("s3cret")
+    ok, new_hash = password_service.verify_and_upgrade("s3cret", legacy)
+    assert ok and new_hash.startswith("$2b$04$")
+    assert password_service.verify_password("s3cret", new_hash)
+    assert password_service.verify_and_upgrade("s3cret", new_hash) == (True, None)
+    assert password_service.verify_and_upgrade("wrong", legacy) == (False, None)
+
+
+def test_pool_rejects_work_beyond_queue_limit():
+    gate = threading.Event()
+    pool = _HashPool(workers=1, max_queue=0, timeout=5)
+    t = threading.Thread(target=pool.run, args=(gate.wait,))
+    t.start()
+    while pool.stats()["running"] == 0:
+        time.sleep(0.01)
+    with pytest.raises(PasswordServiceBusy):
+        pool.run(lambda: None)
+    gate.set()
+    t.join()
+    assert pool.stats()["rejected"] == 1 and pool.stats()["completed"] == 1
+
+
+def test_timed_out_jobs_are_cancelled_before_they_run():
+    gate = threading.Event()
+    pool = _HashPool(workers=1, max_queue=1, timeout=0.05)
+    # The running job outlives its own caller's timeout too; only queued ones are dropped
+    t = threading.Thread(target=lambda: pytest.raises(PasswordServiceBusy, pool.run, gate.wait))
+    t.start()
+    while pool.stats()["running"] == 0:
+        time.sleep(0.01)
+    ran = []
+    with pytest.raises(PasswordServiceBusy):
+        pool.run(ran.append, "queued")
+    gate.set()
+    t.join()
+    pool._executor.shutdown(wait=True)
+    assert ran == [] and pool._pending == 0
+
+def test_user_model_hashes_through_the_service(app_ctx, monkeypatch):
+    user = User("model.user", "Model@Example.com", password="s3cret")
+    assert password_service.bcrypt_cost(user.password_hash) == 4
+    assert user.check_password("s3cret") and not user.check_password("wrong")
+
+    writes = []
+    collection = SimpleNamespace(update_one=lambda query, update: writes.append(update))
+    monkeypatch.setattr(User, "collection", classmethod(lambda cls: collection))
+    legacy = User.from_mongo({"_id": ObjectId(), "username": "old", "email": "old@example.com",
+                              "password_hash": generate_password_hash("s3cret")})
+    assert legacy.check_password("s3cret")
+    assert legacy.password_hash.startswith("$2b$04$")
+    assert writes == [{"$set": {"password_hash": legacy.password_hash}}]
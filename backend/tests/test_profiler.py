@@ -0,0 +1,51 @@
+# backend/tests/test_profiler.py
+import json
+import os
+
+from flask import Flask
+
+from backend.app.middlewares import profiler
+
+
+def make_app(tmp_path, monkeypatch, admin=True, **config):
+    monkeypatch.setattr(profiler, "_is_admin", lambda: admin)
+    monkeypatch.setattr(profiler, "get_jwt", lambda: {"sub": "admin-1"})
+    app = Flask(__name__)
+    app.config.update(PROFILE_DIR=str(tmp_path), **config)
+    profiler.init_profiler(app)
+
+    @app.route("/work")
+    def work():
+        return {"total": sum(i * i for i in range(1000))}
+
+    return app
+
+
+def test_admin_request_is_profiled_and_cataloged(tmp_path, monkeypatch):
+    client = make_app(tmp_path, monkeypatch).test_client()
+    response = client.get("/work", headers={"X-Profile": "1"})
+    profile_id = response.headers["X-Profile-Id"]
+
+    entries = profiler.list_profiles(str(tmp_path))
+    assert [e["id"] for e in entries] == [profile_id]
+    assert entries[0]["endpoint"] == "work" and entries[0]["user_id"] == "admin-1"
+    path = profiler.profile_path(str(tmp_path), profile_id)
+    assert "function calls" in profiler.profile_text(path)
+    assert profiler.profile_path(str(tmp_path), "../etc/passwd") is None
+
+
+def test_requests_without_header_or_admin_are_not_profiled(tmp_path, monkeypatch):
+    assert "X-Profile-Id" not in make_app(tmp_path, monkeypatch).test_client().get("/work").headers
+    client = make_app(tmp_path, monkeypatch, admin=False).test_client()
+    assert "X-Profile-Id" not in client.get("/work", headers={"X-Profile": "1"}).headers
+    assert profiler.list_profiles(str(tmp_path)) == []
+
+
+def test_catalog_keeps_only_the_newest_profiles(tmp_path, monkeypatch):
+    client = make_app(tmp_path, monkeypatch, PROFILE_MAX_FILES=2).test_client()
+    ids = [client.get("/work", headers={"X-Profile": "1"}).headers["X-Profile-Id"] for _ in range(3)]
+    kept = {e["id"] for e in profiler.list_profiles(str(tmp_path))}
+    assert len(kept) == 2 and ids[-1] in kept
+    assert len(os.listdir(tmp_path)) == 4
+    with open(os.path.join(tmp_path, f"{ids[-1]}.json")) as f:
+        assert json.load(f)["size"] > 0
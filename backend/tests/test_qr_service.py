@@ -0,0 +1,66 @@
+# backend/tests/test_qr_service.py
+from bson import ObjectId
+
+from backend.app.services.qr_service import (
+    make_compact_token, parse_compact_token, encode_session_key, decode_session_key, build_qr_payload
+)
+
+
+def test_session_key_round_trip():
+    oid = ObjectId()
+    key = encode_session_key(oid)
+    assert len(key) <= 19
+    assert decode_session_key(key) == oid
+
+
+def test_compact_token_parses_case_insensitively():
+    oid = ObjectId()
+    token = make_compact_token(oid)
+    assert parse_compact_token(token.lower()) == (oid, token)
+    assert build_qr_payload(token).endswith(token)
+
+
+def test_legacy_uuid_is_not_compact():
+    assert parse_compact_token("8f14e45f-ceea-467f-a0e6-6e3c9a1e4b2d") == (None, None)
+    assert build_qr_payload("8f14e45f-ceea-467f-a0e6-6e3c9a1e4b2d").startswith("http")
+
+
+def test_compact_payload_stays_a_url_unless_bare_tokens_are_enabled(monkeypatch):
+    token = make_compact_token(ObjectId())
+    monkeypatch.delenv("QR_COMPACT_BASE_URL", raising=False)
+    monkeypatch.setenv("QR_BASE_URL", "https://attend.example/scan/")
+    assert build_qr_payload(token) == f"https://attend.example/scan/{token}"
+    monkeypatch.setenv("QR_COMPACT_BASE_URL", "HTTPS://AT.EX")
+    assert build_qr_payload(token) == f"HTTPS://AT.EX/{token}"
+    monkeypatch.setenv("QR_BARE_TOKENS", "1")
+    assert build_qr_payload(token) == token
+
+
+class FakeSessions:
+    def __init__(self, doc):
+        self.doc = doc
+        self.reads = []
+
+    def find_one(self, query, projection=None):
+        self.reads.append(projection)
+        if self.doc is None or query.get("_id") != self.doc["_id"]:
+            return None
+        return {k: v for k, v in self.doc.items() if projection is None or k in projection or k == "_id"}
+
+
+def test_cached_sessions_are_confirmed_before_a_scan_is_accepted(monkeypatch):
+    from types import SimpleNamespace
+    from backend.app.services import session_index
+
+    session_id = ObjectId()
+    token = make_compact_token(session_id)
+    sessions = FakeSessions({"_id": session_id, "qr_code_uuid": token, "is_active": True, "course_id": "c1"})
+    monkeypatch.setattr(session_index, "mongo", SimpleNamespace(db=SimpleNamespace(sessions=sessions)))
+    session_index.invalidate(session_id)
+
+    assert session_index.resolve_qr(token)["course_id"] == "c1"
+    # Another worker closes the session: the cached copy must not accept the scan
+    sessions.doc["is_active"] = False
+    assert session_index.resolve_qr(token) is None
+    sessions.doc.update(is_active=True, qr_code_uuid=make_compact_token(session_id))
+    assert session_index.resolve_qr(token) is None
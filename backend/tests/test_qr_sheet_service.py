@@ -0,0 +1,25 @@
+# backend/tests/test_qr_sheet_service.py
+from backend.app.services.qr_sheet_service import render_qr_batch, compose_pdf
+
+
+def test_render_qr_batch_renders_each_payload_once():
+    progress = []
+    payloads = ["http://x/scan/a", "http://x/scan/b", "http://x/scan/a"]
+    rendered = render_qr_batch(payloads, workers=2, on_progress=lambda done, total: progress.append((done, total)))
+
+    assert set(rendered) == {"http://x/scan/a", "http://x/scan/b"}
+    assert all(png.startswith(b"\x89PNG") for png in rendered.values())
+    assert progress[-1] == (2, 2)
+
+
+def test_compose_pdf_paginates(tmp_path):
+    rendered = render_qr_batch(["http://x/scan/a"], workers=1)
+    png = rendered["http://x/scan/a"]
+    items = [(png, ["Course", f"Seat {i}"]) for i in range(7)]
+
+    path = compose_pdf(items, str(tmp_path / "sheet.pdf"), columns=2, rows=3)
+
+    data = open(path, "rb").read()
+    assert data.startswith(b"%PDF")
+    # 7 codes at 6 per page -> 2 pages
+    assert data.count(b"/Type /Page\n") == 2
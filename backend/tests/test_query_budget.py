@@ -0,0 +1,108 @@
+# backend/tests/test_query_budget.py
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from flask import Flask
+from flask_jwt_extended import create_access_token
+
+from backend.app.database import mongo
+from backend.app.middlewares.db_profiler import RequestCommandListener, init_db_profiler
+from backend.app.utils.query_budget import QueryBudgetExceeded, budget_of, query_budget
+
+# Hot paths that must keep a declared budget
+BUDGETED_ENDPOINTS = [
+    "student_bp.get_dashboard",
+    "student_bp.scan_qr",
+    "lecturer_bp.get_dashboard",
+    "admin_bp.get_dashboard",
+    "admin_bp.get_all_users",
+    "admin_bp.chronic_absentees",
+]
+
+
+def _issue(listener, n, collection="students"):
+    for i in range(n):
+        event = SimpleNamespace(request_id=(collection, i), command_name="find", duration_micros=100, reply={},
+                                command={"find": collection, "filter": {"_id": i}})
+        listener.started(event)
+        listener.succeeded(event)
+
+
+def _budget_app(testing, default=None):
+    app = Flask(__name__)
+    app.config.update(TESTING=testing, QUERY_BUDGET_DEFAULT=default)
+    init_db_profiler(app)
+    listener = RequestCommandListener()
+
+    @app.before_request
+    def auth_lookups():
+        # Stands in for token/role checks, which run outside the handler
+        _issue(listener, 2, "admins")
+
+    @app.route("/loop/<int:n>")
+    @query_budget(3)
+    def loop(n):
+        _issue(listener, n)
+        return {"ok": True}
+
+    @app.route("/plain/<int:n>")
+    def plain(n):
+        _issue(listener, n)
+        return {"ok": True}
+
+    return app
+
+
+def test_handler_budget_ignores_commands_outside_the_handler():
+    assert _budget_app(testing=True).test_client().get("/loop/3").status_code == 200
+
+
+def test_one_extra_query_fails_under_testing():
+    with pytest.raises(QueryBudgetExceeded, match=r"handler issued 4 MongoDB commands \(budget 3\): 4x find students"):
+        _budget_app(testing=True).test_client().get("/loop/4")
+
+
+def test_over_budget_only_logs_in_production():
+    assert _budget_app(testing=False).test_client().get("/loop/5").status_code == 200
+
+
+def test_undecorated_routes_fall_under_the_default_budget():
+    client = _budget_app(testing=True, default=5).test_client()
+    assert client.get("/plain/3").status_code == 200  # 2 auth + 3 handler
+    with pytest.raises(QueryBudgetExceeded, match="default budget"):
+        client.get("/plain/4")
+
+
+def test_hot_paths_declare_budgets(app):
+    missing = [e for e in BUDGETED_ENDPOINTS if budget_of(e, app) is None]
+    assert missing == []
+
+
+# ----------------------------
+# Routes against the test DB
+# ----------------------------
+def _admin_headers():
+    admin_id = mongo.db.admins.insert_one({"username": "budgetadmin", "role": "admin"}).inserted_id
+    token = create_access_token(identity=str(admin_id), additional_claims={"role": "admin", "user_type": "admins"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_chronic_absentees_does_not_query_per_student(app, client):
+    students = [{"_id": ObjectId(), "name": f"Absentee {i}"} for i in range(30)]
+    mongo.db.students.insert_many(students)
+    mongo.db.attendance.insert_many([
+        {"student_id": s["_id"], "status": "absent", "timestamp": datetime.utcnow()}
+        for s in students for _ in range(5)
+    ])
+    response = client.get("/api/admin/analytics/chronic-absentees", headers=_admin_headers())
+    assert response.status_code == 200
+    assert all("student" in r for r in response.get_json())
+
+
+def test_user_listing_is_independent_of_collection_size(app, client):
+    mongo.db.students.insert_many([{"name": f"Student {i}", "email": f"s{i}@example.com"} for i in range(60)])
+    response = client.get("/api/admin/users?limit=20&include_total=1", headers=_admin_headers())
+    assert response.status_code == 200
+    assert response.get_json()["pagination"]["has_more"] is True
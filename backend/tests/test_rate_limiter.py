@@ -0,0 +1,101 @@
+# backend/tests/test_rate_limiter.py
+import time
+
+from backend.app.middlewares.rate_limiter import SlidingWindowLimiter
+
+
+def test_sliding_window_blocks_and_recovers():
+    limiter = SlidingWindowLimiter(shards=4)
+    t0 = 60 * 20_000.0  # start of a 60s window
+    results = [limiter.hit("10.0.0.1", 5, 60, now=t0 + i)[0] for i in range(6)]
+    assert results == [True] * 5 + [False]
+
+    allowed, _, retry_after = limiter.hit("10.0.0.1", 5, 60, now=t0 + 10)
+    assert not allowed and retry_after >= 50
+    # Other keys are unaffected
+    assert limiter.hit("10.0.0.2", 5, 60, now=t0 + 10)[0]
+
+    # Halfway through the next window only half of the previous count still weighs in
+    later = [limiter.hit("10.0.0.1", 5, 60, now=t0 + 90)[0] for _ in range(3)]
+    assert later == [True, True, False]
+
+
+def test_idle_keys_are_evicted():
+    limiter = SlidingWindowLimiter(shards=4)
+    for i in range(1000):
+        limiter.hit(f"10.1.{i // 256}.{i % 256}", 10, 60, now=0.0)
+    limiter.hit("active", 10, 60, now=200.0)
+    assert limiter.sweep(now=200.0) == 1000
+    assert len(limiter) == 1
+
+
+def test_mmap_backend_shares_counts_between_workers(tmp_path):
+    from backend.app.middlewares.rate_limit_backends import MmapBackend
+
+    path = str(tmp_path / "ratelimit.bin")
+    worker_a, worker_b = MmapBackend(path, slots=64), MmapBackend(path, slots=64)
+    t0 = 60 * 20_000.0
+    assert [worker_a.hit("ip", 4, 60, now=t0)[0] for _ in range(2)] == [True, True]
+    assert [worker_b.hit("ip", 4, 60, now=t0)[0] for _ in range(3)] == [True, True, False]
+    assert worker_a.hit("other-ip", 4, 60, now=t0)[0]
+
+
+def test_mmap_backend_enforces_fractional_windows(tmp_path):
+    from backend.app.middlewares.rate_limit_backends import MmapBackend
+
+    backend = MmapBackend(str(tmp_path / "ratelimit.bin"), slots=64)
+    for window in (1.5, 0.5):
+        t0 = window * 1_000_000
+        results = [backend.hit(f"ip-{window}", 3, window, now=t0 + i * 0.01)[0] for i in range(4)]
+        assert results == [True, True, True, False]
+
+
+def test_policy_table_matches_routes_and_roles():
+    import time
+    from flask import Flask
+    from backend.app.middlewares import rate_limiter as rl
+
+    app = Flask(__name__)
+    app.config["RATE_LIMIT_POLICY_RELOAD_SECONDS"] = 3600
+    rl._policies.update(compiled=rl._compile(rl.DEFAULT_POLICIES), checked_at=time.monotonic())
+    with app.app_context():
+        assert rl.match_policy("/api/admin/analytics/attendance-trends", "GET", "admin")["name"] == "admin-analytics"
+        assert rl.match_policy("/api/student/checkin/code", "POST", "student")["name"] == "check-in"
+        assert rl.match_policy("/api/student/checkin/code", "POST", None)["name"] == "default"
+        assert rl.match_policy("/api/auth/login", "POST", None)["key"] == "account"
+        assert rl.match_policy("/api/auth/register", "POST", None)["key"] == "ip"
+    rl.reload_policies()
+
+    assert rl.validate_policies(rl.DEFAULT_POLICIES) is None
+    assert rl.validate_policies([{"name": "x", "pattern": "*", "limit": 0, "window": 60}])
+    assert rl.validate_policies([{"name": "x", "pattern": "*", "limit": 5, "window": 60, "methods": "POST"}])
+    assert rl.validate_policies([{"name": "x", "pattern": "*", "limit": 5, "window": 60, "roles": ("admin",)}])
+
+
+def test_logins_behind_one_address_are_limited_per_account():
+    from flask import Flask
+    from backend.app.middlewares import rate_limiter as rl
+
+    app = Flask(__name__)
+    app.config.update(RATE_LIMIT_POLICY_RELOAD_SECONDS=3600, SKIP_RATE_LIMIT_LOCAL=False)
+    rl.init_rate_limiting(app)
+
+    @app.route("/api/auth/login", methods=["POST"])
+    def login():
+        return {"ok": True}
+
+    policies = [{"name": "login", "pattern": "/api/auth/login", "methods": ["POST"], "limit": 2, "window": 60,
+                 "key": "account", "ip_limit": 5}]
+    rl._policies.update(compiled=rl._compile(policies), checked_at=time.monotonic())
+    rl._limiter = SlidingWindowLimiter()
+    client = app.test_client()
+    try:
+        login = lambda email: client.post("/api/auth/login", json={"email": email}).status_code
+        assert [login("a@uni.edu") for _ in range(3)] == [200, 200, 429]
+        # Classmates on the same NAT address keep their own buckets
+        assert [login("b@uni.edu"), login("c@uni.edu")] == [200, 200]
+        # until the per-address ceiling is reached
+        assert login("d@uni.edu") == 429
+    finally:
+        rl.reload_policies()
+        rl._limiter = None
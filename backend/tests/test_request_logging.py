@@ -0,0 +1,26 @@
+# backend/tests/test_request_logging.py
+import logging
+import queue
+
+from backend.app.middlewares.logger import DroppingQueueHandler, JsonFormatter, redact
+
+
+def test_redact_masks_secrets_and_caps_strings():
+    body = {"email": "a@b.c", "password": "hunter2", "profile": {"Token": "x", "bio": "y" * 1000}}
+    clean = redact(body)
+    assert clean["password"] == "***" and clean["profile"]["Token"] == "***"
+    assert clean["email"] == "a@b.c" and len(clean["profile"]["bio"]) < 300
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    logger = logging.getLogger("test.dropping")
+    logger.addHandler(handler)
+    logger.propagate = False
+    logger.warning("first %s", 1, extra={"event": {"status": 200}})
+    logger.warning("second")
+    assert handler.dropped == 1
+
+    record = handler.queue.get_nowait()
+    line = JsonFormatter().format(record)
+    assert '"msg": "first 1"' in line and '"status": 200' in line
@@ -0,0 +1,56 @@
+# backend/tests/test_token_revocation.py
+import threading
+import time
+
+from backend.app.services import token_revocation
+
+
+def _fresh_state(monkeypatch, **state):
+    monkeypatch.setattr(token_revocation, "_state", {
+        "ready": False, "seq": 0, "next_poll": 0.0, "refreshing": False, "failures": 0, "jtis": {}, **state,
+    })
+    monkeypatch.setattr(token_revocation, "_loaded", threading.Event())
+    monkeypatch.setattr(token_revocation, "_collection", lambda: None)
+
+
+def test_refresh_runs_outside_the_lock_and_once_at_a_time(monkeypatch):
+    _fresh_state(monkeypatch, ready=True, jtis={"revoked": time.time()})
+    token_revocation._loaded.set()
+    release, reads = threading.Event(), []
+
+    def slow_version():
+        reads.append(1)
+        release.wait(5)
+        return 0
+
+    monkeypatch.setattr(token_revocation, "_current_version", slow_version)
+    worker = threading.Thread(target=token_revocation.is_revoked, args=("a",))
+    worker.start()
+    while not reads:
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    assert token_revocation.is_revoked("revoked") and not token_revocation.is_revoked("b")
+    assert time.monotonic() - started < 1 and len(reads) == 1
+    release.set()
+    worker.join()
+
+
+def test_failed_refreshes_back_off(monkeypatch):
+    _fresh_state(monkeypatch)
+    attempts = []
+
+    def down():
+        attempts.append(1)
+        raise ConnectionError("no primary")
+
+    monkeypatch.setattr(token_revocation, "_collection", down)
+    for _ in range(20):
+        assert token_revocation.is_revoked("jti") is False
+    assert len(attempts) == 1 and token_revocation._state["failures"] == 1
+
+    # The next attempt waits longer after each failure
+    token_revocation._state["next_poll"] = 0.0
+    token_revocation.is_revoked("jti")
+    delay = token_revocation._state["next_poll"] - time.monotonic()
+    assert delay > token_revocation.POLL_SECONDS * 3
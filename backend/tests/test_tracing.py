@@ -0,0 +1,76 @@
+# backend/tests/test_tracing.py
+import json
+import logging
+import threading
+
+import pytest
+
+from backend.app.middlewares.tracing import TraceFileHandler
+from backend.app.utils import tracing
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def emit(self, record):
+        self.events.append(json.loads(record.getMessage()))
+
+
+@pytest.fixture
+def events():
+    logger = logging.getLogger(tracing.TRACE_LOGGER)
+    handler = _Collect()
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    tracing.configure(enabled=True, sample_rate=1.0)
+    yield handler.events
+    tracing.configure(enabled=False)
+    logger.removeHandler(handler)
+
+
+def test_nested_spans_share_a_trace(events):
+    with tracing.span("outer") as outer:
+        with tracing.span("inner", rows=3):
+            pass
+        tracing.record("mongo.find", 0.0, 0.002, category="db")
+    inner, db, root = events
+    assert [e["name"] for e in events] == ["inner", "mongo.find", "outer"]
+    assert root["args"]["parent_id"] is None
+    assert inner["args"]["parent_id"] == outer.span_id == db["args"]["parent_id"]
+    assert {e["args"]["trace_id"] for e in events} == {outer.trace_id}
+    assert inner["ph"] == "X" and inner["args"]["rows"] == 3
+    assert tracing.current_span() is None
+
+
+def test_bound_functions_join_the_callers_trace(events):
+    def job():
+        with tracing.span("job"):
+            pass
+
+    with tracing.span("request") as root:
+        worker = threading.Thread(target=tracing.bind(job))
+        worker.start()
+        worker.join()
+    assert events[0]["name"] == "job"
+    assert events[0]["args"]["parent_id"] == root.span_id
+
+
+def test_unsampled_traces_write_nothing(events):
+    tracing.configure(enabled=True, sample_rate=0.0)
+    with tracing.span("request"):
+        with tracing.span("child"):
+            pass
+    assert events == []
+
+
+def test_trace_file_is_a_loadable_event_array(tmp_path):
+    path = tmp_path / "trace.json"
+    handler = TraceFileHandler(str(path), max_bytes=10_000, backup_count=1)
+    for i in range(2):
+        handler.emit(logging.makeLogRecord({"msg": json.dumps({"name": f"s{i}", "ph": "X"})}))
+    handler.close()
+    text = path.read_text()
+    assert text.startswith("[\n")
+    assert [e["name"] for e in json.loads(text.rstrip().rstrip(",") + "]")] == ["s0", "s1"]
@@ -0,0 +1,72 @@
+# backend/tests/test_traffic_replay.py
+import json
+from datetime import datetime
+
+from flask import Flask, g
+
+from backend.app.middlewares import traffic_capture
+from backend.tools import traffic_replay
+
+
+def test_capture_keeps_shapes_not_values():
+    app = Flask(__name__)
+
+    @app.route("/api/student/<student_id>/scan", methods=["POST"])
+    def scan(student_id):
+        return ""
+
+    body = {"qr_data": "SECRET.TOKEN", "location": {"latitude": 5.6, "longitude": -0.2}, "ids": [1, 2]}
+    with app.test_request_context("/api/student/abc123/scan?verbose=yes", method="POST", json=body):
+        app.preprocess_request()
+        g._jwt_extended_jwt = {"sub": "abc123", "role": "Student"}
+        trace = traffic_capture.build_trace(app.response_class(status=201), 1700000000.0, 12.345)
+
+    assert trace["route"] == "/api/student/<student_id>/scan"
+    assert trace["params"] == ["student_id"]
+    assert trace["query"] == {"verbose": "str"}
+    assert trace["body"] == {
+        "qr_data": "str",
+        "location": {"latitude": "float", "longitude": "float"},
+        "ids": {"list": 2, "of": "int"},
+    }
+    assert trace["role"] == "student" and trace["status"] == 201
+    assert trace["actor"] == traffic_capture.actor("abc123") and "abc123" not in json.dumps(trace)
+
+
+def test_traces_are_filled_from_the_dataset():
+    dataset = traffic_replay.Dataset({
+        "users": {"student": [{"id": "s1", "email": "s1@example.test", "token": "tok"}]},
+        "params": {"course_id": ["c1"]},
+        "values": {"qr_data": ["QR"]},
+    })
+    trace = {
+        "method": "POST", "route": "/api/student/<student_id>/courses/<course_id>", "role": "student",
+        "actor": "a1", "query": {"cursor": "str", "course_id": "str"},
+        "body": {"qr_data": "str", "email": "str", "n": "int", "tags": {"list": 2, "of": "str"}},
+    }
+    method, path, headers, body, query = traffic_replay.build_request(trace, dataset)
+    assert (method, path) == ("POST", "/api/student/s1/courses/c1")
+    assert headers == {"Authorization": "Bearer tok"}
+    assert body == {"qr_data": "QR", "email": "s1@example.test", "n": 1, "tags": ["load-test", "load-test"]}
+    assert query == {"course_id": "c1"}
+
+
+def test_window_selects_the_rush(tmp_path):
+    day = datetime(2025, 3, 3)
+    times = [day.replace(hour=h, minute=m).timestamp() for h, m in [(7, 59), (8, 0), (9, 29), (9, 30)]]
+    capture = tmp_path / "traffic.jsonl"
+    capture.write_text("\n".join(json.dumps({"ts": t, "route": "/health", "method": "GET"}) for t in times))
+
+    traces = traffic_replay.load_traces([str(tmp_path / "traffic.jsonl*")], traffic_replay.parse_window("08:00-09:30"))
+    assert [t["ts"] for t in traces] == times[1:3]
+
+
+def test_report_percentiles_per_route():
+    results = [
+        {"method": "GET", "route": "/health", "status": 200, "latency_ms": float(ms), "captured_ms": 5.0}
+        for ms in range(1, 101)
+    ] + [{"method": "POST", "route": "/scan", "status": "ConnectionError", "latency_ms": 3.0, "captured_ms": None}]
+    report = traffic_replay.summarize(results)
+    assert (report["GET /health"]["p50"], report["GET /health"]["p99"], report["GET /health"]["max"]) == (50, 99, 100)
+    assert report["GET /health"]["captured_p50"] == 5.0
+    assert report["POST /scan"]["statuses"] == {"ConnectionError": 1}
@@ -0,0 +1,100 @@
+# backend/tests/test_user_directory.py
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from backend.app.services import user_directory
+
+
+class FakeDirectory:
+    def __init__(self):
+        self.docs = {}
+
+    def find_one(self, query):
+        return next((d for d in self.docs.values() if all(d.get(k) == v for k, v in query.items())), None)
+
+    def insert_one(self, doc):
+        self.docs[doc["_id"]] = dict(doc)
+
+    def update_one(self, query, update):
+        doc = self.docs.get(query["_id"])
+        if doc is not None:
+            doc.update(update.get("$set", {}))
+        return SimpleNamespace(matched_count=int(doc is not None))
+
+    def find_one_and_update(self, query, update, projection=None, return_document=None):
+        doc = self.docs.get(query["_id"])
+        if doc is None:
+            return None
+        before = {"_id": doc["_id"], **({"email": doc["email"]} if "email" in doc else {})}
+        doc.update(update.get("$set", {}))
+        for field in update.get("$unset", {}):
+            doc.pop(field, None)
+        return before
+
+    def delete_one(self, query):
+        return SimpleNamespace(deleted_count=int(self.docs.pop(query["_id"], None) is not None))
+
+
+def _directory(monkeypatch):
+    directory = FakeDirectory()
+    monkeypatch.setattr(user_directory, "_directory", lambda: directory)
+    monkeypatch.setattr(user_directory, "ensure_ready", lambda: None)
+    monkeypatch.setattr(user_directory, "_last_sync", {"at": float("-inf")})
+    return directory
+
+
+def test_lookup_misses_sync_at_most_once_per_interval(monkeypatch):
+    _directory(monkeypatch)
+    syncs = []
+    monkeypatch.setattr(user_directory, "sync", lambda: syncs.append(1) or 0)
+
+    for _ in range(5):
+        assert user_directory._lookup({"email": "nobody@example.com"}) is None
+    assert len(syncs) == 1
+
+
+def test_email_update_registers_a_user_missing_from_the_directory(monkeypatch):
+    directory = _directory(monkeypatch)
+    user_id = ObjectId()
+
+    user_directory.update_email(user_id, "New@Example.com", "students")
+    assert directory.docs[user_id]["email"] == "new@example.com"
+    assert directory.docs[user_id]["collection"] == "students"
+
+    user_directory.update_email(user_id, "second@example.com", "students")
+    assert user_directory._lookup({"email": "second@example.com"})["_id"] == user_id
+
+
+class FailingStudents:
+    def update_one(self, query, update):
+        raise RuntimeError("primary stepped down")
+
+
+def test_email_change_is_rolled_back_when_the_document_update_fails(monkeypatch):
+    directory = _directory(monkeypatch)
+    user_id = ObjectId()
+    user_directory.add_user(user_id, "old@example.com", "students")
+    monkeypatch.setattr(user_directory, "mongo", SimpleNamespace(db={"students": FailingStudents()}))
+
+    with pytest.raises(RuntimeError):
+        user_directory.set_email("students", user_id, "new@example.com")
+    assert directory.docs[user_id]["email"] == "old@example.com"
+
+
+def test_sync_rescans_behind_the_high_water_mark():
+    high_water = ObjectId.from_datetime(datetime(2025, 3, 3, 8, 0))
+    since = user_directory._since_query(high_water)["_id"]["$gte"]
+    # An id minted slightly earlier by another client is still picked up
+    late = ObjectId.from_datetime(datetime(2025, 3, 3, 7, 58))
+    assert since <= late < high_water
+    assert user_directory._since_query(None) == {}
+
+
+def test_full_reconcile_runs_once_per_interval():
+    now = datetime(2025, 3, 3, 8, 0)
+    assert user_directory._full_sync_due({}, now)
+    assert not user_directory._full_sync_due({"full_synced_at": now - timedelta(hours=1)}, now)
+    assert user_directory._full_sync_due({"full_synced_at": now - user_directory.FULL_SYNC_INTERVAL}, now)
@@ -0,0 +1,390 @@
+#!/usr/bin/env python
+"""
+Replay captured traffic against a local SmartAttendance instance.
+
+Traces are recorded by the traffic capture middleware (set
+TRAFFIC_CAPTURE_FILE on the instance being observed). They hold the route
+template, body shape, role and timing of each request, but no values, so a
+replay needs a synthetic dataset to fill them in:
+
+    # 1. Seed a local (throwaway!) database and write dataset.json with
+    #    ids and signed tokens for each role
+    MONGO_URI=mongodb://localhost:27017/smartattendance_load \\
+        python backend/tools/traffic_replay.py seed --out dataset.json
+
+    # 2. Start the API against that database, then replay the 08:00-09:30
+    #    rush at 4x speed and report latency percentiles per route
+    python backend/tools/traffic_replay.py replay traffic.jsonl* \\
+        --dataset dataset.json --window 08:00-09:30 --speed 4
+
+--speed 1 reproduces the captured pacing; --speed 0 sends as fast as the
+worker pool allows.
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Add the repo root to Python path so 'backend' can be imported
+repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, repo_root)
+
+ROLES = ("admin", "lecturer", "student")
+# Query parameters whose captured values cannot be reproduced (opaque cursors)
+UNREPLAYABLE_QUERY = {"cursor"}
+
+
+# ===================== Captures =======================
+
+def load_traces(patterns, window=None):
+    """Captured traces from the given files (globs allowed), oldest first."""
+    paths = sorted({p for pattern in patterns for p in glob.glob(pattern)})
+    traces = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    trace = json.loads(line)
+                except ValueError:
+                    continue
+                if trace.get("route") and in_window(trace["ts"], window):
+                    traces.append(trace)
+    traces.sort(key=lambda t: t["ts"])
+    return traces
+
+
+def parse_window(text):
+    """"08:00-09:30" -> ((8, 0), (9, 30)); None when not given."""
+    if not text:
+        return None
+    start, end = text.split("-")
+    return tuple(tuple(int(p) for p in part.split(":")) for part in (start, end))
+
+
+def in_window(ts, window):
+    if window is None:
+        return True
+    when = datetime.fromtimestamp(ts)
+    return window[0] <= (when.hour, when.minute) < window[1]
+
+
+# ===================== Synthetic requests =======================
+
+class Dataset:
+    """Ids, tokens and values from `seed`, handed out consistently per captured actor."""
+
+    def __init__(self, data, seed=0):
+        self.users = data.get("users", {})
+        self.params = data.get("params", {})
+        self.values = data.get("values", {})
+        self._rng = random.Random(seed)
+        self._actors = {}
+
+    def user_for(self, trace):
+        users = self.users.get(trace.get("role") or "")
+        if not users:
+            return None
+        key = (trace.get("role"), trace.get("actor"))
+        if key not in self._actors:
+            self._actors[key] = self._rng.choice(users)
+        return self._actors[key]
+
+    def param(self, name, user=None, role=None):
+        # A student's own id for student-scoped routes, so ownership checks pass
+        if user and name in ("student_id", "user_id", "id") and role == "student":
+            return user["id"]
+        choices = self.params.get(name) or self.values.get(name)
+        return self._rng.choice(choices) if choices else "000000000000000000000000"
+
+    def value(self, key, shape, user, role):
+        if key in self.params or key in self.values:
+            return self.param(key, user, role)
+        if key == "email" and user:
+            return user.get("email")
+        return synthesize(shape, self, user, role)
+
+
+def synthesize(shape, dataset, user=None, role=None):
+    """A JSON value matching a captured body shape."""
+    if isinstance(shape, dict) and "list" in shape and "of" in shape:
+        return [synthesize(shape["of"], dataset, user, role) for _ in range(min(shape["list"], 50))]
+    if isinstance(shape, dict):
+        return {k: dataset.value(k, v, user, role) for k, v in shape.items()}
+    return {"str": "load-test", "int": 1, "float": 0.0, "bool": True}.get(shape)
+
+
+def fill_route(route, dataset, user=None, role=None):
+    """`/api/student/<student_id>/courses` -> a concrete path from the dataset."""
+    parts = []
+    for segment in route.split("/"):
+        if segment.startswith("<") and segment.endswith(">"):
+            name = segment[1:-1].split(":")[-1]
+            segment = str(dataset.param(name, user, role))
+        parts.append(segment)
+    return "/".join(parts)
+
+
+def build_request(trace, dataset):
+    """(method, path, headers, json body, query) for one captured trace."""
+    role = trace.get("role")
+    user = dataset.user_for(trace)
+    headers = {"Authorization": f"Bearer {user['token']}"} if user else {}
+    body = synthesize(trace["body"], dataset, user, role) if trace.get("body") is not None else None
+    query = {
+        k: dataset.param(k, user, role) if k in dataset.params else "1"
+        for k in trace.get("query") or {} if k not in UNREPLAYABLE_QUERY
+    }
+    return trace["method"], fill_route(trace["route"], dataset, user, role), headers, body, query
+
+
+# ===================== Report =======================
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(results):
+    """Per-route latency percentiles, status counts and the captured baseline."""
+    by_route = defaultdict(list)
+    for r in results:
+        by_route[f"{r['method']} {r['route']}"].append(r)
+    report = {}
+    for key, rows in sorted(by_route.items()):
+        latencies = [r["latency_ms"] for r in rows]
+        statuses = defaultdict(int)
+        for r in rows:
+            statuses[str(r["status"])] += 1
+        captured = [r["captured_ms"] for r in rows if r.get("captured_ms") is not None]
+        report[key] = {
+            "count": len(rows),
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies),
+            "captured_p50": percentile(captured, 50),
+            "captured_p99": percentile(captured, 99),
+            "statuses": dict(statuses),
+        }
+    return report
+
+
+def print_report(report, wall_seconds):
+    total = sum(r["count"] for r in report.values())
+    print(f"\n{total} requests in {wall_seconds:.1f}s ({total / max(wall_seconds, 1e-9):.1f} req/s)\n")
+    header = f"{'route':<60} {'n':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'cap p50':>8}  statuses"
+    print(header)
+    print("-" * len(header))
+    fmt = lambda v: f"{v:8.1f}" if v is not None else f"{'-':>8}"
+    for key, r in report.items():
+        statuses = " ".join(f"{s}:{n}" for s, n in sorted(r["statuses"].items()))
+        print(f"{key[:60]:<60} {r['count']:>6} {fmt(r['p50'])} {fmt(r['p90'])} {fmt(r['p99'])} "
+              f"{fmt(r['max'])} {fmt(r['captured_p50'])}  {statuses}")
+
+
+# ===================== Replay =======================
+
+def replay(traces, dataset, base_url, speed=1.0, concurrency=32, timeout=30.0):
+    """
+    Send every trace at its captured offset divided by `speed` (0 = no pacing)
+    and return one result per request.
+    """
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    results, lock = [], threading.Lock()
+
+    def send(trace, prepared):
+        method, path, headers, body, query = prepared
+        started = time.perf_counter()
+        try:
+            resp = session.request(method, base_url.rstrip("/") + path, headers=headers,
+                                   json=body, params=query, timeout=timeout)
+            status = resp.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        result = {
+            "method": trace["method"], "route": trace["route"], "status": status,
+            "latency_ms": (time.perf_counter() - started) * 1000,
+            "captured_ms": trace.get("duration_ms"),
+        }
+        with lock:
+            results.append(result)
+
+    if not traces:
+        return results
+    origin, clock = traces[0]["ts"], time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for trace in traces:
+            prepared = build_request(trace, dataset)
+            if speed > 0:
+                delay = clock + (trace["ts"] - origin) / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(send, trace, prepared)
+    return results
+
+
+# ===================== Seed =======================
+
+def seed(students=500, lecturers=20, courses=40, sessions_per_course=2, token_hours=12):
+    """
+    Insert a synthetic dataset into the configured database and return the
+    dataset description (ids, emails, signed tokens) used by `replay`.
+    """
+    from bson import ObjectId
+    from flask_jwt_extended import create_access_token
+
+    from backend.app import create_app
+    from backend.app.database import mongo
+    from backend.app.routes.auth_routes import build_token_claims
+    from backend.app.services import user_directory, checkin_code_service
+    from backend.app.services.password_service import hash_password
+    from backend.app.services.qr_service import make_compact_token, build_qr_payload
+
+    app = create_app(os.getenv("FLASK_ENV", "development"))
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    run = now.strftime("%Y%m%d%H%M%S")
+    users = {role: [] for role in ROLES}
+
+    with app.app_context():
+        password_hash = hash_password("LoadTest2025!")
+
+        def add_users(role, collection, n, extra):
+            docs = []
+            for i in range(n):
+                email = f"load-{run}-{role}-{i}@example.test"
+                doc = {
+                    "_id": ObjectId(), "name": f"Load {role.title()} {i}", "username": f"load_{role}_{i}",
+                    "email": email, "password_hash": password_hash, "role": role,
+                    "is_active": True, "created_at": now, **extra(i),
+                }
+                user_directory.add_user(doc["_id"], email, collection)
+                docs.append(doc)
+            mongo.db[collection].insert_many(docs)
+            expires = timedelta(hours=token_hours)
+            for doc in docs:
+                token = create_access_token(identity=str(doc["_id"]), expires_delta=expires,
+                                            additional_claims=build_token_claims(doc, collection))
+                users[role].append({"id": str(doc["_id"]), "email": doc["email"], "token": token})
+            return docs
+
+        add_users("admin", "admins", 1, lambda i: {})
+        lecturer_docs = add_users("lecturer", "lecturers", lecturers, lambda i: {})
+        student_docs = add_users("student", "students", students,
+                                 lambda i: {"indexNumber": f"LT{run[-6:]}{i:05d}", "student_id": f"LT{i:05d}"})
+
+        course_docs, session_docs = [], []
+        for i in range(courses):
+            enrolled = rng.sample(student_docs, min(len(student_docs), rng.randint(30, 120)))
+            course_docs.append({
+                "_id": ObjectId(), "name": f"Load Course {i}", "code": f"LT{i:03d}",
+                "lecturer_id": lecturer_docs[i % len(lecturer_docs)]["_id"],
+                "student_ids": [s["_id"] for s in enrolled], "created_at": now,
+            })
+        mongo.db.courses.insert_many(course_docs)
+        for course in course_docs:
+            for _ in range(sessions_per_course):
+                session_id = ObjectId()
+                session_docs.append({
+                    "_id": session_id, "course_id": course["_id"],
+                    "session_date": now.strftime("%Y-%m-%d"), "start_time": "08:00", "end_time": "10:00",
+                    "is_active": True, "qr_code_uuid": make_compact_token(session_id),
+                    "code_seq": checkin_code_service.next_code_seq(),
+                    "expires_at": now + timedelta(hours=token_hours), "location": None, "created_at": now,
+                })
+        mongo.db.sessions.insert_many(session_docs)
+
+    return {
+        "created_at": now.isoformat(),
+        "users": users,
+        "params": {
+            "course_id": [str(c["_id"]) for c in course_docs],
+            "session_id": [str(s["_id"]) for s in session_docs],
+            "student_id": [u["id"] for u in users["student"]],
+            "lecturer_id": [u["id"] for u in users["lecturer"]],
+            "user_id": [u["id"] for role in ROLES for u in users[role]],
+        },
+        "values": {
+            "qr_data": [build_qr_payload(s["qr_code_uuid"]) for s in session_docs],
+            "qr_code_uuid": [s["qr_code_uuid"] for s in session_docs],
+        },
+    }
+
+
+# ===================== CLI =======================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_seed = sub.add_parser("seed", help="insert a synthetic dataset and write its description")
+    p_seed.add_argument("--out", default="dataset.json")
+    p_seed.add_argument("--students", type=int, default=500)
+    p_seed.add_argument("--lecturers", type=int, default=20)
+    p_seed.add_argument("--courses", type=int, default=40)
+    p_seed.add_argument("--sessions-per-course", type=int, default=2)
+
+    p_replay = sub.add_parser("replay", help="replay captured traces and report latency per route")
+    p_replay.add_argument("captures", nargs="+", help="capture files (globs allowed, e.g. traffic.jsonl*)")
+    p_replay.add_argument("--dataset", required=True)
+    p_replay.add_argument("--base-url", default="http://127.0.0.1:5000")
+    p_replay.add_argument("--window", help="only traces captured between HH:MM-HH:MM (local time)")
+    p_replay.add_argument("--speed", type=float, default=1.0, help="1 = real time, 4 = 4x faster, 0 = unpaced")
+    p_replay.add_argument("--concurrency", type=int, default=32)
+    p_replay.add_argument("--limit", type=int, help="replay at most this many traces")
+    p_replay.add_argument("--json", dest="json_out", help="also write the report as JSON to this file")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "seed":
+        dataset = seed(args.students, args.lecturers, args.courses, args.sessions_per_course)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(dataset, f, indent=2)
+        print(f"Seeded {len(dataset['params']['student_id'])} students, "
+              f"{len(dataset['params']['course_id'])} courses; wrote {args.out}")
+        return 0
+
+    with open(args.dataset, encoding="utf-8") as f:
+        dataset = Dataset(json.load(f))
+    traces = load_traces(args.captures, parse_window(args.window))
+    if args.limit:
+        traces = traces[:args.limit]
+    if not traces:
+        print("No traces to replay")
+        return 1
+    span = traces[-1]["ts"] - traces[0]["ts"]
+    print(f"Replaying {len(traces)} traces spanning {span:.0f}s at speed {args.speed or 'unpaced'}")
+
+    started = time.monotonic()
+    results = replay(traces, dataset, args.base_url, speed=args.speed, concurrency=args.concurrency)
+    report = summarize(results)
+    print_report(report, time.monotonic() - started)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())